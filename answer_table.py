@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import intents
+from cache import StampWatcher, normalize_query
+
+# ---------------------- Config ----------------------
+BASE_DIR = Path(__file__).parent
+TABLE_PATH = Path(os.environ.get("FAQ_ANSWER_TABLE", BASE_DIR / "data" / "answer_table.json"))
+FAQS_PATH = BASE_DIR / "faqs.json"
+# Extra canonical questions to precompute: a JSON list, or a text file with one question per line
+CANONICAL_QUESTIONS_PATH = os.environ.get("FAQ_CANONICAL_QUESTIONS")
+# Most frequent student questions from the chat history (user_store) added to the table
+TOP_LOGGED_QUESTIONS = int(os.environ.get("FAQ_ANSWER_TABLE_TOP_N", "50"))
+FORMAT_VERSION = 1
+
+# Example questions the Streamlit UI offers as buttons; always precomputed
+SUGGESTIONS = [
+    "Where is the library?",
+    "What is the annual fee structure for B.Tech IT?",
+    "Are there any scholarships available for general category students?",
+    "Which buses are available from 60 Feet Road?",
+    "What student clubs are available?",
+    "Show me upcoming campus drives.",
+    "What is my attendance?",
+    "Show me my result.",
+]
+
+# Fields of a /search response kept per question
+ENTRY_FIELDS = ("answer", "matched", "id", "category", "distance", "confidence")
+
+
+def file_hash(path):
+    """sha1 of a file's bytes (None if it does not exist)."""
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def canonical_questions(path=CANONICAL_QUESTIONS_PATH):
+    """SUGGESTIONS plus the questions listed in FAQ_CANONICAL_QUESTIONS."""
+    questions = list(SUGGESTIONS)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            questions.extend(json.loads(text))
+        except ValueError:
+            questions.extend(line.strip() for line in text.splitlines() if line.strip())
+    return questions
+
+
+def logged_questions(limit=TOP_LOGGED_QUESTIONS):
+    """The `limit` questions students asked most often (empty before anyone has chatted)."""
+    from user_store import DB_PATH, get_store
+
+    if limit <= 0 or not DB_PATH.exists():
+        return []
+    return [question for question, _ in get_store().top_questions(limit)]
+
+
+def build_table(faqs_path=FAQS_PATH, path=TABLE_PATH, questions=None, top_n=TOP_LOGGED_QUESTIONS):
+    """
+    Resolve the canonical and most-asked questions through the backend's search and write the table.
+
+    Answers come from the same retrieval and distance thresholds as /search. Only
+    confident FAQ matches are stored; greetings and personal questions are
+    answered without a search anyway. Returns the table dict.
+    """
+    import app as backend
+
+    if backend.engine.loaded:
+        backend.refresh_if_reingested(force=True)  # re-ingested by this process (db.py --watch)
+    if questions is None:
+        questions = canonical_questions() + logged_questions(top_n)
+    keyed = {}
+    for question in questions:
+        key = normalize_query(question)
+        if key and key not in keyed and intents.route(question) == "faq":
+            keyed[key] = question
+
+    answers = {}
+    keys = list(keyed)
+    for key, candidates in zip(keys, backend.lookup_many([keyed[k] for k in keys])):
+        payload = backend.build_answer(candidates)
+        if payload["matched"]:
+            answers[key] = {field: payload[field] for field in ENTRY_FIELDS}
+
+    table = {
+        "format_version": FORMAT_VERSION,
+        "faqs_path": str(Path(faqs_path).resolve()),
+        "faqs_hash": file_hash(faqs_path),
+        "model": backend.engine.embed_fn.fingerprint,
+        "created_at": time.time(),
+        "questions": len(keys),
+        "answers": answers,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp-{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return table
+
+
+class AnswerTable:
+    """
+    Precomputed question -> answer lookups loaded from the file build_table() writes.
+
+    get() is one dict lookup on the normalized question. The file is re-read when
+    it is rebuilt, and the table answers nothing while the FAQ file it was built
+    from has changed since (until the next rebuild).
+    """
+
+    def __init__(self, path=TABLE_PATH, check_interval=1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.answers = {}
+        self.header = {}
+        self.fresh = False
+        self.hits = 0
+        self.misses = 0
+        self._faqs_watcher = None
+        self._table_watcher = StampWatcher(self.path, check_interval)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("format_version") != FORMAT_VERSION:
+            data = {}
+        self.header = {k: v for k, v in data.items() if k != "answers"}
+        self.answers = data.get("answers") or {}
+        faqs_path = data.get("faqs_path")
+        self._faqs_watcher = StampWatcher(faqs_path, self.check_interval) if faqs_path else None
+        self._check_fresh()
+
+    def _check_fresh(self):
+        faqs_path = self.header.get("faqs_path")
+        self.fresh = bool(faqs_path) and file_hash(faqs_path) == self.header.get("faqs_hash")
+
+    def get(self, query):
+        """The stored /search fields for `query` ("answer", "id", ...), or None."""
+        if self._table_watcher.changed():
+            self._load()
+        elif self._faqs_watcher is not None and self._faqs_watcher.changed():
+            self._check_fresh()
+        entry = self.answers.get(normalize_query(query)) if self.fresh else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(entry)
+
+    def __len__(self):
+        return len(self.answers)
+
+    def stats(self):
+        return {
+            "entries": len(self.answers),
+            "fresh": self.fresh,
+            "hits": self.hits,
+            "misses": self.misses,
+            "created_at": self.header.get("created_at"),
+        }
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_answer_table() -> AnswerTable:
+    """Process-wide table shared by the backend and the Streamlit UI."""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = AnswerTable()
+    return _table
@@ -1,84 +1,721 @@
-from pathlib import Path
-
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import chromadb
-from chromadb.utils import embedding_functions
-
-# ---------------------- Config ----------------------
-BASE_DIR = Path(__file__).parent
-CHROMA_DB_PATH = BASE_DIR / "chroma_db"
-COLLECTION_NAME = "student_faqs"
-EMBED_MODEL_NAME = "all-mpnet-base-v2"
-
-# ---------------------- Flask app setup ----------------------
-app = Flask(__name__)
-CORS(app)  # allow Streamlit (different port) to call this API
-
-
-def get_client():
-    """Return the same local persistent Chroma client used by db.py."""
-    return chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
-
-
-def get_collection():
-    """Return (or create) the FAQ collection with the correct embedding function."""
-    embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=EMBED_MODEL_NAME
-    )
-    client = get_client()
-    return client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        embedding_function=embed_fn,
-    )
-
-
-# Create collection once at startup
-collection = get_collection()
-
-
-@app.route("/health", methods=["GET"])
-def health():
-    """Simple health check endpoint."""
-    return jsonify({"status": "ok"}), 200
-
-
-@app.route("/search", methods=["POST"])
-def search():
-    """
-    Accepts JSON: { "query": "<user question>" }
-    Returns:      { "answer": "<best answer from FAQ VectorDB>" }
-    """
-    data = request.get_json(silent=True)
-
-    if not isinstance(data, dict) or "query" not in data:
-        return jsonify({"answer": "❌ Invalid request. Expected JSON with 'query' field."}), 400
-
-    query = str(data.get("query", "")).strip()
-    print(f"Received query: {query}")
-
-    if not query:
-        return jsonify({"answer": "❌ Query cannot be empty."}), 400
-
-    try:
-        results = collection.query(query_texts=[query], n_results=1)
-
-        metadatas = results.get("metadatas") or []
-        if not metadatas or not metadatas[0]:
-            print("No results found or empty metadata.")
-            return jsonify({"answer": "❌ No matching answer found."})
-
-        top_meta = metadatas[0][0] or {}
-        answer = top_meta.get("answer", "❌ No matching answer found.")
-
-        return jsonify({"answer": answer})
-
-    except Exception as e:
-        print(f"Error during query: {e}")
-        return jsonify({"answer": f"❌ Backend error: {str(e)}"}), 500
-
-
-if __name__ == "__main__":
-    # Run: python app.py
-    # Then backend is available at http://127.0.0.1:5000/search
-    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
\ No newline at end of file
+import json
+import os
+import time
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_cors import CORS
+
+import intents
+import metrics
+from batcher import MicroBatcher
+from answer_table import get_answer_table
+from cache import TTLCache, normalize_query
+from db import batched
+from decompose import split_query
+from engine import get_engine
+from lexical import reciprocal_rank_fusion
+from vector_index import distance_to_similarity, normalize_rows, similarity_to_distance
+
+# ---------------------- Config ----------------------
+# Query caches: normalized query -> top result, and query text -> embedding
+QUERY_CACHE_SIZE = int(os.environ.get("FAQ_QUERY_CACHE_SIZE", "4096"))
+QUERY_CACHE_TTL = float(os.environ.get("FAQ_QUERY_CACHE_TTL", "600"))
+EMBED_CACHE_SIZE = int(os.environ.get("FAQ_EMBED_CACHE_SIZE", "8192"))
+EMBED_CACHE_TTL = float(os.environ.get("FAQ_EMBED_CACHE_TTL", "3600"))
+
+# Vector index (FAQ_VECTOR_INDEX) and hybrid BM25 (FAQ_HYBRID) are configured in engine.py;
+# hybrid hits are fused with vector hits via reciprocal rank fusion
+RRF_K = int(os.environ.get("FAQ_RRF_K", "60"))
+
+# Candidates retrieved (and cached) per query; /search returns the first top_k of them
+N_CANDIDATES = int(os.environ.get("FAQ_CANDIDATES", "10"))
+DEFAULT_TOP_K = 3
+
+# Largest cosine distance (1 - cosine similarity) the top hit may have to count as
+# an answer. Per-category overrides as JSON, e.g. FAQ_DISTANCE_THRESHOLDS='{"transport": 0.4}'
+DISTANCE_THRESHOLDS = {"default": 0.5, **json.loads(os.environ.get("FAQ_DISTANCE_THRESHOLDS", "{}"))}
+NO_MATCH_ANSWER = "❌ No matching answer found."
+
+# Searches that name no "category" go to the partitions of the nearest category centroid(s)
+# (margin: FAQ_ROUTE_MARGIN in partitions.py); off searches the whole collection
+CATEGORY_ROUTING = os.environ.get("FAQ_CATEGORY_ROUTING", "0") == "1"
+
+# Answer questions precomputed at ingestion (answer_table.py) without a search
+USE_ANSWER_TABLE = os.environ.get("FAQ_USE_ANSWER_TABLE", "1") == "1"
+
+# Compound messages ("where is the library and what is the hostel fee") are split into
+# sub-questions that are retrieved together and answered part by part (decompose.py)
+DECOMPOSE_ENABLED = os.environ.get("FAQ_DECOMPOSE", "1") == "1"
+
+# Greetings and thanks get a canned reply without touching the embedding model
+SMALL_TALK_ENABLED = os.environ.get("FAQ_SMALL_TALK", "1") == "1"
+
+# /search/batch: queries encoded and searched together per chunk
+BATCH_CHUNK_SIZE = int(os.environ.get("FAQ_BATCH_CHUNK_SIZE", "64"))
+# Most queries one /search/batch request may carry (a JSON list over it gets 413)
+BATCH_MAX_QUERIES = int(os.environ.get("FAQ_BATCH_MAX_QUERIES", "10000"))
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-lines")
+
+# Micro-batching: concurrent cache misses share one encode + one collection.query
+BATCHING_ENABLED = os.environ.get("FAQ_BATCHING", "1") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("FAQ_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("FAQ_BATCH_MAX_WAIT_MS", "5"))
+
+# Load the model in a background thread at startup (python app.py / app_async) instead of on the first query
+WARMUP_ON_START = os.environ.get("FAQ_WARMUP", "1") == "1"
+
+# GET/POST /debug/profiler to switch the sampling profiler on and off at runtime
+PROFILER_ENDPOINT = os.environ.get("FAQ_PROFILER_ENDPOINT", "0") == "1"
+
+logger = metrics.get_logger("app")
+
+# ---------------------- Flask app setup ----------------------
+app = Flask(__name__)
+CORS(app)  # allow Streamlit (different port) to call this API
+
+
+# Model, collection and indexes are shared with search.py and loaded on first use
+engine = get_engine()
+
+query_cache = TTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+embedding_cache = TTLCache(maxsize=EMBED_CACHE_SIZE, ttl=EMBED_CACHE_TTL)
+answer_table = get_answer_table()
+
+REQUESTS = metrics.counter("faq_requests_total", "HTTP requests by endpoint and status.", ("endpoint", "status"))
+REQUEST_SECONDS = metrics.histogram("faq_request_seconds", "End-to-end request latency.", ("endpoint",))
+UNMATCHED = metrics.counter(
+    "faq_unmatched_total", "Searches answered without a confident FAQ match.", ("reason",)
+)
+metrics.callback(
+    "faq_cache_hits_total",
+    "Cache hits.",
+    "counter",
+    lambda: [
+        ({"cache": "query"}, query_cache.hits),
+        ({"cache": "embedding"}, embedding_cache.hits),
+        ({"cache": "answer_table"}, answer_table.hits),
+    ],
+)
+metrics.callback(
+    "faq_cache_misses_total",
+    "Cache misses.",
+    "counter",
+    lambda: [
+        ({"cache": "query"}, query_cache.misses),
+        ({"cache": "embedding"}, embedding_cache.misses),
+        ({"cache": "answer_table"}, answer_table.misses),
+    ],
+)
+
+
+def cache_key(query: str, categories=None) -> str:
+    """Query cache key; searches restricted to categories are cached separately."""
+    key = normalize_query(query)
+    return f"{key}\x1f{','.join(categories)}" if categories else key
+
+
+def parse_categories(value):
+    """
+    Requested categories as a sorted tuple of known names (None searches all).
+
+    Accepts a name or a list of names, case-insensitively; raises ValueError otherwise.
+    """
+    if value is None or value == "" or value == []:
+        return None
+    names = [value] if isinstance(value, str) else value
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError("'category' must be a string or a list of strings.")
+    partitions = engine.ensure_loaded().partitions
+    known = {c.lower(): c for c in (partitions.categories if partitions is not None else [])}
+    categories = set()
+    for name in names:
+        name = name.strip().lower()
+        if name and name not in known:
+            raise ValueError(f"Unknown category '{name}'. Expected one of: {', '.join(sorted(known.values()))}.")
+        if name:
+            categories.add(known[name])
+    return tuple(sorted(categories)) or None
+
+
+def refresh_if_reingested(force=False) -> None:
+    """Drop both caches (and rebuild in-process indexes) when db.py has re-ingested the collection."""
+    engine.ensure_loaded()
+    if engine.refresh_if_reingested(force):
+        query_cache.clear()
+        embedding_cache.clear()
+
+
+def embed_queries(queries):
+    """Return one embedding per query, encoding all cache misses in a single model call."""
+    vectors = [embedding_cache.get(q) for q in queries]
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        with metrics.span("encode"):
+            encoded = engine.ensure_loaded().embed_fn([queries[i] for i in missing])
+        for i, vector in zip(missing, encoded):
+            vectors[i] = vector
+            embedding_cache.set(queries[i], vector)
+    return vectors
+
+
+def _fill_missing_distances(per_query, query_vectors, vectors):
+    """
+    Compute vector distances for lexical-only candidates, fetching their embeddings once.
+
+    With an in-process index, BM25 rows are rows of `vectors` (both come from one
+    IndexSet), so the embeddings are read from its matrix by row and no FAQ id is
+    looked up; otherwise they are fetched from Chroma by id.
+    """
+    missing = {}  # faq_id -> BM25 row
+    for ranked, _, distances, rows in per_query:
+        for faq_id in ranked:
+            if faq_id not in distances and faq_id in rows:
+                missing[faq_id] = rows[faq_id]
+    if not missing:
+        return
+
+    if vectors is not None:
+        found_ids = list(missing)
+        found = vectors.matrix[[missing[faq_id] for faq_id in found_ids]]
+        space = vectors.space
+    else:
+        stored = engine.collection.get(ids=list(missing), include=["embeddings"])
+        found_ids, found = stored.get("ids") or [], stored.get("embeddings")
+        space = engine.space
+    if not found_ids:
+        return
+
+    similarities = normalize_rows(query_vectors) @ normalize_rows(found).T
+    distances_matrix = similarity_to_distance(similarities, space)
+    column = {faq_id: j for j, faq_id in enumerate(found_ids)}
+    for i, (ranked, _, distances, _) in enumerate(per_query):
+        for faq_id in ranked:
+            if faq_id not in distances and faq_id in column:
+                distances[faq_id] = float(distances_matrix[i, column[faq_id]])
+
+
+def _candidate(faq_id, meta, distance, space):
+    """Response entry for one FAQ; `distance` is converted from the index's space to cosine distance."""
+    meta = meta or {}
+    confidence = None
+    if distance is not None:
+        similarity = float(distance_to_similarity(distance, space))
+        confidence = round(min(max(similarity, 0.0), 1.0), 4)
+        distance = round(1.0 - similarity, 4)
+    return {
+        "id": faq_id,
+        "answer": meta.get("answer"),
+        "category": meta.get("category"),
+        "distance": distance,
+        "confidence": confidence,
+    }
+
+
+def retrieve_batch(queries, categories=None):
+    """
+    Run one multi-query vector search and return ranked candidates per query.
+
+    `categories` optionally gives each query a tuple of categories to search
+    (None: all, or the routed ones with CATEGORY_ROUTING on). With hybrid
+    retrieval on, each query's vector candidates are fused with its BM25
+    candidates by reciprocal rank fusion. Every candidate carries its cosine
+    distance and a 0-1 confidence (cosine similarity clamped to [0, 1]).
+    """
+    engine.ensure_loaded()
+    vectors, lexical, partitions = engine.indexes  # one consistent set, even if a refresh swaps it
+    index = vectors if vectors is not None else engine.collection
+    space = vectors.space if vectors is not None else engine.space
+    query_vectors = embed_queries(queries)
+
+    scopes = list(categories) if categories is not None else [None] * len(queries)
+    if CATEGORY_ROUTING and partitions is not None and len(partitions):
+        unscoped = [i for i, scope in enumerate(scopes) if not scope]
+        if unscoped:
+            with metrics.span("route"):
+                routes = partitions.route([query_vectors[i] for i in unscoped])
+            for i, route in zip(unscoped, routes):
+                scopes[i] = route
+
+    with metrics.span("search"):
+        return _rank_candidates(queries, query_vectors, index, vectors, lexical, space, scopes, partitions)
+
+
+def _vector_search(index, partitions, query_vectors, scopes):
+    """index.query() for every query: one call per distinct category scope, results in query order."""
+    groups = {}
+    for i, scope in enumerate(scopes):
+        groups.setdefault(tuple(scope) if scope else None, []).append(i)
+    if list(groups) == [None]:
+        return index.query(query_embeddings=query_vectors, n_results=N_CANDIDATES)
+
+    merged = {"ids": [[]] * len(scopes), "metadatas": [[]] * len(scopes), "distances": [[]] * len(scopes)}
+    for scope, members in groups.items():
+        group_vectors = [query_vectors[i] for i in members]
+        if scope is None:
+            found = index.query(query_embeddings=group_vectors, n_results=N_CANDIDATES)
+        else:
+            found = partitions.query(index, group_vectors, scope, N_CANDIDATES)
+        for field, values in merged.items():
+            for j, i in enumerate(members):
+                column = found.get(field) or []
+                values[i] = column[j] if j < len(column) else []
+    return merged
+
+
+def _rank_candidates(queries, query_vectors, index, vectors, lexical, space, scopes=None, partitions=None):
+    """Vector search (plus BM25 fusion) for already-encoded queries."""
+    scopes = scopes or [None] * len(queries)
+    results = _vector_search(index, partitions, query_vectors, scopes)
+
+    all_ids = results.get("ids") or []
+    all_metas = results.get("metadatas") or []
+    all_distances = results.get("distances") or []
+    per_query = []
+    for i, query in enumerate(queries):
+        ids = all_ids[i] if i < len(all_ids) else []
+        metas = all_metas[i] if i < len(all_metas) else []
+        distances = all_distances[i] if i < len(all_distances) else []
+        meta_by_id = dict(zip(ids, metas))
+        distance_by_id = dict(zip(ids, distances))
+        ranked = list(ids)
+        row_by_id = {}
+
+        if lexical is not None:
+            lexical_ids = []
+            for row, _ in lexical.search(query, N_CANDIDATES, scopes[i]):
+                faq_id = lexical.ids[row]
+                lexical_ids.append(faq_id)
+                row_by_id[faq_id] = row
+                meta_by_id.setdefault(faq_id, lexical.metadatas[row])
+            fused = reciprocal_rank_fusion([ids, lexical_ids], RRF_K)
+            ranked = [faq_id for faq_id, _ in fused[:N_CANDIDATES]]
+
+        per_query.append((ranked, meta_by_id, distance_by_id, row_by_id))
+
+    _fill_missing_distances(per_query, query_vectors, vectors)
+    return [
+        [_candidate(faq_id, metas[faq_id], distances.get(faq_id), space) for faq_id in ranked]
+        for ranked, metas, distances, _ in per_query
+    ]
+
+
+def _retrieve_items(items):
+    """MicroBatcher adapter: items are (query, categories) pairs."""
+    queries, categories = zip(*items)
+    return retrieve_batch(list(queries), list(categories))
+
+
+batcher = MicroBatcher(
+    _retrieve_items,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait=BATCH_MAX_WAIT_MS / 1000,
+    name="search-batcher",
+)
+
+
+def lookup(query: str, categories=None) -> list:
+    """Return the ranked candidates for a query (optionally within categories), from cache when possible."""
+    refresh_if_reingested()
+
+    key = cache_key(query, categories)
+    cached = query_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if BATCHING_ENABLED:
+        candidates = batcher((query, categories))
+    else:
+        candidates = retrieve_batch([query], [categories])[0]
+    query_cache.set(key, candidates)
+    return candidates
+
+
+def lookup_many(queries, categories=None) -> list:
+    """Candidates for several queries: cache hits first, then one retrieve_batch() for the rest."""
+    refresh_if_reingested()
+
+    categories = list(categories) if categories is not None else [None] * len(queries)
+    keys = [cache_key(q, c) for q, c in zip(queries, categories)]
+    candidates = [query_cache.get(key) for key in keys]
+    missing = [i for i, c in enumerate(candidates) if c is None]
+    if missing:
+        fetched = retrieve_batch([queries[i] for i in missing], [categories[i] for i in missing])
+        for i, found in zip(missing, fetched):
+            candidates[i] = found
+            query_cache.set(keys[i], found)
+    return candidates
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Liveness: the process is up (the model may still be loading; see /ready)."""
+    return jsonify({"status": "ok"}), 200
+
+
+def readiness():
+    """(/ready payload, status): 200 once the engine has loaded and encoded, else 503 (and warm-up starts)."""
+    if not engine.ready:
+        engine.start_warmup()
+    return engine.status(), 200 if engine.ready else 503
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness: model, collection and indexes loaded and warmed up, plus startup timings."""
+    payload, status = readiness()
+    return jsonify(payload), status
+
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss counters for the query and embedding caches and the answer table, plus batching stats."""
+    return jsonify({
+        "query": query_cache.stats(),
+        "embedding": embedding_cache.stats(),
+        "answer_table": answer_table.stats(),
+        "batcher": batcher.stats(),
+    }), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus text exposition of stage latencies, request counts and cache counters."""
+    return Response(metrics.render(), mimetype=metrics.PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route("/debug/profiler", methods=["GET", "POST"])
+def profiler_control():
+    """
+    GET returns the sampling profiler's collapsed stacks; POST {"action": "start"|"stop"|"reset",
+    "interval_ms": 5} switches it. Only served with FAQ_PROFILER_ENDPOINT=1.
+    """
+    if not PROFILER_ENDPOINT:
+        return jsonify({"error": "Not found"}), 404
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        action = data.get("action")
+        if action == "start":
+            metrics.profiler.start(data.get("interval_ms"))
+        elif action == "stop":
+            metrics.profiler.stop()
+        elif action == "reset":
+            metrics.profiler.reset()
+        else:
+            return jsonify({"error": "'action' must be start, stop or reset."}), 400
+    return jsonify(metrics.profiler.report(int(request.args.get("limit", 50)))), 200
+
+
+def distance_threshold(category) -> float:
+    """Distance cut-off for a top hit in `category`."""
+    return DISTANCE_THRESHOLDS.get(category or "default", DISTANCE_THRESHOLDS["default"])
+
+
+def build_answer(candidates, top_k=DEFAULT_TOP_K) -> dict:
+    """
+    Turn ranked candidates into the /search response.
+
+    The top candidate only counts as a match when its distance is within its
+    category's threshold; otherwise the response is a structured "no match"
+    that callers can act on without string matching.
+    """
+    results = candidates[:top_k]
+    if not results:
+        return {"answer": NO_MATCH_ANSWER, "matched": False, "reason": "no_results", "results": []}
+
+    best = results[0]
+    if best["distance"] is None or best["distance"] > distance_threshold(best["category"]):
+        return {
+            "answer": NO_MATCH_ANSWER,
+            "matched": False,
+            "reason": "low_confidence",
+            "results": results,
+        }
+
+    return {
+        "answer": best["answer"] or NO_MATCH_ANSWER,
+        "matched": bool(best["answer"]),
+        "id": best["id"],
+        "category": best["category"],
+        "distance": best["distance"],
+        "confidence": best["confidence"],
+        "results": results,
+    }
+
+
+def table_answer(query: str, data: dict):
+    """
+    /search response from the precomputed answer table, or None.
+
+    Only plain requests qualify: no category filter, top_k or embedding asked for,
+    since the table keeps just the top hit of an unfiltered search.
+    """
+    if not USE_ANSWER_TABLE or any(data.get(field) for field in ("category", "top_k", "return_embedding")):
+        return None
+    entry = answer_table.get(query)
+    if entry is None:
+        return None
+    entry["results"] = [{field: entry[field] for field in ("id", "answer", "category", "distance", "confidence")}]
+    entry["source"] = "answer_table"
+    return entry
+
+
+def build_multi_answer(parts, data, categories=None, top_k=DEFAULT_TOP_K) -> dict:
+    """
+    /search response for a message split into several sub-questions.
+
+    Parts found in the answer table are answered from it; the others share one
+    lookup_many() call, so all the sub-questions are encoded and searched
+    together. "answer" lists the parts' answers in the order they were asked.
+    """
+    payloads = [table_answer(part, data) for part in parts]
+    missing = [i for i, payload in enumerate(payloads) if payload is None]
+    if missing:
+        found = lookup_many([parts[i] for i in missing], [categories] * len(missing))
+        for i, candidates in zip(missing, found):
+            payloads[i] = build_answer(candidates, top_k)
+
+    lines = []
+    for n, (part, payload) in enumerate(zip(parts, payloads), 1):
+        payload["query"] = part
+        lines.append(f"{n}. {payload['answer']}" if payload["matched"] else f"{n}. {NO_MATCH_ANSWER} ({part})")
+
+    matched = [payload for payload in payloads if payload["matched"]]
+    merged = {
+        "answer": "\n\n".join(lines) if matched else NO_MATCH_ANSWER,
+        "matched": bool(matched),
+        "parts": payloads,
+        "results": [payload["results"][0] for payload in payloads if payload["results"]],
+    }
+    if not matched:
+        merged["reason"] = payloads[0]["reason"]
+    return merged
+
+
+def small_talk_answer(query: str):
+    """Canned /search response for greetings and thanks (None for anything else)."""
+    if not SMALL_TALK_ENABLED:
+        return None
+    intent = intents.route(query)
+    if intent not in intents.SMALL_TALK:
+        return None
+    return {
+        "answer": intents.small_talk_reply(intent),
+        "matched": False,
+        "reason": "small_talk",
+        "intent": intent,
+        "results": [],
+    }
+
+
+def handle_search(data):
+    """
+    Framework-independent /search handler shared by the Flask and ASGI apps.
+
+    Accepts the parsed JSON body and returns (response_dict, status_code).
+    """
+    if not isinstance(data, dict) or "query" not in data:
+        return {"answer": "❌ Invalid request. Expected JSON with 'query' field."}, 400
+
+    query = str(data.get("query", "")).strip()
+    logger.debug("Received query: %s", query)
+
+    if not query:
+        return {"answer": "❌ Query cannot be empty."}, 400
+
+    try:
+        top_k = min(max(int(data.get("top_k", DEFAULT_TOP_K)), 1), N_CANDIDATES)
+    except (TypeError, ValueError):
+        return {"answer": "❌ 'top_k' must be an integer."}, 400
+
+    try:
+        categories = parse_categories(data.get("category"))
+    except ValueError as e:
+        return {"answer": f"❌ {e}"}, 400
+
+    parts = split_query(query) if DECOMPOSE_ENABLED else [query]
+    if len(parts) == 1:
+        payload = small_talk_answer(query)
+        if payload is not None:
+            UNMATCHED.inc(reason="small_talk")
+            return payload, 200
+
+        payload = table_answer(query, data)
+        if payload is not None:
+            return payload, 200
+
+    try:
+        start = time.perf_counter()
+        if len(parts) > 1:
+            payload = build_multi_answer(parts, data, categories, top_k)
+        else:
+            payload = build_answer(lookup(query, categories), top_k)
+        engine.record_query(time.perf_counter() - start)
+        if categories:
+            payload["categories"] = list(categories)
+        if data.get("return_embedding") and len(parts) == 1:
+            # served from the embedding cache lookup() just filled
+            payload["embedding"] = [float(x) for x in embed_queries([query])[0]]
+        if not payload["matched"]:
+            UNMATCHED.inc(reason=payload["reason"])
+            logger.info("No confident match (%s).", payload["reason"])
+        return payload, 200
+
+    except Exception as e:
+        logger.exception("Error during query: %s", e)
+        return {"answer": f"❌ Backend error: {str(e)}", "matched": False, "reason": "error"}, 500
+
+
+@app.route("/search", methods=["POST"])
+def search():
+    """
+    Accepts JSON: { "query": "<user question>", "top_k": 3 (optional),
+                    "category": "transport" or ["transport", "fees"] (optional; search only these),
+                    "return_embedding": false (optional; adds the query's "embedding") }
+    Returns:      { "answer": "<best answer>", "matched": true|false,
+                    "id", "category", "distance", "confidence",
+                    "results": [top_k candidates with the same fields],
+                    "categories": [searched categories] (only when "category" was given),
+                    "reason": "no_results"|"low_confidence"|"small_talk" (only when not matched) }
+    Greetings and thanks are answered without a search ("reason": "small_talk", "intent"), and so are
+    questions precomputed at ingestion ("source": "answer_table"; only the top hit in "results").
+    A compound message is answered per sub-question: "answer" numbers the parts' answers in order,
+    "parts" holds one response per sub-question (plus its "query") and "results" their top hits.
+    """
+    start = time.perf_counter()
+    with metrics.span("parse"):
+        data = request.get_json(silent=True)
+    payload, status = handle_search(data)
+    with metrics.span("serialize"):
+        response = jsonify(payload)
+    REQUESTS.inc(endpoint="/search", status=status)
+    REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="/search")
+    return response, status
+
+
+def _parse_batch_item(item):
+    """Return (query, query_id, categories, error) for one /search/batch input item."""
+    if isinstance(item, Exception):
+        return None, None, None, str(item)
+    query_id, categories = None, None
+    if isinstance(item, dict):
+        query_id = item.get("query_id")
+        try:
+            categories = parse_categories(item.get("category"))
+        except ValueError as e:
+            return None, query_id, None, str(e)
+        item = item.get("query")
+    if not isinstance(item, str) or not item.strip():
+        return None, query_id, None, "Expected a non-empty query string."
+    return item.strip(), query_id, categories, None
+
+
+def _iter_ndjson(stream):
+    """Yield one parsed JSON value (or a ValueError) per non-empty line of `stream`."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield ValueError("Invalid JSON line.")
+
+
+def _limit_items(items, limit):
+    """Pass through the first `limit` items, then a single error item for the overflow."""
+    for n, item in enumerate(items):
+        if n >= limit:
+            yield ValueError(f"Batch exceeds {limit} queries; the remaining lines were not processed.")
+            return
+        yield item
+
+
+def iter_batch_results(items, top_k=DEFAULT_TOP_K, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Answer a stream of /search/batch items chunk by chunk.
+
+    Yields one dict per input item, in input order. A chunk that fails as a whole
+    is retried item by item so a single bad query only fails its own line.
+    """
+    index = 0
+    for chunk in batched(items, chunk_size):
+        parsed = [_parse_batch_item(item) for item in chunk]
+        valid = [(i, query, categories) for i, (query, _, categories, error) in enumerate(parsed) if error is None]
+        small_talk = {i: small_talk_answer(query) for i, query, _ in valid}
+        valid = [(i, query, categories) for i, query, categories in valid if small_talk[i] is None]
+
+        answers = {}
+        try:
+            found = lookup_many([query for _, query, _ in valid], [categories for _, _, categories in valid])
+            answers = {i: candidates for (i, _, _), candidates in zip(valid, found)}
+        except Exception:
+            for i, query, categories in valid:
+                try:
+                    answers[i] = lookup(query, categories)
+                except Exception as e:
+                    answers[i] = e
+
+        for i, (query, query_id, categories, error) in enumerate(parsed):
+            line = {"index": index + i}
+            if query_id is not None:
+                line["query_id"] = query_id
+            if error is None and isinstance(answers.get(i), Exception):
+                error = f"Backend error: {answers[i]}"
+            if error is not None:
+                line["error"] = error
+            else:
+                line["query"] = query
+                line.update(small_talk.get(i) or build_answer(answers[i], top_k))
+                if categories and not small_talk.get(i):
+                    line["categories"] = list(categories)
+            yield line
+        index += len(chunk)
+
+
+@app.route("/search/batch", methods=["POST"])
+def search_batch():
+    """
+    Bulk search for evaluation and pre-warm jobs; results stream back as NDJSON.
+
+    Accepts either JSON { "queries": ["...", {"query_id": "q1", "query": "...", "category": "fees"}], "top_k": 3 }
+    or an application/x-ndjson body with one query string or object per line
+    (top_k then comes from the query string). Each output line is the /search
+    response for one item plus its "index" (and "query_id"), or {"index", "error"}.
+    A JSON list must hold 1 to BATCH_MAX_QUERIES queries (400/413 otherwise); an
+    NDJSON body is read up to BATCH_MAX_QUERIES lines and one error line ends it.
+    """
+    top_k = request.args.get("top_k", DEFAULT_TOP_K)
+    if request.mimetype in NDJSON_MIMETYPES:
+        items = _limit_items(_iter_ndjson(request.stream), BATCH_MAX_QUERIES)
+    else:
+        data = request.get_json(silent=True)
+        items = data.get("queries") if isinstance(data, dict) else data
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON list of queries or {'queries': [...]}."}), 400
+        if not items:
+            return jsonify({"error": "Expected at least one query."}), 400
+        if len(items) > BATCH_MAX_QUERIES:
+            return jsonify({"error": f"At most {BATCH_MAX_QUERIES} queries per batch; got {len(items)}."}), 413
+        if isinstance(data, dict):
+            top_k = data.get("top_k", top_k)
+
+    try:
+        top_k = min(max(int(top_k), 1), N_CANDIDATES)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'top_k' must be an integer."}), 400
+
+    REQUESTS.inc(endpoint="/search/batch", status=200)
+
+    def generate():
+        for line in iter_batch_results(items, top_k):
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    if WARMUP_ON_START:
+        engine.start_warmup()
+    # Run: python app.py
+    # Then backend is available at http://127.0.0.1:5000/search
+    app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
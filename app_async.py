@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app as backend
+import metrics
+
+logger = metrics.get_logger("app_async")
+
+# ---------------------- Config ----------------------
+# Threads that run encoding + vector search (the model releases the GIL while encoding)
+INFERENCE_WORKERS = int(os.environ.get("FAQ_ASYNC_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Requests allowed to wait for a worker before new ones get 429
+MAX_QUEUE = int(os.environ.get("FAQ_ASYNC_MAX_QUEUE", "256"))
+RETRY_AFTER_SECONDS = int(os.environ.get("FAQ_ASYNC_RETRY_AFTER", "1"))
+SHUTDOWN_GRACE_SECONDS = float(os.environ.get("FAQ_ASYNC_SHUTDOWN_GRACE", "10"))
+MAX_BODY_BYTES = 64 * 1024
+
+
+class InferencePool:
+    """Bounded thread pool with admission control for the blocking search path."""
+
+    def __init__(self, workers=INFERENCE_WORKERS, max_queue=MAX_QUEUE):
+        self.capacity = workers + max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self.in_flight = 0
+        self.rejected = 0
+        self.accepting = True
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def try_acquire(self):
+        """Reserve a slot, or return False when the pool and its queue are full."""
+        if not self.accepting or self.in_flight >= self.capacity:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self._idle.clear()
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def drain(self, timeout):
+        """Stop admitting work, wait for in-flight requests, then stop the threads."""
+        self.accepting = False
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Shutdown grace period expired with %d requests in flight", self.in_flight)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+pool = None
+
+
+async def read_body(receive):
+    """Read the full request body, or return None if it exceeds MAX_BODY_BYTES."""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return b""
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def send_body(send, body, content_type, status=200, extra_headers=()):
+    headers = [
+        (b"content-type", content_type),
+        (b"content-length", str(len(body)).encode()),
+        (b"access-control-allow-origin", b"*"),
+        *extra_headers,
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, payload, status=200, extra_headers=()):
+    with metrics.span("serialize"):
+        body = json.dumps(payload).encode("utf-8")
+    await send_body(send, body, b"application/json", status, extra_headers)
+
+
+async def handle_search(receive, send):
+    body = await read_body(receive)
+    if body is None:
+        await send_json(send, {"answer": "❌ Request body too large."}, 413)
+        return
+
+    if not pool.try_acquire():
+        status = 429 if pool.accepting else 503
+        await send_json(
+            send,
+            {"answer": "❌ Backend is busy. Please retry shortly."},
+            status,
+            extra_headers=[(b"retry-after", str(RETRY_AFTER_SECONDS).encode())],
+        )
+        return
+
+    try:
+        with metrics.span("parse"):
+            try:
+                data = json.loads(body) if body else None
+            except ValueError:
+                data = None
+        payload, status = await pool.run(backend.handle_search, data)
+    finally:
+        pool.release()
+    await send_json(send, payload, status)
+    backend.REQUESTS.inc(endpoint="/search", status=status)
+
+
+async def lifespan(receive, send):
+    global pool
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            pool = InferencePool()
+            if backend.WARMUP_ON_START:
+                backend.engine.start_warmup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await pool.drain(SHUTDOWN_GRACE_SECONDS)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """
+    ASGI entry point with the same /search, /health, /ready and /metrics contract as app.py.
+
+    Run: uvicorn app_async:app --host 0.0.0.0 --port 5000
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    global pool
+    if pool is None:
+        # Servers without lifespan support still get a pool
+        pool = InferencePool()
+
+    method, path = scope["method"], scope["path"]
+    if method == "OPTIONS":
+        headers = [
+            (b"access-control-allow-origin", b"*"),
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-allow-headers", b"content-type"),
+        ]
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+    elif path == "/health" and method == "GET":
+        await send_json(send, {"status": "ok"})
+    elif path == "/ready" and method == "GET":
+        payload, status = backend.readiness()
+        await send_json(send, payload, status)
+    elif path == "/metrics" and method == "GET":
+        await send_body(send, metrics.render().encode("utf-8"), metrics.PROMETHEUS_CONTENT_TYPE.encode())
+    elif path == "/search" and method == "POST":
+        start = time.perf_counter()
+        await handle_search(receive, send)
+        backend.REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="/search")
+    else:
+        await send_json(send, {"error": "Not found"}, 404)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("app_async:app", host="0.0.0.0", port=5000, lifespan="on")
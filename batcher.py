@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Gather concurrent single-item calls into batches.
+
+    Callers submit one item and block on a Future; a background thread waits up to
+    `max_wait` seconds (or until `max_batch_size` items are queued), then hands the
+    whole batch to `process_batch(items) -> results` and fans the results back out.
+    With `direct_when_idle`, a call made while no other caller is active skips the
+    queue and runs inline, so a lone request never pays the `max_wait` delay.
+    The worker thread starts lazily and is restarted in forked child processes.
+    """
+
+    def __init__(
+        self,
+        process_batch,
+        max_batch_size=32,
+        max_wait=0.005,
+        direct_when_idle=True,
+        name="micro-batcher",
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.direct_when_idle = direct_when_idle
+        self.name = name
+        self._lock = threading.Lock()
+        self._active = 0
+        self.direct_calls = 0
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def submit(self, item) -> Future:
+        """Queue one item; the returned Future resolves to its result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        with self._lock:
+            self._active += 1
+            alone = self._active == 1
+        try:
+            if alone and self.direct_when_idle:
+                self.direct_calls += 1
+                return self.process_batch([item])[0]
+            return self.submit(item).result(timeout)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _collect(self, q):
+        batch = [q.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        q = self._queue
+        while True:
+            batch = self._collect(q)
+            items = [item for item, _ in batch]
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name}: got {len(results)} results for {len(items)} items"
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "direct_calls": self.direct_calls,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+        }
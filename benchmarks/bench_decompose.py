@@ -0,0 +1,105 @@
+"""
+Latency and per-part recall of compound /search queries vs. the number of parts.
+
+Compound messages are built by joining labeled paraphrases (queries.py) of
+different FAQs with " and ". Each is answered by app.handle_search (all parts in
+one batched retrieval) and, for comparison, by one lookup() per part in turn.
+Caches are cleared before every query and the answer table is off, so every
+part is encoded and searched.
+
+    python benchmarks/bench_decompose.py --parts 1 2 3 4 --queries 100
+"""
+import argparse
+import random
+import time
+
+from common import ROOT_DIR, latency_summary, print_table, write_json
+from queries import paraphrase_queries
+
+import app
+from db import load_faqs
+from decompose import split_query
+
+
+def compound_queries(pairs, n_parts, count, seed=13):
+    """[(message, [expected ids])] whose parts split_query() recovers exactly."""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count * 20):
+        picked = rng.sample(pairs, n_parts)
+        if len({expected for _, expected, _ in picked}) < n_parts:
+            continue
+        message = " and ".join(query for query, _, _ in picked)
+        if len(split_query(message)) == n_parts:
+            messages.append((message, [expected for _, expected, _ in picked]))
+        if len(messages) == count:
+            break
+    return messages
+
+
+def clear_caches():
+    app.query_cache.clear()
+    app.embedding_cache.clear()
+
+
+def run_parts(messages, n_parts, top_k):
+    batched, sequential, hits, total = [], [], 0, 0
+    for message, expected in messages:
+        clear_caches()
+        start = time.perf_counter()
+        payload, _ = app.handle_search({"query": message, "top_k": top_k})
+        batched.append(time.perf_counter() - start)
+        parts = payload.get("parts") or [payload]
+        for part, faq_id in zip(parts, expected):
+            total += 1
+            hits += bool(part["results"]) and part["results"][0]["id"] == faq_id
+
+        clear_caches()
+        start = time.perf_counter()
+        for part in split_query(message):
+            app.build_answer(app.lookup(part), top_k)
+        sequential.append(time.perf_counter() - start)
+
+    batched_summary = latency_summary(batched, sum(batched))
+    sequential_summary = latency_summary(sequential, sum(sequential))
+    return {
+        "parts": n_parts,
+        "queries": len(messages),
+        "batched_p50_ms": batched_summary["p50_ms"],
+        "batched_p95_ms": batched_summary["p95_ms"],
+        "sequential_p50_ms": sequential_summary["p50_ms"],
+        "sequential_p95_ms": sequential_summary["p95_ms"],
+        "part_recall@1": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faqs", default=str(ROOT_DIR / "faqs.json"))
+    parser.add_argument("--parts", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--queries", type=int, default=100, help="compound messages per part count")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--output", default="bench_decompose.json")
+    args = parser.parse_args()
+
+    app.USE_ANSWER_TABLE = False
+    app.BATCHING_ENABLED = False
+    app.engine.ensure_loaded()
+    pairs = paraphrase_queries(load_faqs(args.faqs))
+    app.handle_search({"query": pairs[0][0]})  # warm-up
+
+    rows = []
+    for n_parts in args.parts:
+        messages = compound_queries(pairs, n_parts, args.queries)
+        if not messages:
+            print(f"⚠️ No {n_parts}-part messages could be built")
+            continue
+        rows.append(run_parts(messages, n_parts, args.top_k))
+
+    if rows:
+        print_table(rows, list(rows[0].keys()))
+    write_json(args.output, {"top_k": args.top_k, "results": rows})
+
+
+if __name__ == "__main__":
+    main()
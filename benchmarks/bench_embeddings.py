@@ -0,0 +1,91 @@
+"""
+Recall@k vs. latency for each embedding backend/model on faqs.json-style data.
+
+Every FAQ question is embedded as a document (as db.py does). Labeled paraphrases
+of each question (queries.py) are then encoded one at a time and searched with
+an exact NumpyIndex. Configs are backend:model pairs (models may be aliases,
+see embeddings.MODEL_ALIASES).
+
+    python benchmarks/bench_embeddings.py --configs torch:base onnx:base int8:base torch:small
+"""
+import argparse
+import time
+
+from common import ROOT_DIR, latency_summary, print_table, write_json
+from queries import paraphrase_queries
+
+from db import load_faqs
+from embeddings import get_embedding_function
+from vector_index import NumpyIndex
+
+DEFAULT_CONFIGS = ["torch:base", "onnx:base", "int8:base", "torch:small"]
+
+
+def run_config(backend, model, faqs, pairs, k, encode_batch_size):
+    start = time.perf_counter()
+    embed_fn = get_embedding_function(model, backend)
+    load_seconds = time.perf_counter() - start
+
+    questions = [faq["question"] for faq in faqs]
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(questions), encode_batch_size):
+        vectors.extend(embed_fn(questions[i:i + encode_batch_size]))
+    corpus_seconds = time.perf_counter() - start
+    index = NumpyIndex([faq["id"] for faq in faqs], vectors, space="cosine")
+
+    embed_fn([pairs[0][0]])  # warm-up
+    latencies, hits_at_1, hits_at_k = [], 0, 0
+    run_start = time.perf_counter()
+    for query, expected, _ in pairs:
+        start = time.perf_counter()
+        query_vector = embed_fn([query])
+        latencies.append(time.perf_counter() - start)
+        ranked = index.query(query_vector, n_results=k)["ids"][0]
+        hits_at_1 += bool(ranked) and ranked[0] == expected
+        hits_at_k += expected in ranked
+    summary = latency_summary(latencies, time.perf_counter() - run_start)
+
+    return {
+        "backend": backend,
+        "model": embed_fn.model_name,
+        "dim": int(index.matrix.shape[1]),
+        "load_s": round(load_seconds, 2),
+        "corpus_docs_per_sec": round(len(questions) / corpus_seconds, 1) if corpus_seconds else 0.0,
+        "encode_p50_ms": summary["p50_ms"],
+        "encode_p95_ms": summary["p95_ms"],
+        "recall@1": round(hits_at_1 / len(pairs), 4),
+        f"recall@{k}": round(hits_at_k / len(pairs), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faqs", default=str(ROOT_DIR / "faqs.json"))
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS, help="backend:model pairs")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--encode-batch-size", type=int, default=64)
+    parser.add_argument("--output", default="bench_embeddings.json")
+    args = parser.parse_args()
+
+    faqs = load_faqs(args.faqs)
+    pairs = paraphrase_queries(faqs)
+    print(f"{len(faqs)} FAQs, {len(pairs)} labeled queries")
+
+    rows, failures = [], {}
+    for config in args.configs:
+        backend, _, model = config.partition(":")
+        try:
+            rows.append(run_config(backend, model or None, faqs, pairs, args.k, args.encode_batch_size))
+        except Exception as e:  # e.g. onnx extras not installed, model not downloadable
+            print(f"⚠️ Skipping {config}: {e}")
+            failures[config] = str(e)
+
+    if rows:
+        print_table(rows, list(rows[0].keys()))
+    write_json(args.output, {"faqs": len(faqs), "queries": len(pairs), "k": args.k,
+                             "results": rows, "failures": failures})
+
+
+if __name__ == "__main__":
+    main()
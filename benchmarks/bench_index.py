@@ -0,0 +1,98 @@
+"""
+Benchmark NumpyIndex against Chroma's collection.query on synthetic embeddings.
+
+Vectors are unit length and the collection uses the cosine space, like the FAQ
+collection, so hnsw_recall measures HNSW's approximation and not a difference
+between l2 and cosine ranking.
+
+    python benchmarks/bench_index.py --sizes 1000 10000 100000 --dim 768
+"""
+import argparse
+import time
+
+import numpy as np
+
+from common import print_table, write_json
+
+import chromadb
+from vector_index import NumpyIndex, normalize_rows
+
+
+def build_collection(client, name, vectors):
+    collection = client.create_collection(name=name, embedding_function=None, metadata={"hnsw:space": "cosine"})
+    batch = client.get_max_batch_size()
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start:start + batch]
+        collection.add(
+            ids=[f"faq{i}" for i in range(start, start + len(chunk))],
+            embeddings=chunk,
+            metadatas=[{"answer": f"answer {i}"} for i in range(start, start + len(chunk))],
+        )
+    return collection
+
+
+def time_per_query(fn, queries, batch_size):
+    """Average milliseconds per query when queries are sent `batch_size` at a time."""
+    start = time.perf_counter()
+    for i in range(0, len(queries), batch_size):
+        fn(queries[i:i + batch_size])
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run_size(client, n, dim, n_queries, k, rng):
+    vectors = normalize_rows(rng.standard_normal((n, dim), dtype=np.float32))
+    queries = normalize_rows(rng.standard_normal((n_queries, dim), dtype=np.float32))
+
+    start = time.perf_counter()
+    collection = build_collection(client, f"bench_{n}", vectors)
+    chroma_build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = NumpyIndex.from_collection(collection)
+    numpy_load = time.perf_counter() - start
+
+    def chroma_query(q):
+        return collection.query(query_embeddings=q, n_results=k, include=["metadatas", "distances"])
+
+    def numpy_query(q):
+        return index.query(q, n_results=k)
+
+    # Recall of the approximate HNSW results against the exact ones
+    exact = numpy_query(queries)["ids"]
+    approx = chroma_query(queries)["ids"]
+    recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(approx, exact)])
+
+    row = {
+        "faqs": n,
+        "chroma_build_s": round(chroma_build, 2),
+        "numpy_load_s": round(numpy_load, 2),
+        "chroma_ms_q1": round(time_per_query(chroma_query, queries, 1), 3),
+        "numpy_ms_q1": round(time_per_query(numpy_query, queries, 1), 3),
+        "chroma_ms_q32": round(time_per_query(chroma_query, queries, 32), 3),
+        "numpy_ms_q32": round(time_per_query(numpy_query, queries, 32), 3),
+        f"hnsw_recall@{k}": round(float(recall), 4),
+    }
+    client.delete_collection(f"bench_{n}")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=768, help="embedding size (768 = mpnet)")
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    client = chromadb.EphemeralClient()
+    rows = [run_size(client, n, args.dim, args.queries, args.k, rng) for n in args.sizes]
+
+    print_table(rows, list(rows[0]))
+    if args.json:
+        write_json(args.json, {"dim": args.dim, "k": args.k, "runs": rows})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Throughput of serve_prefork.py over HTTP as the number of workers grows.
+
+Starts the pre-fork server once per worker count, waits for /ready, then posts
+distinct queries (so the caches never answer them) from N client threads over
+keep-alive connections and prints QPS, p50/p99 latency and the speedup over the
+first worker count. It fails if a worker loaded an embedding model of its own
+instead of sharing the parent's (except with the onnx backend, where each must).
+
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --requests 2000 --concurrency 32
+"""
+import argparse
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from common import ROOT_DIR, latency_summary, print_table, run_concurrent, write_json
+
+from db import load_faqs
+
+WARMUP_REQUESTS = 50
+READY_TIMEOUT_SECONDS = 300
+# /ready probes after a run, on fresh connections so they reach different workers
+MODEL_PROBES = 20
+
+
+def build_queries(n, tag):
+    questions = [faq["question"] for faq in load_faqs() if faq.get("question")]
+    return [f"{questions[i % len(questions)]} ({tag} {i})" for i in range(n)]
+
+
+def start_server(workers, threads, port):
+    env = dict(os.environ, FAQ_QUERY_CACHE_SIZE="0", FAQ_EMBED_CACHE_SIZE="0", FAQ_LOG_LEVEL="WARNING")
+    cmd = [sys.executable, str(ROOT_DIR / "serve_prefork.py"), "--workers", str(workers), "--port", str(port)]
+    if threads:
+        cmd += ["--threads", str(threads)]
+    return subprocess.Popen(cmd, cwd=ROOT_DIR, env=env)
+
+
+def wait_ready(port, proc):
+    deadline = time.monotonic() + READY_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"serve_prefork.py exited with {proc.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server on port {port} not ready after {READY_TIMEOUT_SECONDS}s")
+
+
+def worker_model_loads(port, probes=MODEL_PROBES):
+    """Highest "model_loads" reported by the workers answering `probes` /ready calls."""
+    loads = 0
+    for _ in range(probes):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        try:
+            conn.request("GET", "/ready")
+            loads = max(loads, json.loads(conn.getresponse().read()).get("model_loads") or 0)
+        finally:
+            conn.close()
+    return loads
+
+
+def post_search(port):
+    headers = {"Content-Type": "application/json"}
+
+    def connect():
+        return {"conn": http.client.HTTPConnection("127.0.0.1", port, timeout=30)}
+
+    def post(state, query):
+        try:
+            state["conn"].request("POST", "/search", json.dumps({"query": query}), headers)
+            res = state["conn"].getresponse()
+            res.read()
+        except (OSError, http.client.HTTPException):
+            state["conn"].close()
+            state.update(connect())  # the worker dropped the connection; the next query uses a new one
+            raise
+        if res.status != 200:
+            raise RuntimeError(f"HTTP {res.status}")
+
+    return post, connect
+
+
+def run(workers, threads, args):
+    proc = start_server(workers, threads, args.port)
+    try:
+        wait_ready(args.port, proc)
+        post, connect = post_search(args.port)
+        run_concurrent(post, build_queries(WARMUP_REQUESTS, "warm up"), args.concurrency, worker_init=connect)
+        latencies, errors, elapsed = run_concurrent(
+            post, build_queries(args.requests, f"load {workers}"), args.concurrency, worker_init=connect
+        )
+        model_loads = worker_model_loads(args.port)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    row = {"workers": workers}
+    row.update(latency_summary(latencies, elapsed))
+    row["errors"] = len(errors)
+    row["worker_model_loads"] = model_loads
+    if model_loads and os.environ.get("FAQ_EMBED_BACKEND", "torch") != "onnx":
+        raise SystemExit(f"❌ A worker loaded {model_loads} embedding model(s) instead of sharing the parent's")
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=0, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="client threads")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for workers in args.workers:
+        rows.append(run(workers, args.threads, args))
+        print(f"✅ {workers} worker(s): {rows[-1]['qps']} QPS")
+    base = rows[0]["qps"]  # speedup is relative to the first (usually 1-worker) run
+    for row in rows:
+        row["speedup"] = round(row["qps"] / base, 2) if base else None
+
+    print(f"{os.cpu_count()} CPUs")
+    print_table(rows, ["workers", "requests", "qps", "speedup", "p50_ms", "p99_ms", "errors", "worker_model_loads"])
+    if args.json:
+        write_json(args.json, {"cpus": os.cpu_count(), "runs": rows})
+
+
+if __name__ == "__main__":
+    main()
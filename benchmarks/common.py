@@ -0,0 +1,83 @@
+import json
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Make the top-level project modules (app, db, search, ...) importable from scripts
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies, elapsed):
+    """Summarize per-call latencies (seconds) over a wall-clock run of `elapsed` seconds."""
+    return {
+        "requests": len(latencies),
+        "qps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def run_concurrent(call, items, concurrency, worker_init=None):
+    """
+    Call `call(state, item)` for every item from `concurrency` threads.
+
+    `worker_init()` builds per-thread state (e.g. an HTTP session or test client).
+    Returns (latencies, errors, elapsed_seconds).
+    """
+    latencies, errors = [], []
+    lock = threading.Lock()
+    it = iter(items)
+
+    def worker():
+        state = worker_init() if worker_init else None
+        while True:
+            with lock:
+                item = next(it, None)
+            if item is None:
+                return
+            start = time.perf_counter()
+            try:
+                call(state, item)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def print_table(rows, columns):
+    """Print a list of dicts as a fixed-width table."""
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"✅ Results written to {path}")
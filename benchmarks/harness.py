@@ -0,0 +1,230 @@
+"""
+Retrieval benchmark and regression gate over the FAQ corpus.
+
+Generates labeled paraphrases of every faqs.json question (queries.py) and
+replays them through each target, one query at a time:
+
+    search  search.search_faq (top answer only, so recall@1 is judged by answer text)
+    app     POST /search on the Flask app via its test client (caches cleared before each query)
+    numpy   embed + NumpyIndex.query over the shared engine's collection
+
+Each target runs in its own subprocess, warmed up with queries outside the
+measured set, so neither its latencies nor its peak RSS include another
+target's (or the warm-up's) work. For each target it reports p50/p95/p99
+latency, QPS, peak RSS and the RSS the target added over the bare harness,
+recall@1, recall@5 and MRR, and writes everything to JSON. With --compare it
+checks the run against a baseline JSON and exits non-zero on a regression.
+
+    python benchmarks/harness.py --output bench_baseline.json
+    python benchmarks/harness.py --output bench_current.json --compare bench_baseline.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT_DIR, latency_summary, print_table, write_json
+from queries import paraphrase_queries
+
+from db import load_faqs
+
+TARGETS = ("search", "app", "numpy")
+K = 5
+# Warm-up queries: never part of the measured set, so no measured query is served from a warm cache
+WARMUP_QUERIES = (
+    "benchmark warm-up query",
+    "who should I contact about my documents",
+    "is the campus open on public holidays",
+    "where can I find the notice board",
+    "how many credits is one semester",
+)
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KiB on Linux
+
+
+# ---------------------- Targets ----------------------
+# Each builder returns rank(query) -> (ranked FAQ ids or None, top answer text)
+def build_search():
+    import search
+
+    def rank(query):
+        return None, search.search_faq(query)
+
+    return rank
+
+
+def build_app():
+    import app
+
+    client = app.app.test_client()
+
+    def rank(query):
+        # Paraphrases can normalize to the same cache key; measure retrieval, not cache hits
+        app.query_cache.clear()
+        app.embedding_cache.clear()
+        data = client.post("/search", json={"query": query, "top_k": K}).get_json()
+        return [r["id"] for r in data.get("results", [])], data.get("answer")
+
+    return rank
+
+
+def build_numpy():
+    from engine import get_engine
+    from vector_index import NumpyIndex
+
+    engine = get_engine().ensure_loaded()
+    index = NumpyIndex.from_collection(engine.collection)
+
+    def rank(query):
+        results = index.query(engine.embed_fn([query]), n_results=K)
+        ids = results["ids"][0]
+        metas = results["metadatas"][0]
+        return ids, (metas[0] or {}).get("answer") if metas else None
+
+    return rank
+
+
+BUILDERS = {"search": build_search, "app": build_app, "numpy": build_numpy}
+
+
+def run_target(name, pairs):
+    """Benchmark one target in this process (see run_isolated for a fresh one)."""
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    rank = BUILDERS[name]()
+    setup_seconds = time.perf_counter() - start
+
+    measured = {query for query, _, _ in pairs}
+    for query in WARMUP_QUERIES:
+        if query not in measured:
+            rank(query)
+
+    latencies, hits_at_1, hits_at_k, reciprocal_ranks = [], 0, 0, 0.0
+    has_ranking = True
+    run_start = time.perf_counter()
+    for query, expected_id, expected_answer in pairs:
+        start = time.perf_counter()
+        ranked, answer = rank(query)
+        latencies.append(time.perf_counter() - start)
+        if ranked is None:
+            has_ranking = False
+            hits_at_1 += answer == expected_answer
+            continue
+        hits_at_1 += bool(ranked) and ranked[0] == expected_id
+        if expected_id in ranked:
+            hits_at_k += 1
+            reciprocal_ranks += 1.0 / (ranked.index(expected_id) + 1)
+    elapsed = time.perf_counter() - run_start
+
+    n = len(pairs)
+    return {
+        **latency_summary(latencies, elapsed),
+        "setup_s": round(setup_seconds, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "rss_delta_mb": round(peak_rss_mb() - rss_before, 1),
+        "recall@1": round(hits_at_1 / n, 4),
+        f"recall@{K}": round(hits_at_k / n, 4) if has_ranking else None,
+        "mrr": round(reciprocal_ranks / n, 4) if has_ranking else None,
+    }
+
+
+def run_isolated(name, args):
+    """Run one target in a fresh interpreter (ru_maxrss is per process) and return its metrics."""
+    fd, path = tempfile.mkstemp(prefix=f"harness-{name}-", suffix=".json")
+    os.close(fd)
+    try:
+        cmd = [
+            sys.executable, __file__, "--faqs", args.faqs, "--variants", str(args.variants),
+            "--seed", str(args.seed), "--run-target", name, "--output", path,
+        ]
+        subprocess.run(cmd, cwd=ROOT_DIR, check=True)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.unlink(path)
+
+
+# ---------------------- Regression check ----------------------
+def compare(current, baseline, max_latency_regression, max_quality_drop):
+    """Return a list of human-readable regressions of `current` against `baseline`."""
+    problems = []
+    for name, now in current["targets"].items():
+        before = baseline.get("targets", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            if before.get(metric) and now[metric] > before[metric] * (1 + max_latency_regression):
+                problems.append(
+                    f"{name}: {metric} {now[metric]} ms vs baseline {before[metric]} ms "
+                    f"(> {max_latency_regression:.0%} slower)"
+                )
+        for metric in ("recall@1", f"recall@{K}", "mrr"):
+            if now.get(metric) is None or before.get(metric) is None:
+                continue
+            if now[metric] < before[metric] - max_quality_drop:
+                problems.append(f"{name}: {metric} {now[metric]} vs baseline {before[metric]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faqs", default=str(ROOT_DIR / "faqs.json"))
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--variants", type=int, default=4, help="paraphrases per FAQ (plus the original)")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--max-latency-regression", type=float, default=0.2,
+                        help="allowed relative p50/p95 slowdown (default 0.2 = 20%%)")
+    parser.add_argument("--max-quality-drop", type=float, default=0.02,
+                        help="allowed absolute drop in recall/MRR (default 0.02)")
+    parser.add_argument("--run-target", choices=TARGETS, help=argparse.SUPPRESS)  # one target, in-process
+    args = parser.parse_args()
+
+    faqs = load_faqs(args.faqs)
+    pairs = paraphrase_queries(faqs, variants=args.variants, seed=args.seed)
+    if args.run_target:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run_target(args.run_target, pairs), f)
+        return
+    print(f"{len(faqs)} FAQs, {len(pairs)} labeled queries")
+
+    results = {}
+    for name in args.targets:
+        results[name] = run_isolated(name, args)
+        print(f"✅ {name}: {results[name]['qps']} QPS, recall@1 {results[name]['recall@1']}")
+
+    print_table(
+        [{"target": name, **metrics} for name, metrics in results.items()],
+        ["target", "qps", "p50_ms", "p95_ms", "p99_ms", "recall@1", f"recall@{K}", "mrr", "peak_rss_mb", "rss_delta_mb"],
+    )
+    report = {
+        "created_at": time.time(),
+        "faqs": len(faqs),
+        "queries": len(pairs),
+        "variants": args.variants,
+        "seed": args.seed,
+        "targets": results,
+    }
+    write_json(args.output, report)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.max_latency_regression, args.max_quality_drop)
+        if problems:
+            print("❌ Regressions against the baseline:")
+            for problem in problems:
+                print(f"   {problem}")
+            sys.exit(1)
+        print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
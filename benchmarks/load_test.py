@@ -0,0 +1,69 @@
+"""
+Load test for /search with micro-batching on and off.
+
+Drives the Flask app in-process through its test client from N threads and
+prints throughput vs. p50/p99 latency for each concurrency level.
+
+    python benchmarks/load_test.py --concurrency 1 4 16 32 --requests 2000
+"""
+import argparse
+
+from common import latency_summary, print_table, run_concurrent, write_json
+
+import app as backend
+from db import load_faqs
+
+
+def build_queries(n):
+    """Distinct queries (so the caches never answer them) cycling through the FAQ questions."""
+    questions = [faq["question"] for faq in load_faqs() if faq.get("question")]
+    return [f"{questions[i % len(questions)]} (load {i})" for i in range(n)]
+
+
+def run(batching, concurrency, queries):
+    backend.BATCHING_ENABLED = batching
+
+    def post(client, query):
+        res = client.post("/search", json={"query": query})
+        if res.status_code != 200:
+            raise RuntimeError(f"HTTP {res.status_code}")
+
+    latencies, errors, elapsed = run_concurrent(
+        post, queries, concurrency, worker_init=backend.app.test_client
+    )
+    row = {"batching": "on" if batching else "off", "concurrency": concurrency}
+    row.update(latency_summary(latencies, elapsed))
+    row["errors"] = len(errors)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per run")
+    parser.add_argument("--max-batch-size", type=int, default=backend.BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=backend.BATCH_MAX_WAIT_MS)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    # Measure the model path, not the caches
+    backend.query_cache.maxsize = 0
+    backend.embedding_cache.maxsize = 0
+    backend.batcher.max_batch_size = args.max_batch_size
+    backend.batcher.max_wait = args.max_wait_ms / 1000
+
+    backend.retrieve_batch(["warm up"])
+    rows = []
+    for concurrency in args.concurrency:
+        queries = build_queries(args.requests)
+        for batching in (False, True):
+            rows.append(run(batching, concurrency, queries))
+
+    print_table(rows, ["batching", "concurrency", "requests", "qps", "p50_ms", "p99_ms", "errors"])
+    print(f"batcher: {backend.batcher.stats()}")
+    if args.json:
+        write_json(args.json, {"runs": rows, "batcher": backend.batcher.stats()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import random
+
+from common import ROOT_DIR  # noqa: F401  (puts the project modules on sys.path)
+
+from lexical import tokenize
+
+# Lead-ins students put before a question
+PREFIXES = [
+    "can you tell me",
+    "i want to know",
+    "please tell me",
+    "do you know",
+    "could you let me know",
+]
+
+# Word/phrase swaps applied to lowercased questions
+REWRITES = [
+    ("where is", "in which place is"),
+    ("where are", "in which place are"),
+    ("what is", "what's"),
+    ("what are", "what're"),
+    ("located", "situated"),
+    ("available", "offered"),
+    ("fees", "charges"),
+    ("fee", "charges"),
+    ("buses", "college buses"),
+    ("timings", "timing"),
+    ("how can i", "what is the way to"),
+    ("is there", "do we have"),
+]
+
+
+def _strip(question):
+    return question.rstrip("?!. ").lower()
+
+
+def _typo(text, rng):
+    """Swap two adjacent letters in one word of five or more letters."""
+    words = text.split()
+    candidates = [i for i, w in enumerate(words) if len(w) >= 5 and w.isalpha()]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    word = words[i]
+    j = rng.randrange(1, len(word) - 2)
+    words[i] = word[:j] + word[j + 1] + word[j] + word[j + 2:]
+    return " ".join(words)
+
+
+def _rewrite(text):
+    for old, new in REWRITES:
+        if old in f" {text} ":
+            return f" {text} ".replace(f" {old} ", f" {new} ", 1).strip()
+    return text
+
+
+def paraphrase_queries(faqs, variants=4, seed=13, include_original=True):
+    """
+    Labeled query set: [(query, expected FAQ id, expected answer)] for every FAQ.
+
+    Variants are drawn (deterministically for a seed) from a keyword form, a
+    lead-in prefix, a phrase rewrite and a one-typo version of the question.
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for faq in faqs:
+        question = faq["question"]
+        stripped = _strip(question)
+        forms = [
+            " ".join(tokenize(question)) or stripped,
+            f"{rng.choice(PREFIXES)} {stripped}",
+            _rewrite(stripped),
+            _typo(stripped, rng),
+        ]
+        forms = list(dict.fromkeys(f for f in forms if f and f != stripped))
+        rng.shuffle(forms)
+        chosen = ([question] if include_original else []) + forms[:variants]
+        pairs.extend((query, faq["id"], faq["answer"]) for query in chosen)
+    return pairs
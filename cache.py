@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercase, single-spaced, without trailing punctuation."""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+class TTLCache:
+    """Thread-safe LRU cache with an optional per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key, default=None):
+        """Return the cached value (refreshing its LRU position) or `default`."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries past maxsize."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counted as one invalidation)."""
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class StampWatcher:
+    """
+    Detect changes to a stamp file (e.g. the one db.sync_faqs writes after re-ingestion).
+
+    The file is stat()ed at most once every `interval` seconds, so calling
+    changed() on every request stays cheap.
+    """
+
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._signature = self._read_signature()
+
+    def _read_signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def changed(self):
+        """Return True once per change of the stamp file since the last call."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            self._next_check = now + self.interval
+            signature = self._read_signature()
+            if signature == self._signature:
+                return False
+            self._signature = signature
+            return True
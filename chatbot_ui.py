@@ -1,486 +1,687 @@
-import os
-import time
-import requests
-import streamlit as st
-
-# ---------------------- Page config ----------------------
-st.set_page_config(page_title="Student FAQ Chatbot", page_icon="🤖", layout="wide")
-
-# ---------------------- Dark styling ----------------------
-st.markdown(
-    """
-    <style>
-    /* Full app dark background and light text */
-    .stApp {
-        background-color: #020617;  /* almost black */
-        color: #e5e7eb;             /* slate-100 */
-    }
-
-    .block-container {
-        padding-top: 1.2rem;
-        padding-bottom: 1.2rem;
-    }
-
-    /* Sidebar dark background */
-    [data-testid="stSidebar"] {
-        background-color: #020617 !important;
-        color: #e5e7eb !important;
-    }
-
-    [data-testid="stSidebar"] h1,
-    [data-testid="stSidebar"] h2,
-    [data-testid="stSidebar"] h3,
-    [data-testid="stSidebar"] h4 {
-        color: #f9fafb !important;
-    }
-
-    /* Chat card container */
-    .chat-card {
-        background: #020617;
-        padding: 1.2rem 1.5rem;
-        border-radius: 18px;
-        border: 1px solid #1f2937;
-        box-shadow: none;
-    }
-
-    .small-muted {
-        font-size: 0.85rem;
-        color: #9ca3af;
-    }
-
-    .pill {
-        display: inline-block;
-        padding: 0.25rem 0.75rem;
-        border-radius: 999px;
-        background: #1f2937;
-        color: #93c5fd;
-        font-size: 0.78rem;
-        font-weight: 600;
-        letter-spacing: 0.02em;
-        margin-right: 0.3rem;
-    }
-
-    /* Chat messages: ensure text is bright */
-    [data-testid="stChatMessage"] p {
-        color: #e5e7eb !important;
-    }
-
-    .stButton>button {
-        border-radius: 999px;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-# ---------------------- Configuration ----------------------
-BACKEND_URL_SEARCH = os.environ.get("FAQ_BACKEND_URL", "http://127.0.0.1:5000/search")
-USERDB_LOG_URL = os.environ.get("FAQ_USERDB_LOG_URL", None)
-
-USE_LLM_POST_PROCESS = False  # set True when you plug in an LLM endpoint
-LLM_BACKEND_URL = os.environ.get("FAQ_LLM_URL", None)
-
-HISTORY_TURNS = 6
-
-# Sample hard-coded user with personal data
-SAMPLE_USER = {
-    "name": "Yuvanshi Bhalawat",
-    "email": "yuvanshibhalawat@acropolis.in",
-    "branch": "IT",
-    "attendance": "85%",
-    "cgpa": "8.5",
-}
-
-# ---------------------- State initialization ----------------------
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-if "processing" not in st.session_state:
-    st.session_state.processing = False
-if "user_id" not in st.session_state:
-    st.session_state.user_id = None  # simple session-based "login id" (email)
-if "auth_mode" not in st.session_state:
-    st.session_state.auth_mode = None  # "login" or "signup" or None
-if "user_profile" not in st.session_state:
-    st.session_state.user_profile = {}  # in-memory profile for this session
-if "registered_users" not in st.session_state:
-    # simple in-memory "database" of registered users, keyed by email (lowercase)
-    st.session_state.registered_users = {}
-
-
-# ---------------------- Helpers ----------------------
-def append_message(role: str, content: str) -> None:
-    st.session_state.messages.append(
-        {"role": role, "content": content, "ts": time.time()}
-    )
-
-
-def get_recent_history(n_turns: int = HISTORY_TURNS):
-    if not st.session_state.messages:
-        return []
-    recent = st.session_state.messages[-(n_turns * 2):]
-    return [{"role": m["role"], "content": m["content"]} for m in recent]
-
-
-def call_backend_search(query: str, timeout: int = 20) -> str:
-    payload = {"query": query}
-    try:
-        res = requests.post(BACKEND_URL_SEARCH, json=payload, timeout=timeout)
-    except requests.RequestException as e:
-        return f"❌ Error contacting backend: {e}"
-
-    if not res.ok:
-        return f"❌ Backend error {res.status_code}: {res.text}"
-
-    try:
-        data = res.json()
-    except Exception:
-        return res.text or ""
-
-    return str(data.get("answer", ""))
-
-
-def personalize_answer(query: str, base_answer: str) -> str:
-    """
-    If the logged-in user is the sample user and question is about attendance or result,
-    override the generic answer with personalized data.
-    """
-    profile = st.session_state.user_profile or {}
-    email = profile.get("email") or st.session_state.user_id
-
-    if email and email.lower() == SAMPLE_USER["email"].lower():
-        q = query.lower()
-        if "attendance" in q:
-            return f"Your current attendance is **{SAMPLE_USER['attendance']}**."
-        if "result" in q or "cgpa" in q or "c.g.p.a" in q:
-            return f"Your current result is **{SAMPLE_USER['cgpa']} CGPA**."
-
-    return base_answer
-
-
-def call_llm_post_process(query: str, answer: str, history=None, timeout: int = 20) -> str:
-    """Optional LLM refinement hook. Currently returns the original answer."""
-    if not USE_LLM_POST_PROCESS or not LLM_BACKEND_URL:
-        return answer
-
-    payload = {"query": query, "answer": answer}
-    if history:
-        payload["history"] = history
-
-    try:
-        res = requests.post(LLM_BACKEND_URL, json=payload, timeout=timeout)
-    except requests.RequestException as e:
-        return f"{answer}\n\n(LLM error: {e})"
-
-    if not res.ok:
-        return f"{answer}\n\n(LLM backend error {res.status_code}: {res.text})"
-
-    try:
-        data = res.json()
-    except Exception:
-        return answer
-
-    return str(data.get("answer", answer))
-
-
-def pick_emoji(query: str, answer: str) -> str:
-    """Pick an emoji based on the tone of the query."""
-    q = query.lower()
-    if any(w in q for w in ["thank", "thanks", "thanku", "thx"]):
-        return "😊"
-    if any(w in q for w in ["sorry", "confused", "doubt"]):
-        return "😅"
-    if "?" in q or any(w in q for w in ["how", "what", "why", "when", "where"]):
-        return "🤔"
-    if any(w in q for w in ["great", "awesome", "nice", "good"]):
-        return "😄"
-    return "🤖"
-
-
-def log_chat_event(user_id, question, answer, ts=None):
-    """Optional logging to external user DB (noop if USERDB_LOG_URL is not set)."""
-    if not USERDB_LOG_URL:
-        return
-
-    payload = {
-        "user_id": user_id,
-        "question": question,
-        "answer": answer,
-        "timestamp": ts or time.time(),
-        "meta": {"source": "faq_vector_db"},
-    }
-    try:
-        requests.post(USERDB_LOG_URL, json=payload, timeout=5)
-    except requests.RequestException:
-        pass
-
-
-def handle_user_query(query: str) -> None:
-    """Main handler: adds user msg, chooses answer (including small-talk), adds emoji."""
-    if not query or st.session_state.processing:
-        return
-
-    normalized = query.strip()
-    low = normalized.lower()
-
-    st.session_state.processing = True
-    append_message("user", normalized)
-
-    # 1) Smart small-talk: thanks
-    if any(w in low for w in ["thank", "thanks", "thanku", "thx"]):
-        reply = "Aapka bahut bahut dhanyavaad! 😊 Agar aapko aur koi sawaal ho to please poochhiye."
-        append_message("assistant", reply)
-        st.session_state.processing = False
-        return
-
-    # 2) Smart small-talk: greetings / how-are-you (English + Hindi)
-    if any(
-        phrase in low
-        for phrase in [
-            "hello",
-            "hi ",
-            "hi!",
-            "hey",
-            "namaste",
-            "namaskar",
-            "kaise ho",
-            "kese ho",
-            "kaisi ho",
-            "kya haal hai",
-            "kya hal hai",
-            "how are you",
-            "how r u",
-        ]
-    ):
-        profile = st.session_state.user_profile or {}
-        name = profile.get("name", "student")
-        reply = (
-            f"Main bilkul theek hoon, dhanyavaad! 😊 Aap kaise ho {name}? "
-            "Batao, main aapki kaise sahayta kar sakti hu?"
-        )
-        append_message("assistant", reply)
-        st.session_state.processing = False
-        return
-
-    # 3) Normal flow via backend + personalization
-    history = get_recent_history(HISTORY_TURNS)
-    history_for_llm = history + [{"role": "user", "content": normalized}]
-
-    with st.spinner("Searching..."):
-        base_answer = call_backend_search(normalized)
-        base_answer = personalize_answer(normalized, base_answer)
-
-        # Robust detection of "no answer" from backend / VectorDB
-        base_text = (base_answer or "").strip()
-        lowered = base_text.lower()
-        if (
-            not base_text
-            or "no matching answer" in lowered
-            or "backend error" in lowered
-            or "error contacting backend" in lowered
-            or "could not connect" in lowered
-            or lowered.startswith("❌")
-        ):
-            base_answer = "Sorry, I didn't understand."
-
-        final_answer = call_llm_post_process(
-            normalized, base_answer, history=history_for_llm
-        )
-
-    emoji = pick_emoji(normalized, final_answer)
-    if emoji not in final_answer:
-        final_answer = f"{final_answer} {emoji}"
-
-    append_message("assistant", final_answer)
-    log_chat_event(st.session_state.user_id, normalized, final_answer, ts=time.time())
-    st.session_state.processing = False
-
-
-def register_user(profile: dict):
-    """Register/overwrite a user profile in the in-memory 'database'."""
-    email_key = profile["email"].lower()
-    st.session_state.registered_users[email_key] = profile
-
-
-def register_sample_user(name: str, email: str, password: str):
-    """Create/update the special sample user with attendance + CGPA."""
-    profile = {
-        "name": name or SAMPLE_USER["name"],
-        "email": email,
-        "password": password,
-        "branch": SAMPLE_USER["branch"],
-        "attendance": SAMPLE_USER["attendance"],
-        "cgpa": SAMPLE_USER["cgpa"],
-    }
-    register_user(profile)
-    st.session_state.user_id = profile["email"]
-    st.session_state.user_profile = profile
-
-
-# ---------------------- Sidebar: Login / Signup & controls ----------------------
-with st.sidebar:
-    st.title("🎓AcroBot : Apka Apna College Guide....!!")
-
-    # Auth area
-    if st.session_state.user_id:
-        profile = st.session_state.user_profile or {}
-        display_name = profile.get("name") or "Student"
-        st.success(f"Logged in as: **{display_name}**")
-
-        with st.expander("My details", expanded=True):
-            st.markdown(f"**Name:** {profile.get('name', 'Not set')}")
-            st.markdown(f"**Branch:** {profile.get('branch', 'Not set')}")
-            if "attendance" in profile and "cgpa" in profile:
-                st.markdown(f"**Attendance:** {profile['attendance']}")
-                st.markdown(f"**Result (CGPA):** {profile['cgpa']}")
-
-        if st.button("Log out"):
-            st.session_state.user_id = None
-            st.session_state.auth_mode = None
-            st.session_state.user_profile = {}
-    else:
-        col_a, col_b = st.columns(2)
-        with col_a:
-            if st.button("Login"):
-                st.session_state.auth_mode = "login"
-        with col_b:
-            if st.button("Sign up"):
-                st.session_state.auth_mode = "signup"
-
-        # Login form (email + password)
-        if st.session_state.auth_mode == "login":
-            st.markdown("**Login**")
-            with st.form("login_form"):
-                email = st.text_input("College email")
-                password = st.text_input("Password", type="password")
-                submitted = st.form_submit_button("Login")
-                if submitted:
-                    if email and password:
-                        users = st.session_state.registered_users
-                        profile = users.get(email.strip().lower())
-                        if profile and password.strip() == profile.get("password"):
-                            st.session_state.user_id = profile["email"]
-                            st.session_state.user_profile = profile
-                            st.success("Logged in successfully!")
-                            st.session_state.auth_mode = None
-                        else:
-                            st.error(
-                                "User not found or password incorrect. "
-                                "Please check your details or sign up first."
-                            )
-                    else:
-                        st.error("Please fill all fields.")
-
-        # Signup form (name + email + password only)
-        elif st.session_state.auth_mode == "signup":
-            st.markdown("**Sign up**")
-            with st.form("signup_form"):
-                name = st.text_input("Full name")
-                email = st.text_input("College email")
-                password = st.text_input("Password", type="password")
-                submitted = st.form_submit_button("Create account")
-                if submitted:
-                    if name and email and password:
-                        email_clean = email.strip()
-                        pwd_clean = password.strip()
-                        if email_clean.lower() == SAMPLE_USER["email"].lower():
-                            # Special sample user: attach branch + attendance + cgpa
-                            register_sample_user(name.strip(), email_clean, pwd_clean)
-                        else:
-                            profile = {
-                                "name": name.strip(),
-                                "email": email_clean,
-                                "password": pwd_clean,
-                            }
-                            register_user(profile)
-                            st.session_state.user_id = profile["email"]
-                            st.session_state.user_profile = profile
-                        st.success("Account created for this session! You are logged in.")
-                        st.session_state.auth_mode = None
-                    else:
-                        st.error("Please fill name, email and password.")
-
-    st.markdown("---")
-
-    # View history option (sidebar)
-    with st.expander("View chat history"):
-        if not st.session_state.messages:
-            st.caption("No messages yet.")
-        else:
-            for m in st.session_state.messages:
-                who = "You" if m["role"] == "user" else "Bot"
-                st.markdown(f"**{who}:** {m['content']}")
-
-# ---------------------- Main layout ----------------------
-top_col_left, top_col_right = st.columns([4, 2])
-
-with top_col_left:
-    st.markdown("### 🤖 Student FAQ Chatbot")
-    st.markdown(
-        """
-        <span class="pill">24x7 help</span>
-        <span class="pill">Campus info</span>
-        <span class="pill">Transport</span>
-        <span class="pill">Fees & Scholarships</span>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    profile = st.session_state.user_profile or {}
-    if st.session_state.user_id and profile.get("name"):
-        username = profile["name"]
-        st.write(
-            f"Hello {username}, main aapki kaise sahayta kar sakti hu? "
-            "(What can I help you with?)"
-        )
-    else:
-        st.write(
-            "Get instant answers about your campus: infrastructure, transport, fees, "
-            "scholarships, placements, clubs and events."
-        )
-
-with top_col_right:
-    st.image(
-        "https://raw.githubusercontent.com/microsoft/fluentui-emoji/master/png/3d/student.png",
-        width=120,
-    )
-
-st.markdown("")
-
-# ---------------------- Chat area: history → suggestions → input ----------------------
-with st.container():
-    st.markdown('<div class="chat-card">', unsafe_allow_html=True)
-
-    # Placeholder container where history will be rendered.
-    history_container = st.container()
-
-    # 1. Suggestions
-    st.markdown("**Try these example questions:**")
-    cols = st.columns(3)
-    followups = [
-        "Where is the library?",
-        "What is the annual fee structure for B.Tech IT?",
-        "Are there any scholarships available for general category students?",
-        "Which buses are available from 60 Feet Road?",
-        "What student clubs are available?",
-        "Show me upcoming campus drives.",
-        "What is my attendance?",
-        "Show me my result.",
-    ]
-    for i, q in enumerate(followups):
-        if cols[i % 3].button(q, key=f"follow_{i}"):
-            handle_user_query(q)
-
-    # 2. Input bar at the bottom
-    user_input = st.chat_input("Type your question here...")
-    if user_input:
-        handle_user_query(user_input)
-
-    # 3. Render chat history (oldest at top, newest just above suggestions)
-    with history_container:
-        if st.session_state.messages:
-            for msg in st.session_state.messages:
-                with st.chat_message(msg.get("role", "assistant")):
-                    st.markdown(msg.get("content", ""))
-            st.markdown("---")
-
+import os
+import time
+import uuid
+import requests
+import streamlit as st
+
+import intents
+from answer_table import SUGGESTIONS, get_answer_table
+from event_logger import get_event_logger
+from http_client import get_client
+from llm_stream import STREAM_ACCEPT, StreamTimer, iter_tokens
+from semantic_cache import get_semantic_cache
+from user_store import EmailAlreadyRegistered, get_store
+
+# ---------------------- Page config ----------------------
+st.set_page_config(page_title="Student FAQ Chatbot", page_icon="🤖", layout="wide")
+
+# ---------------------- Dark styling ----------------------
+st.markdown(
+    """
+    <style>
+    /* Full app dark background and light text */
+    .stApp {
+        background-color: #020617;  /* almost black */
+        color: #e5e7eb;             /* slate-100 */
+    }
+
+    .block-container {
+        padding-top: 1.2rem;
+        padding-bottom: 1.2rem;
+    }
+
+    /* Sidebar dark background */
+    [data-testid="stSidebar"] {
+        background-color: #020617 !important;
+        color: #e5e7eb !important;
+    }
+
+    [data-testid="stSidebar"] h1,
+    [data-testid="stSidebar"] h2,
+    [data-testid="stSidebar"] h3,
+    [data-testid="stSidebar"] h4 {
+        color: #f9fafb !important;
+    }
+
+    /* Chat card container */
+    .chat-card {
+        background: #020617;
+        padding: 1.2rem 1.5rem;
+        border-radius: 18px;
+        border: 1px solid #1f2937;
+        box-shadow: none;
+    }
+
+    .small-muted {
+        font-size: 0.85rem;
+        color: #9ca3af;
+    }
+
+    .pill {
+        display: inline-block;
+        padding: 0.25rem 0.75rem;
+        border-radius: 999px;
+        background: #1f2937;
+        color: #93c5fd;
+        font-size: 0.78rem;
+        font-weight: 600;
+        letter-spacing: 0.02em;
+        margin-right: 0.3rem;
+    }
+
+    /* Chat messages: ensure text is bright */
+    [data-testid="stChatMessage"] p {
+        color: #e5e7eb !important;
+    }
+
+    .stButton>button {
+        border-radius: 999px;
+    }
+    </style>
+    """,
+    unsafe_allow_html=True,
+)
+
+# ---------------------- Configuration ----------------------
+BACKEND_URL_SEARCH = os.environ.get("FAQ_BACKEND_URL", "http://127.0.0.1:5000/search")
+USERDB_LOG_URL = os.environ.get("FAQ_USERDB_LOG_URL", None)
+# Optional endpoint accepting a JSON array of events (one POST per batch)
+USERDB_LOG_BATCH_URL = os.environ.get("FAQ_USERDB_LOG_BATCH_URL", None)
+
+# set FAQ_LLM_POST_PROCESS=1 when you plug in an LLM endpoint (see llm_stub.py for a local one)
+USE_LLM_POST_PROCESS = os.environ.get("FAQ_LLM_POST_PROCESS", "0") == "1"
+LLM_BACKEND_URL = os.environ.get("FAQ_LLM_URL", None)
+# Render the refined answer token by token (SSE or NDJSON) instead of waiting for all of it
+LLM_STREAMING = os.environ.get("FAQ_LLM_STREAM", "1") == "1"
+# Reuse refined answers for near-identical questions about the same FAQ (semantic_cache.py)
+USE_SEMANTIC_CACHE = os.environ.get("FAQ_SEMANTIC_CACHE", "1") == "1"
+# Answer suggestions and frequent questions from the table db.py precomputes, without the backend
+USE_ANSWER_TABLE = os.environ.get("FAQ_USE_ANSWER_TABLE", "1") == "1"
+LLM_ERROR_MARK = "\n\n(LLM "  # start of the note appended to answers the LLM failed to refine
+
+HISTORY_TURNS = 6
+# Turns rendered in the chat area; "Load older messages" reveals another window's worth
+CHAT_WINDOW_TURNS = int(os.environ.get("FAQ_CHAT_WINDOW_TURNS", "10"))
+CHAT_WINDOW_MESSAGES = CHAT_WINDOW_TURNS * 2
+SIDEBAR_RECENT_QUESTIONS = 5
+
+# Sample hard-coded user with personal data
+SAMPLE_USER = {
+    "name": "Yuvanshi Bhalawat",
+    "email": "yuvanshibhalawat@acropolis.in",
+    "branch": "IT",
+    "attendance": "85%",
+    "cgpa": "8.5",
+}
+
+# ---------------------- State initialization ----------------------
+if "guest_id" not in st.session_state:
+    # chat history owner until the user logs in
+    st.session_state.guest_id = f"guest:{uuid.uuid4().hex}"
+if "processing" not in st.session_state:
+    st.session_state.processing = False
+if "user_id" not in st.session_state:
+    st.session_state.user_id = None  # simple session-based "login id" (email)
+if "auth_mode" not in st.session_state:
+    st.session_state.auth_mode = None  # "login" or "signup" or None
+if "user_profile" not in st.session_state:
+    st.session_state.user_profile = {}  # profile of the logged-in user (no password)
+if "last_llm_timing" not in st.session_state:
+    st.session_state.last_llm_timing = None  # StreamTimer.stats() of the last streamed reply
+if "history_owner" not in st.session_state:
+    st.session_state.history_owner = None  # chat owner the two entries below belong to
+    st.session_state.history_older = []  # pages fetched by "Load older", oldest first
+    st.session_state.history_cursor = None  # (ts, id) of the oldest message shown
+    st.session_state.history_more = False  # whether anything is older than history_older
+    st.session_state.history_summary = {}  # sidebar summary, updated per message
+
+
+# ---------------------- Helpers ----------------------
+def chat_owner() -> str:
+    """Key the chat history is stored under: the user's email, or this session's guest id."""
+    if st.session_state.user_id:
+        return st.session_state.user_id.strip().lower()
+    return st.session_state.guest_id
+
+
+def sync_history_state() -> dict:
+    """
+    Reset the chat window and rebuild the sidebar summary when the chat owner
+    changes (first run, login, logout); otherwise return the running summary.
+    """
+    owner = chat_owner()
+    if st.session_state.history_owner != owner:
+        store = get_store()
+        recent = store.messages_page(owner, limit=SIDEBAR_RECENT_QUESTIONS * 2)
+        st.session_state.history_owner = owner
+        reset_history_window()
+        st.session_state.history_summary = {
+            "messages": store.count_messages(owner),
+            "recent_questions": [m["content"] for m in recent if m["role"] == "user"][
+                -SIDEBAR_RECENT_QUESTIONS:
+            ],
+        }
+    return st.session_state.history_summary
+
+
+def reset_history_window() -> None:
+    """Show only the newest window again (older pages are fetched anew on "Load older")."""
+    st.session_state.history_older = []
+    st.session_state.history_cursor = None
+    st.session_state.history_more = False
+
+
+def append_message(role: str, content: str) -> None:
+    summary = sync_history_state()
+    get_store().append_message(chat_owner(), role, content, ts=time.time())
+    # A new message scrolls the chat back to the newest window, so no gap opens above it
+    reset_history_window()
+    summary["messages"] += 1
+    if role == "user":
+        recent = summary["recent_questions"]
+        recent.append(content)
+        del recent[:-SIDEBAR_RECENT_QUESTIONS]
+
+
+def get_recent_history(n_turns: int = HISTORY_TURNS):
+    recent = get_store().messages_page(chat_owner(), limit=n_turns * 2)
+    return [{"role": m["role"], "content": m["content"]} for m in recent]
+
+
+def call_backend_search(query: str, return_embedding: bool = False) -> dict:
+    """
+    Ask the backend for the best FAQ answer (plus the query embedding if asked for).
+
+    Returns the backend's JSON ({"answer", "matched", "confidence", ...}); transport
+    errors come back as {"answer": "❌ ...", "matched": False, "reason": "error"}.
+    """
+    payload = {"query": query}
+    if return_embedding:
+        payload["return_embedding"] = True
+    try:
+        res = get_client().post("search", BACKEND_URL_SEARCH, json=payload)
+    except requests.RequestException as e:
+        return {"answer": f"❌ Error contacting backend: {e}", "matched": False, "reason": "error"}
+
+    if not res.ok:
+        return {
+            "answer": f"❌ Backend error {res.status_code}: {res.text}",
+            "matched": False,
+            "reason": "error",
+        }
+
+    try:
+        data = res.json()
+    except Exception:
+        return {"answer": res.text or "", "matched": bool(res.text)}
+
+    answer = str(data.get("answer", ""))
+    if "matched" not in data:
+        # Older backends only send an answer string
+        data["matched"] = not looks_like_no_answer(answer)
+    data["answer"] = answer
+    return data
+
+
+def looks_like_no_answer(text: str) -> bool:
+    """Heuristic "no answer" check for backends that do not send a `matched` flag."""
+    lowered = (text or "").strip().lower()
+    return (
+        not lowered
+        or "no matching answer" in lowered
+        or "backend error" in lowered
+        or "error contacting backend" in lowered
+        or "could not connect" in lowered
+        or lowered.startswith("❌")
+    )
+
+
+def personalize_answer(query: str, base_answer, intent: str = None):
+    """
+    If the logged-in user is the sample user and question is about attendance or result,
+    override the generic answer with personalized data.
+    """
+    profile = st.session_state.user_profile or {}
+    email = profile.get("email") or st.session_state.user_id
+
+    if email and email.lower() == SAMPLE_USER["email"].lower():
+        intent = intent or intents.route(query)
+        if intent == "attendance":
+            return f"Your current attendance is **{SAMPLE_USER['attendance']}**."
+        if intent == "result":
+            return f"Your current result is **{SAMPLE_USER['cgpa']} CGPA**."
+
+    return base_answer
+
+
+def call_llm_post_process(query: str, answer: str, history=None) -> str:
+    """Optional LLM refinement hook. Currently returns the original answer."""
+    if not USE_LLM_POST_PROCESS or not LLM_BACKEND_URL:
+        return answer
+
+    payload = {"query": query, "answer": answer}
+    if history:
+        payload["history"] = history
+
+    try:
+        res = get_client().post("llm", LLM_BACKEND_URL, json=payload)
+    except requests.RequestException as e:
+        return f"{answer}{LLM_ERROR_MARK}error: {e})"
+
+    if not res.ok:
+        return f"{answer}{LLM_ERROR_MARK}backend error {res.status_code}: {res.text})"
+
+    try:
+        data = res.json()
+    except Exception:
+        return answer
+
+    return str(data.get("answer", answer))
+
+
+def stream_llm_post_process(query: str, answer: str, history=None):
+    """Streaming variant of call_llm_post_process: yields the refined answer as it arrives."""
+    payload = {"query": query, "answer": answer, "stream": True}
+    if history:
+        payload["history"] = history
+
+    try:
+        res = get_client().post(
+            "llm", LLM_BACKEND_URL, json=payload, stream=True, headers={"Accept": STREAM_ACCEPT}
+        )
+    except requests.RequestException as e:
+        yield f"{answer}{LLM_ERROR_MARK}error: {e})"
+        return
+
+    with res:
+        if not res.ok:
+            yield f"{answer}{LLM_ERROR_MARK}backend error {res.status_code}: {res.text})"
+            return
+
+        streamed = False
+        try:
+            for token in iter_tokens(res):
+                streamed = streamed or bool(token)
+                yield token
+        except (requests.RequestException, ValueError) as e:
+            if streamed:
+                yield f"{LLM_ERROR_MARK}stream interrupted: {e})"
+            else:
+                yield f"{answer}{LLM_ERROR_MARK}error: {e})"
+            return
+        if not streamed:
+            yield answer
+
+
+def render_llm_stream(query: str, answer: str, history, slot) -> str:
+    """Show the question and the streaming reply in `slot`; returns the full reply text."""
+    timer = StreamTimer()
+    with slot.container():
+        with st.chat_message("user"):
+            st.markdown(query)
+        with st.chat_message("assistant"):
+            text = st.write_stream(timer.track(stream_llm_post_process(query, answer, history)))
+    st.session_state.last_llm_timing = timer.stats()
+    slot.empty()  # the stored message is rendered with the rest of the history
+    return text if isinstance(text, str) else "".join(str(part) for part in text)
+
+
+# Emoji per query tone, first match wins
+TONE_EMOJIS = (("thanks", "😊"), ("apology", "😅"), ("question", "🤔"), ("positive", "😄"))
+
+
+def pick_emoji(query: str, answer: str, tags=None) -> str:
+    """Pick an emoji based on the tone of the query."""
+    tags = intents.detect(query) if tags is None else tags
+    return next((emoji for tone, emoji in TONE_EMOJIS if tone in tags), "🤖")
+
+
+def log_chat_event(user_id, question, answer, ts=None, meta=None):
+    """
+    Optional logging to external user DB (noop if USERDB_LOG_URL is not set).
+
+    Events are queued for the background logger, so the reply never waits on the user DB.
+    """
+    if not USERDB_LOG_URL:
+        return
+
+    payload = {
+        "user_id": user_id,
+        "question": question,
+        "answer": answer,
+        "timestamp": ts or time.time(),
+        "meta": {"source": "faq_vector_db", **(meta or {})},
+    }
+    get_event_logger(USERDB_LOG_URL, batch_url=USERDB_LOG_BATCH_URL).log(payload)
+
+
+def handle_user_query(query: str, live_slot=None) -> None:
+    """
+    Main handler: adds user msg, chooses answer (including small-talk), adds emoji.
+
+    With LLM streaming on, the refined answer is rendered into `live_slot` as it arrives.
+    """
+    if not query or st.session_state.processing:
+        return
+
+    normalized = query.strip()
+    tags = intents.detect(normalized)
+    intent = intents.route(normalized, tags)
+
+    st.session_state.processing = True
+    append_message("user", normalized)
+
+    # 1) Smart small-talk: thanks, greetings / how-are-you (English + Hindi)
+    if intent in intents.SMALL_TALK:
+        profile = st.session_state.user_profile or {}
+        reply = intents.small_talk_reply(intent, name=profile.get("name", "student"))
+        append_message("assistant", reply)
+        st.session_state.processing = False
+        return
+
+    # 2) Personal data is answered locally; everything else goes to the backend
+    history = get_recent_history(HISTORY_TURNS)
+    history_for_llm = history + [{"role": "user", "content": normalized}]
+
+    use_llm = bool(USE_LLM_POST_PROCESS and LLM_BACKEND_URL)
+    stream = use_llm and LLM_STREAMING and live_slot is not None
+    use_cache = use_llm and USE_SEMANTIC_CACHE
+    cache_key, cached = None, None
+    llm_timing = None
+    source = None
+    with st.spinner("Searching..."):
+        base_answer = personalize_answer(normalized, None, intent)
+        if base_answer is None:
+            result = get_answer_table().get(normalized) if USE_ANSWER_TABLE else None
+            source = "answer_table" if result is not None else "backend"
+            if result is None:
+                result = call_backend_search(normalized, return_embedding=use_cache)
+            if result.get("matched"):
+                base_answer = result.get("answer", "")
+                if use_cache and result.get("id") and result.get("embedding"):
+                    cache_key = (result["id"], result["embedding"])
+                    cached = get_semantic_cache().get(*cache_key, base_answer)
+
+        if base_answer is None:
+            # Rejected or failed lookup: nothing for the LLM to refine
+            final_answer = "Sorry, I didn't understand."
+        elif cached is not None:
+            final_answer = cached
+        elif not stream:
+            final_answer = call_llm_post_process(
+                normalized, base_answer, history=history_for_llm
+            )
+
+    if base_answer is not None and cached is None and stream:
+        final_answer = render_llm_stream(normalized, base_answer, history_for_llm, live_slot)
+        llm_timing = st.session_state.last_llm_timing
+
+    if cache_key and cached is None and LLM_ERROR_MARK not in final_answer:
+        get_semantic_cache().set(*cache_key, base_answer, final_answer)
+
+    emoji = pick_emoji(normalized, final_answer, tags)
+    if emoji not in final_answer:
+        final_answer = f"{final_answer} {emoji}"
+
+    append_message("assistant", final_answer)
+    log_chat_event(
+        st.session_state.user_id,
+        normalized,
+        final_answer,
+        ts=time.time(),
+        meta={
+            "llm_timing": llm_timing,
+            "semantic_cache": "hit" if cached is not None else ("miss" if cache_key else None),
+            "answer_source": source,
+        },
+    )
+    st.session_state.processing = False
+
+
+def register_user(profile: dict) -> dict:
+    """
+    Register a new user in the user store; returns the stored profile (no password).
+    Raises EmailAlreadyRegistered for an email that already has an account.
+    """
+    return get_store().create_user(profile)
+
+
+def register_sample_user(name: str, email: str, password: str):
+    """Create the special sample user with attendance + CGPA."""
+    profile = {
+        "name": name or SAMPLE_USER["name"],
+        "email": email,
+        "password": password,
+        "branch": SAMPLE_USER["branch"],
+        "attendance": SAMPLE_USER["attendance"],
+        "cgpa": SAMPLE_USER["cgpa"],
+    }
+    stored = register_user(profile)
+    st.session_state.user_id = stored["email"]
+    st.session_state.user_profile = stored
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_history_window(owner: str, limit: int, version: int) -> list:
+    """Newest `limit` messages; `version` (the newest message id) keys the cache entry."""
+    return get_store().messages_page(owner, limit=limit)
+
+
+def show_older_messages() -> None:
+    """Fetch just the page before the oldest message shown (keyset cursor, not a bigger window)."""
+    page = get_store().messages_page(
+        chat_owner(), limit=CHAT_WINDOW_MESSAGES + 1, before=st.session_state.history_cursor
+    )
+    # one extra row tells whether there is anything older still
+    st.session_state.history_more = len(page) > CHAT_WINDOW_MESSAGES
+    st.session_state.history_older = page[-CHAT_WINDOW_MESSAGES:] + st.session_state.history_older
+
+
+@st.fragment
+def render_history() -> None:
+    """
+    Render the newest window of the chat plus any older pages loaded so far. As a
+    fragment, "Load older messages" only reruns this block instead of the whole page.
+    """
+    sync_history_state()
+    owner = chat_owner()
+    # one extra row tells whether there is anything older to load
+    window = load_history_window(owner, CHAT_WINDOW_MESSAGES + 1, get_store().latest_message_id(owner))
+    more = len(window) > CHAT_WINDOW_MESSAGES
+    messages = st.session_state.history_older + window[-CHAT_WINDOW_MESSAGES:]
+    if not messages:
+        return
+    if st.session_state.history_older:
+        more = st.session_state.history_more
+    st.session_state.history_cursor = (messages[0]["ts"], messages[0]["id"])
+    if more:
+        st.button("⬆️ Load older messages", key="load_older", on_click=show_older_messages)
+    for msg in messages:
+        with st.chat_message(msg.get("role", "assistant")):
+            st.markdown(msg.get("content", ""))
+    st.markdown("---")
+
+
+# ---------------------- Sidebar: Login / Signup & controls ----------------------
+with st.sidebar:
+    st.title("🎓AcroBot : Apka Apna College Guide....!!")
+
+    # Auth area
+    if st.session_state.user_id:
+        profile = st.session_state.user_profile or {}
+        display_name = profile.get("name") or "Student"
+        st.success(f"Logged in as: **{display_name}**")
+
+        with st.expander("My details", expanded=True):
+            st.markdown(f"**Name:** {profile.get('name', 'Not set')}")
+            st.markdown(f"**Branch:** {profile.get('branch', 'Not set')}")
+            if "attendance" in profile and "cgpa" in profile:
+                st.markdown(f"**Attendance:** {profile['attendance']}")
+                st.markdown(f"**Result (CGPA):** {profile['cgpa']}")
+
+        if st.button("Log out"):
+            st.session_state.user_id = None
+            st.session_state.auth_mode = None
+            st.session_state.user_profile = {}
+    else:
+        col_a, col_b = st.columns(2)
+        with col_a:
+            if st.button("Login"):
+                st.session_state.auth_mode = "login"
+        with col_b:
+            if st.button("Sign up"):
+                st.session_state.auth_mode = "signup"
+
+        # Login form (email + password)
+        if st.session_state.auth_mode == "login":
+            st.markdown("**Login**")
+            with st.form("login_form"):
+                email = st.text_input("College email")
+                password = st.text_input("Password", type="password")
+                submitted = st.form_submit_button("Login")
+                if submitted:
+                    if email and password:
+                        profile = get_store().authenticate(email, password.strip())
+                        if profile:
+                            st.session_state.user_id = profile["email"]
+                            st.session_state.user_profile = profile
+                            st.success("Logged in successfully!")
+                            st.session_state.auth_mode = None
+                        else:
+                            st.error(
+                                "User not found or password incorrect. "
+                                "Please check your details or sign up first."
+                            )
+                    else:
+                        st.error("Please fill all fields.")
+
+        # Signup form (name + email + password only)
+        elif st.session_state.auth_mode == "signup":
+            st.markdown("**Sign up**")
+            with st.form("signup_form"):
+                name = st.text_input("Full name")
+                email = st.text_input("College email")
+                password = st.text_input("Password", type="password")
+                submitted = st.form_submit_button("Create account")
+                if submitted:
+                    if name and email and password:
+                        email_clean = email.strip()
+                        pwd_clean = password.strip()
+                        try:
+                            if email_clean.lower() == SAMPLE_USER["email"].lower():
+                                # Special sample user: attach branch + attendance + cgpa
+                                register_sample_user(name.strip(), email_clean, pwd_clean)
+                            else:
+                                profile = {
+                                    "name": name.strip(),
+                                    "email": email_clean,
+                                    "password": pwd_clean,
+                                }
+                                stored = register_user(profile)
+                                st.session_state.user_id = stored["email"]
+                                st.session_state.user_profile = stored
+                        except EmailAlreadyRegistered as e:
+                            st.error(str(e))
+                        else:
+                            st.success("Account created! You are logged in.")
+                            st.session_state.auth_mode = None
+                    else:
+                        st.error("Please fill name, email and password.")
+
+    st.markdown("---")
+
+    # View history option (sidebar)
+    with st.expander("View chat history"):
+        summary = sync_history_state()
+        if not summary["messages"]:
+            st.caption("No messages yet.")
+        else:
+            st.caption(f"{summary['messages']} messages. Your latest questions:")
+            for question in reversed(summary["recent_questions"]):
+                st.markdown(f"- {question}")
+
+    if USE_LLM_POST_PROCESS and USE_SEMANTIC_CACHE:
+        cache_stats = get_semantic_cache().stats()
+        st.caption(
+            f"♻️ Refined-answer cache: {cache_stats['hit_rate']:.0%} hit rate "
+            f"({cache_stats['hits']} of {cache_stats['hits'] + cache_stats['misses']} lookups)"
+        )
+
+    if USE_ANSWER_TABLE:
+        table_stats = get_answer_table().stats()
+        if table_stats["entries"]:
+            freshness = "" if table_stats["fresh"] else " (stale: faqs.json changed, run db.py)"
+            st.caption(
+                f"⚡ {table_stats['entries']} precomputed answers, "
+                f"{table_stats['hits']} served locally{freshness}"
+            )
+
+# ---------------------- Main layout ----------------------
+top_col_left, top_col_right = st.columns([4, 2])
+
+with top_col_left:
+    st.markdown("### 🤖 Student FAQ Chatbot")
+    st.markdown(
+        """
+        <span class="pill">24x7 help</span>
+        <span class="pill">Campus info</span>
+        <span class="pill">Transport</span>
+        <span class="pill">Fees & Scholarships</span>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    profile = st.session_state.user_profile or {}
+    if st.session_state.user_id and profile.get("name"):
+        username = profile["name"]
+        st.write(
+            f"Hello {username}, main aapki kaise sahayta kar sakti hu? "
+            "(What can I help you with?)"
+        )
+    else:
+        st.write(
+            "Get instant answers about your campus: infrastructure, transport, fees, "
+            "scholarships, placements, clubs and events."
+        )
+
+with top_col_right:
+    st.image(
+        "https://raw.githubusercontent.com/microsoft/fluentui-emoji/master/png/3d/student.png",
+        width=120,
+    )
+
+st.markdown("")
+
+# ---------------------- Chat area: history → suggestions → input ----------------------
+with st.container():
+    st.markdown('<div class="chat-card">', unsafe_allow_html=True)
+
+    # Placeholder container where history will be rendered.
+    history_container = st.container()
+    # Newest question and its streaming reply, shown until the history re-renders
+    live_slot = st.empty()
+
+    # 1. Suggestions
+    st.markdown("**Try these example questions:**")
+    cols = st.columns(3)
+    # Precomputed by db.py into the answer table, so these answer without a backend call
+    for i, q in enumerate(SUGGESTIONS):
+        if cols[i % 3].button(q, key=f"follow_{i}"):
+            handle_user_query(q, live_slot)
+
+    # 2. Input bar at the bottom
+    user_input = st.chat_input("Type your question here...")
+    if user_input:
+        handle_user_query(user_input, live_slot)
+
+    # 3. Render chat history (oldest at top, newest just above suggestions)
+    with history_container:
+        render_history()
+        timing = st.session_state.last_llm_timing
+        if timing and timing["ttft_ms"] is not None:
+            st.caption(
+                f"⚡ LLM first token in {timing['ttft_ms']:.0f} ms, "
+                f"full answer in {timing['total_ms']:.0f} ms"
+            )
+
     st.markdown("</div>", unsafe_allow_html=True)
\ No newline at end of file
@@ -1,94 +1,399 @@
-import json
-from pathlib import Path
-
-import chromadb
-from chromadb.utils import embedding_functions
-
-# ---------------------- Config ----------------------
-# Local folder where Chroma will store its data
-BASE_DIR = Path(__file__).parent
-CHROMA_DB_PATH = BASE_DIR / "chroma_db"
-COLLECTION_NAME = "student_faqs"
-EMBED_MODEL_NAME = "all-mpnet-base-v2"
-
-
-def get_client():
-    """Return a local persistent Chroma client (no HTTP server needed)."""
-    return chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
-
-
-def get_collection(client):
-    """Return (or create) the FAQ collection with the correct embedding function."""
-    embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name=EMBED_MODEL_NAME
-    )
-    return client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        embedding_function=embed_fn,
-    )
-
-
-def load_faqs():
-    """Load FAQs from faqs.json (in the same folder as this file)."""
-    faqs_path = BASE_DIR / "faqs.json"
-
-    try:
-        with open(faqs_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print(f"❌ Error: faqs.json not found at {faqs_path}")
-        raise
-    except json.JSONDecodeError:
-        print("❌ Error: faqs.json contains invalid JSON")
-        raise
-
-
-def ingest_faqs():
-    """Embed and store FAQs in ChromaDB, skipping ones already present."""
-    client = get_client()
-    collection = get_collection(client)
-
-    try:
-        faqs = load_faqs()
-    except Exception:
-        # Errors already logged in load_faqs()
-        return
-
-    # Check existing IDs to avoid duplicates
-    existing_ids = set()
-    try:
-        existing = collection.get()
-        existing_ids = set(existing.get("ids", []))
-    except Exception:
-        # Collection may be empty or not yet created
-        pass
-
-    # Only add FAQs not already in the DB
-    new_faqs = [faq for faq in faqs if faq.get("id") not in existing_ids]
-
-    if not new_faqs:
-        print("✅ No new FAQs to add. ChromaDB is already up to date.")
-        return
-
-    for faq in new_faqs:
-        q = faq.get("question", "")
-        a = faq.get("answer", "")
-        faq_id = faq.get("id")
-        category = faq.get("category")
-
-        if not faq_id or not q or not a:
-            # Skip incomplete records
-            continue
-
-        collection.add(
-            documents=[q],
-            metadatas=[{"answer": a, "category": category}],
-            ids=[faq_id],
-        )
-
-    print(f"✅ {len(new_faqs)} new FAQs embedded and stored in ChromaDB")
-
-
-if __name__ == "__main__":
-    # Run this once (or when faqs.json changes) to load data into ChromaDB
-    ingest_faqs()
\ No newline at end of file
+import argparse
+import hashlib
+import json
+import os
+import time
+from itertools import islice
+from pathlib import Path
+
+import chromadb
+
+import metrics
+from answer_table import TABLE_PATH as ANSWER_TABLE_PATH, build_table, file_hash
+from embeddings import EMBED_MODEL_NAME, collection_name, get_embedding_function
+from snapshot import export_snapshot, is_current_format
+from vector_index import NumpyIndex
+
+# ---------------------- Config ----------------------
+# Local folder where Chroma will store its data
+BASE_DIR = Path(__file__).parent
+CHROMA_DB_PATH = BASE_DIR / "chroma_db"
+# One collection per embedding model (FAQ_EMBED_MODEL); the default model keeps "student_faqs"
+COLLECTION_NAME = collection_name("student_faqs")
+FAQS_PATH = BASE_DIR / "faqs.json"
+# Rewritten after every sync that changes the store; readers watch it to drop caches
+INGEST_STAMP_PATH = CHROMA_DB_PATH / "ingest_stamp.json"
+# Memory-mappable embedding snapshots that backend workers load at startup
+SNAPSHOT_DIR = BASE_DIR / "snapshots"
+
+# Ingestion tuning: texts per encoder call, records per Chroma write/lookup
+ENCODE_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 512
+READ_CHUNK_SIZE = 1 << 16  # characters read at a time when streaming faqs.json
+WATCH_INTERVAL_SECONDS = 2.0  # db.py --watch: how often the FAQ file is checked
+
+
+def get_client():
+    """Return a local persistent Chroma client (no HTTP server needed)."""
+    return chromadb.PersistentClient(path=str(CHROMA_DB_PATH))
+
+
+def get_collection(client, embed_fn=None):
+    """Return (or create) the FAQ collection with the correct embedding function."""
+    return client.get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=embed_fn or get_embedding_function(),
+    )
+
+
+def _iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without reading the whole file."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    fill()
+    skip(" \t\r\n")
+    if pos >= len(buf) or buf[pos] != "[":
+        raise json.JSONDecodeError("Expected a JSON array", buf, pos)
+    pos += 1
+
+    while True:
+        skip(" \t\r\n,")
+        if pos >= len(buf):
+            raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        if end == len(buf) and not eof:
+            # Element may continue in the next chunk; re-read before trusting it
+            fill()
+            continue
+        pos = end
+        yield obj
+
+
+def iter_faqs(path=None):
+    """Stream FAQs one at a time from faqs.json (JSON array) or a .jsonl file."""
+    faqs_path = Path(path or FAQS_PATH)
+
+    try:
+        with open(faqs_path, "r", encoding="utf-8") as f:
+            if faqs_path.suffix == ".jsonl":
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        yield json.loads(line)
+            else:
+                yield from _iter_json_array(f)
+    except FileNotFoundError:
+        print(f"❌ Error: {faqs_path.name} not found at {faqs_path}")
+        raise
+    except json.JSONDecodeError:
+        print(f"❌ Error: {faqs_path.name} contains invalid JSON")
+        raise
+
+
+def load_faqs(path=None):
+    """Load all FAQs into a list (prefer iter_faqs() for large files)."""
+    return list(iter_faqs(path))
+
+
+def batched(iterable, size):
+    """Yield lists of up to `size` items from `iterable`."""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _max_batch_size(client, requested):
+    """Clamp a write batch size to what the Chroma client accepts."""
+    limit = None
+    if hasattr(client, "get_max_batch_size"):
+        limit = client.get_max_batch_size()
+    elif hasattr(client, "max_batch_size"):
+        limit = client.max_batch_size
+    return min(requested, limit) if limit else requested
+
+
+def write_ingest_stamp(stats, path=INGEST_STAMP_PATH, model_name=EMBED_MODEL_NAME):
+    """Record that the collection changed so running backends can invalidate their caches."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"updated_at": time.time(), "model": model_name, "stats": stats}, f)
+    os.replace(tmp_path, path)
+
+
+def content_hash(question, answer, category, model_name=EMBED_MODEL_NAME):
+    """Fingerprint everything that affects a stored FAQ (text, metadata and model)."""
+    payload = json.dumps([question, answer, category or "", model_name], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _stored_hashes(collection, ids):
+    """Return {id: content_hash} for the given IDs that are already stored (no vectors fetched)."""
+    if not ids:
+        return {}
+    existing = collection.get(ids=ids, include=["metadatas"])
+    return {
+        faq_id: (meta or {}).get("content_hash")
+        for faq_id, meta in zip(existing.get("ids", []), existing.get("metadatas") or [])
+    }
+
+
+def _iter_stored_ids(collection, page_size):
+    """Yield every ID in the collection, one page at a time."""
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=page_size, offset=offset).get("ids", [])
+        if not page:
+            return
+        yield from page
+        offset += len(page)
+
+
+def _to_record(faq, model_name=EMBED_MODEL_NAME):
+    """Normalize a raw FAQ dict into (id, document, metadata), or None if incomplete."""
+    q = faq.get("question", "")
+    a = faq.get("answer", "")
+    faq_id = faq.get("id")
+    category = faq.get("category")
+
+    if not faq_id or not q or not a:
+        return None
+
+    metadata = {"answer": a, "content_hash": content_hash(q, a, category, model_name)}
+    if category:
+        metadata["category"] = category
+    return faq_id, q, metadata
+
+
+def _embed(embed_fn, documents, encode_batch_size):
+    """Encode documents in fixed-size chunks, one model call per chunk."""
+    embeddings = []
+    for chunk in batched(documents, encode_batch_size):
+        with metrics.span("ingest_encode"):
+            embeddings.extend(embed_fn(chunk))
+    return embeddings
+
+
+def sync_faqs(
+    path=None,
+    collection=None,
+    embed_fn=None,
+    model_name=None,
+    prune=True,
+    stamp_path=INGEST_STAMP_PATH,
+    encode_batch_size=ENCODE_BATCH_SIZE,
+    upsert_batch_size=UPSERT_BATCH_SIZE,
+):
+    """
+    Bring the collection in line with the FAQ file.
+
+    Each stored FAQ carries a content hash in its metadata; only new or changed
+    FAQs are re-embedded, and (with prune=True) FAQs no longer in the file are deleted.
+    When anything changed, the ingest stamp at `stamp_path` is rewritten.
+    `model_name` defaults to the embedding function's model + backend fingerprint.
+    Returns a stats dict, or None if the FAQ file could not be read.
+    """
+    embed_fn = embed_fn or get_embedding_function()
+    model_name = model_name or getattr(embed_fn, "fingerprint", EMBED_MODEL_NAME)
+    if collection is None:
+        client = get_client()
+        collection = get_collection(client, embed_fn)
+        upsert_batch_size = _max_batch_size(client, upsert_batch_size)
+
+    stats = {
+        "scanned": 0, "added": 0, "updated": 0, "unchanged": 0,
+        "deleted": 0, "incomplete": 0,
+    }
+    seen_ids = set()
+    start = time.perf_counter()
+
+    try:
+        for batch in batched(iter_faqs(path), upsert_batch_size):
+            stats["scanned"] += len(batch)
+
+            records = {}
+            for faq in batch:
+                record = _to_record(faq, model_name)
+                if record is None:
+                    # Skip incomplete records
+                    stats["incomplete"] += 1
+                elif record[0] not in records and record[0] not in seen_ids:
+                    records[record[0]] = record
+            seen_ids.update(records)
+
+            stored = _stored_hashes(collection, list(records))
+            changed = []
+            for faq_id, record in records.items():
+                if faq_id not in stored:
+                    stats["added"] += 1
+                elif stored[faq_id] != record[2]["content_hash"]:
+                    stats["updated"] += 1
+                else:
+                    stats["unchanged"] += 1
+                    continue
+                changed.append(record)
+
+            if not changed:
+                continue
+
+            ids, documents, metadatas = (list(col) for col in zip(*changed))
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=_embed(embed_fn, documents, encode_batch_size),
+            )
+    except (FileNotFoundError, json.JSONDecodeError):
+        # Errors already logged in iter_faqs(); never prune against a bad file
+        return None
+
+    if prune:
+        removed = [i for i in _iter_stored_ids(collection, upsert_batch_size) if i not in seen_ids]
+        for chunk in batched(removed, upsert_batch_size):
+            collection.delete(ids=chunk)
+        stats["deleted"] = len(removed)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["docs_per_sec"] = round(stats["scanned"] / elapsed, 1) if elapsed > 0 else 0.0
+
+    if stamp_path and (stats["added"] or stats["updated"] or stats["deleted"]):
+        write_ingest_stamp(stats, stamp_path, model_name)
+    return stats
+
+
+def ingest_faqs(
+    path=None,
+    encode_batch_size=ENCODE_BATCH_SIZE,
+    upsert_batch_size=UPSERT_BATCH_SIZE,
+    snapshot=True,
+    answer_table=True,
+):
+    """
+    Sync faqs.json into ChromaDB, embedding only new or edited FAQs.
+
+    When the corpus changed (or no snapshot exists yet) a new embedding snapshot
+    is exported before the ingest stamp is written, so backends that reload on
+    the stamp always find the matching snapshot. Then the answer table of
+    canonical and most-asked questions is rebuilt (answer_table.py).
+    """
+    client = get_client()
+    embed_fn = get_embedding_function()
+    collection = get_collection(client, embed_fn)
+
+    with metrics.span("ingest_sync"):
+        stats = sync_faqs(
+            path=path,
+            collection=collection,
+            embed_fn=embed_fn,
+            stamp_path=None,
+            encode_batch_size=encode_batch_size,
+            upsert_batch_size=_max_batch_size(client, upsert_batch_size),
+        )
+    if stats is None:
+        return None
+
+    changed = bool(stats["added"] or stats["updated"] or stats["deleted"])
+    if not changed:
+        print("✅ No FAQ changes. ChromaDB is already up to date.")
+    else:
+        print(
+            f"✅ ChromaDB synced: {stats['added']} added, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted ({stats['unchanged']} unchanged)"
+        )
+    print(
+        f"   scanned {stats['scanned']} FAQs in {stats['seconds']:.2f}s "
+        f"({stats['docs_per_sec']:.0f} docs/sec)"
+    )
+
+    if snapshot and (changed or not is_current_format(SNAPSHOT_DIR)):
+        with metrics.span("ingest_snapshot"):
+            index = NumpyIndex.from_collection(collection)
+            version_dir = export_snapshot(index, embed_fn.fingerprint, SNAPSHOT_DIR) if len(index) else None
+        if version_dir:
+            print(f"✅ Embedding snapshot written to {version_dir}")
+
+    if changed:
+        write_ingest_stamp(stats, model_name=embed_fn.fingerprint)
+
+    if answer_table:
+        with metrics.span("ingest_answer_table"):
+            table = build_table(faqs_path=path or FAQS_PATH)
+        print(
+            f"✅ Answer table: {len(table['answers'])} of {table['questions']} questions "
+            f"precomputed in {ANSWER_TABLE_PATH}"
+        )
+    return stats
+
+
+def watch(path=None, interval=WATCH_INTERVAL_SECONDS, **kwargs):
+    """Re-run ingest_faqs() (snapshot and answer table included) whenever the FAQ file's contents change."""
+    path = path or FAQS_PATH
+    print(f"👀 Watching {path} every {interval:g}s (Ctrl-C to stop)")
+    last = None
+    try:
+        while True:
+            digest = file_hash(path)
+            if digest is not None and digest != last:
+                ingest_faqs(path, **kwargs)
+                last = digest
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("✅ Stopped watching.")
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="Embed faqs.json into ChromaDB.")
+    parser.add_argument("--faqs", default=str(FAQS_PATH), help="FAQ file (.json array or .jsonl)")
+    parser.add_argument("--encode-batch-size", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--upsert-batch-size", type=int, default=UPSERT_BATCH_SIZE)
+    parser.add_argument("--no-snapshot", action="store_true", help="skip the embedding snapshot export")
+    parser.add_argument("--no-answer-table", action="store_true", help="skip rebuilding the answer table")
+    parser.add_argument("--watch", action="store_true", help="keep running and re-ingest when the FAQ file changes")
+    parser.add_argument("--watch-interval", type=float, default=WATCH_INTERVAL_SECONDS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Run this once (or when faqs.json changes, or keep it running with --watch) to load data into ChromaDB
+    args = _parse_args()
+    options = dict(
+        encode_batch_size=args.encode_batch_size,
+        upsert_batch_size=args.upsert_batch_size,
+        snapshot=not args.no_snapshot,
+        answer_table=not args.no_answer_table,
+    )
+    if args.watch:
+        watch(args.faqs, args.watch_interval, **options)
+    else:
+        ingest_faqs(path=args.faqs, **options)
+    for (stage,), timing in sorted(metrics.STAGE_SECONDS.summary().items()):
+        print(f"   {stage}: {timing['sum_s']:.2f}s over {timing['count']} call(s)")
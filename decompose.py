@@ -0,0 +1,81 @@
+import os
+import re
+
+import intents
+from cache import normalize_query
+
+# ---------------------- Config ----------------------
+# Sub-questions searched per message; anything beyond is folded into the last part
+MAX_PARTS = int(os.environ.get("FAQ_MAX_QUERY_PARTS", "4"))
+
+# Sentence boundaries: after a question mark, and at semicolons, newlines and full stops
+# before a space (so "B.Tech" stays whole)
+SENTENCE_RE = re.compile(r"(?<=\?)\s*|[;\n]+|\.\s+")
+
+# Words that open a new question; a conjunction or comma only splits a sentence when
+# one of these follows it, so "fees and scholarships" stays one question
+WH_STARTERS = ["what", "what's", "whats", "where", "where's", "when", "which", "who", "whom", "whose", "why", "how"]
+QUESTION_STARTERS = WH_STARTERS + [
+    "is", "are", "was", "were", "do", "does", "did", "can", "could", "will", "would", "should",
+    "tell me", "show me", "give me", "list", "i want to know", "please tell",
+]
+CONJUNCTIONS = [",", "&", r"\band also\b", r"\band\b", r"\bplus\b", r"\baur\b"]
+# A bare "also" only splits before a wh-word: "Can I also do a minor degree?" is one question
+WH_CONJUNCTIONS = [r"\balso\b"]
+
+
+def _split_pattern(conjunctions, starters):
+    starters = sorted(starters, key=len, reverse=True)
+    return r"\s*(?:" + "|".join(conjunctions) + r")\s*(?=(?:" + "|".join(map(re.escape, starters)) + r")\b)"
+
+
+SPLIT_RE = re.compile(
+    _split_pattern(CONJUNCTIONS, QUESTION_STARTERS) + "|" + _split_pattern(WH_CONJUNCTIONS, WH_STARTERS),
+    re.IGNORECASE,
+)
+STARTER_RE = re.compile(
+    r"(?:" + "|".join(map(re.escape, sorted(QUESTION_STARTERS, key=len, reverse=True))) + r")\b", re.IGNORECASE
+)
+
+
+def is_question(text: str) -> bool:
+    """Ends in "?" or opens with a question word (after any leading "hi"/"thanks")."""
+    lead = intents.TRIGGER_RE.match(text)
+    if lead is not None and lead.lastgroup in intents.SMALL_TALK:
+        text = text[lead.end():].lstrip(" ,!")
+    return text.endswith("?") or STARTER_RE.match(text) is not None
+
+
+def split_query(text: str, max_parts: int = MAX_PARTS) -> list:
+    """
+    Split a compound message into its sub-questions, in order.
+
+    "where is the library and what is the hostel fee" -> ["where is the library",
+    "what is the hostel fee"]. Parts that are only a greeting or thanks are
+    dropped, a statement is kept with the question after it ("I live near Palasia
+    Road. Which buses can I take?" stays whole), repeats are removed, and a message
+    with a single question comes back as [text] unchanged.
+    """
+    text = (text or "").strip()
+    parts, seen, context = [], set(), ""
+    for sentence in SENTENCE_RE.split(text):
+        for part in SPLIT_RE.split(sentence):
+            part = part.strip(" ,.&")
+            if not part or intents.route(part) in intents.SMALL_TALK:
+                continue
+            if not is_question(part):
+                context = f"{context}{part}. "
+                continue
+            part, context = context + part, ""
+            key = normalize_query(part)
+            if key not in seen:
+                seen.add(key)
+                parts.append(part)
+    if context and parts:
+        parts[-1] = f"{parts[-1]} {context.strip()}"
+
+    if len(parts) < 2:
+        return [text]
+    if len(parts) > max_parts:
+        parts = parts[:max_parts - 1] + [" ".join(parts[max_parts - 1:])]
+    return parts
@@ -0,0 +1,137 @@
+import os
+import re
+
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+# ---------------------- Config ----------------------
+# torch: fp32 PyTorch (the original setup)
+# onnx:  ONNX Runtime (needs `pip install "sentence-transformers[onnx]"`)
+# int8:  PyTorch with Linear layers dynamically quantized to int8
+BACKENDS = ("torch", "onnx", "int8")
+DEFAULT_MODEL = "all-mpnet-base-v2"
+MODEL_ALIASES = {"base": DEFAULT_MODEL, "small": "all-MiniLM-L6-v2"}
+
+
+def resolve_model(name):
+    """Model name for an alias ("base", "small") or a model name/path."""
+    return MODEL_ALIASES.get(name, name)
+
+
+EMBED_BACKEND = os.environ.get("FAQ_EMBED_BACKEND", "torch")
+EMBED_MODEL_NAME = resolve_model(os.environ.get("FAQ_EMBED_MODEL", DEFAULT_MODEL))
+
+_models = {}  # (model name, backend) -> loaded SentenceTransformer
+_loads_in_process = 0  # models this process loaded itself; a forked child starts at 0
+
+
+def _reset_load_count():
+    global _loads_in_process
+    _loads_in_process = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_load_count)
+
+
+def model_loads() -> int:
+    """Models loaded by this process itself (not inherited from a pre-fork parent)."""
+    return _loads_in_process
+
+
+def _load_model(model_name, backend):
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        try:
+            return SentenceTransformer(model_name, device="cpu", backend="onnx")
+        except ImportError as e:
+            raise ValueError(
+                'The onnx embedding backend needs `pip install "sentence-transformers[onnx]"`'
+            ) from e
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "int8":
+        import torch
+
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+class FaqEmbeddingFunction(SentenceTransformerEmbeddingFunction):
+    """
+    Chroma embedding function for the configured model and backend.
+
+    It reports itself to Chroma as a sentence_transformer function, so existing
+    collections open unchanged. `fingerprint` names model + backend; it goes into
+    every FAQ's content hash and the snapshot header, so switching backend
+    re-embeds the corpus instead of mixing vectors from two encoders.
+    """
+
+    def __init__(self, model_name=None, backend=None):
+        model_name = model_name or EMBED_MODEL_NAME
+        backend = backend or EMBED_BACKEND
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+        self.model_name = resolve_model(model_name)
+        self.backend = backend
+        self.device = "cpu"
+        self.normalize_embeddings = False
+        self.kwargs = {"backend": "onnx"} if backend == "onnx" else {}
+        key = (self.model_name, backend)
+        if key not in _models:
+            global _loads_in_process
+            _models[key] = _load_model(self.model_name, backend)
+            _loads_in_process += 1
+        self._model = _models[key]
+
+    @staticmethod
+    def build_from_config(config):
+        """
+        Rebuild from a collection's stored config, reusing the model already loaded.
+
+        Chroma calls this on every get_or_create_collection (is_legacy()); the
+        inherited version would load a second, fp32 SentenceTransformer.
+        """
+        model_name = resolve_model(config.get("model_name") or EMBED_MODEL_NAME)
+        onnx = (config.get("kwargs") or {}).get("backend") == "onnx"
+        for name, backend in _models:
+            if name == model_name and (backend == "onnx") == onnx:
+                return FaqEmbeddingFunction(name, backend)
+        if onnx:
+            return FaqEmbeddingFunction(model_name, "onnx")
+        return FaqEmbeddingFunction(model_name, EMBED_BACKEND if EMBED_BACKEND != "onnx" else "torch")
+
+    @property
+    def fingerprint(self) -> str:
+        if self.backend == "torch":
+            return self.model_name  # unchanged from before backends existed, so no re-embed
+        return f"{self.model_name}+{self.backend}"
+
+
+def get_embedding_function(model_name=None, backend=None):
+    """Embedding function shared by db.py, app.py and search.py (FAQ_EMBED_MODEL / FAQ_EMBED_BACKEND)."""
+    return FaqEmbeddingFunction(model_name, backend)
+
+
+def set_num_threads(n):
+    """
+    Intra-op threads torch uses to encode in this process (torch and int8 backends).
+
+    ONNX Runtime fixes its thread pool when the session is created, so this does
+    not apply to an already loaded onnx model.
+    """
+    import torch
+
+    torch.set_num_threads(max(1, int(n)))
+
+
+def collection_name(base, model_name=None):
+    """
+    Collection for a model: the plain `base` name for the default model, a suffixed
+    one otherwise, since models with a different dimension cannot share a collection.
+    """
+    model_name = resolve_model(model_name or EMBED_MODEL_NAME)
+    if model_name == DEFAULT_MODEL:
+        return base
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", model_name.split("/")[-1]).strip("_")
+    return f"{base}_{slug}"
@@ -0,0 +1,266 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+import metrics
+from cache import StampWatcher
+from db import INGEST_STAMP_PATH, SNAPSHOT_DIR, get_client, get_collection
+from embeddings import get_embedding_function, model_loads
+from lexical import BM25Index
+from partitions import CategoryPartitions
+from snapshot import load_lexical_index, load_partitions, load_snapshot
+from vector_index import NumpyIndex, collection_space
+
+# ---------------------- Config ----------------------
+# "numpy" serves lookups from an in-process exact index instead of Chroma's HNSW;
+# "snapshot" does the same from the memory-mapped snapshot db.py exports
+VECTOR_INDEX = os.environ.get("FAQ_VECTOR_INDEX", "chroma")
+# Hybrid retrieval: keep a BM25 index next to the vector index
+HYBRID_ENABLED = os.environ.get("FAQ_HYBRID", "1") == "1"
+WARMUP_QUERY = "Where is the library?"
+
+logger = metrics.get_logger("engine")
+
+# The in-process indexes, built together and published in one assignment: BM25 and partition
+# rows are rows of `vectors`, so a request must take all three from the same IndexSet
+IndexSet = namedtuple("IndexSet", ["vectors", "lexical", "partitions"])
+NO_INDEXES = IndexSet(None, None, None)
+
+
+class RetrievalEngine:
+    """
+    The one embedding model, Chroma client/collection and in-process indexes of a process.
+
+    Nothing is loaded at construction. load() (called by ensure_loaded() on the
+    first query, or by start_warmup() in the background) builds everything once;
+    concurrent callers wait for the same load. `timings` records how long loading,
+    warm-up and the first query took.
+
+    preload() is the part of load() that survives fork(): pre-fork servers run it
+    in the parent so workers share the model and snapshot pages, and each worker
+    opens its own Chroma client in load().
+
+    `indexes` is swapped as a whole when a re-ingest rebuilds it; readers take
+    one reference per request (numpy_index/lexical_index/partitions are views
+    of the current one, for status and logging).
+    """
+
+    def __init__(self, vector_index=VECTOR_INDEX, hybrid=HYBRID_ENABLED):
+        self.vector_index = vector_index
+        self.hybrid = hybrid
+        self.embed_fn = None
+        self.client = None
+        self.collection = None
+        self.space = None
+        self.indexes = NO_INDEXES
+        self.documents = None  # collection size, counted when (re)loaded so status() never calls Chroma
+        self.ingest_watcher = None
+        self.error = None
+        self.timings = {"created_at": time.time(), "load_s": None, "warmup_s": None, "first_query_s": None}
+        self._loaded = threading.Event()
+        self._warmed = threading.Event()
+        self._warmup_thread = None
+        self._warmup_lock = threading.Lock()  # not _lock, which load() holds for seconds
+        self._lock = threading.RLock()
+
+    # ---------------------- Loading ----------------------
+    @property
+    def numpy_index(self):
+        return self.indexes.vectors
+
+    @property
+    def lexical_index(self):
+        return self.indexes.lexical
+
+    @property
+    def partitions(self):
+        return self.indexes.partitions
+
+    @property
+    def loaded(self):
+        return self._loaded.is_set()
+
+    @property
+    def ready(self):
+        """Loaded and the model has encoded at least once (warm-up or a real query)."""
+        return self._loaded.is_set() and self._warmed.is_set()
+
+    def preload(self, model=True):
+        """
+        Load what is safe to share across fork(): the model and, for the snapshot
+        index, the memory-mapped embeddings, their BM25 index and category partitions.
+
+        Never touches Chroma, whose client does not survive fork().
+        """
+        with self._lock:
+            if self.ingest_watcher is None:
+                # Signature taken before the indexes are built, so a re-ingest during the build is noticed
+                self.ingest_watcher = StampWatcher(INGEST_STAMP_PATH)
+            if model and self.embed_fn is None:
+                self.embed_fn = get_embedding_function()
+            if self.vector_index == "snapshot" and self.numpy_index is None and self.embed_fn is not None:
+                vectors = self._load_snapshot()
+                if vectors is not None:
+                    self.indexes = IndexSet(vectors, self._load_lexical_index(vectors), self._load_partitions(vectors))
+        return self
+
+    def load(self):
+        with self._lock:
+            if self._loaded.is_set():
+                return self
+            start = time.perf_counter()
+            try:
+                self.preload()
+                self.client = get_client()
+                self.collection = get_collection(self.client, self.embed_fn)
+                self.space = collection_space(self.collection)
+                if self.numpy_index is None:
+                    self._build_indexes()
+                self.documents = self.collection.count()
+            except Exception as e:
+                self.error = repr(e)
+                raise
+            self.error = None
+            self.timings["load_s"] = round(time.perf_counter() - start, 3)
+            self._loaded.set()
+            logger.info("Retrieval engine loaded in %.2fs", self.timings["load_s"])
+            return self
+
+    def ensure_loaded(self):
+        return self if self._loaded.is_set() else self.load()
+
+    def warm_up(self):
+        """Load everything and run one dummy encode so the first real query is not the slow one."""
+        self.ensure_loaded()
+        start = time.perf_counter()
+        self.embed_fn([WARMUP_QUERY])
+        self.timings["warmup_s"] = round(time.perf_counter() - start, 3)
+        self._warmed.set()
+        return self
+
+    def start_warmup(self):
+        """warm_up() in a background thread (once); returns immediately."""
+        with self._warmup_lock:
+            if self._warmup_thread is None:
+                self._warmup_thread = threading.Thread(target=self._warmup_in_background, name="engine-warmup",
+                                                       daemon=True)
+                self._warmup_thread.start()
+        return self._warmup_thread
+
+    def _warmup_in_background(self):
+        try:
+            self.warm_up()
+        except Exception as e:
+            self.error = repr(e)
+            logger.exception("Engine warm-up failed: %s", e)
+            with self._warmup_lock:
+                self._warmup_thread = None  # let a later probe retry
+
+    def record_query(self, seconds):
+        """Note a served query; the first one's latency is kept in `timings`."""
+        self._warmed.set()
+        if self.timings["first_query_s"] is None:
+            self.timings["first_query_s"] = round(seconds, 4)
+            logger.info("First query served in %.3fs", seconds)
+
+    # ---------------------- Indexes ----------------------
+    def _load_snapshot(self):
+        try:
+            return load_snapshot(SNAPSHOT_DIR, self.embed_fn.fingerprint)
+        except ValueError as e:
+            logger.warning("Ignoring embedding snapshot: %s", e)
+            return None
+
+    def _load_vector_index(self):
+        """The in-process index selected by `vector_index` (None means query Chroma)."""
+        if self.vector_index == "snapshot":
+            index = self._load_snapshot()
+            if index is not None:
+                return index
+            logger.warning("No usable embedding snapshot; loading embeddings from ChromaDB instead.")
+            return NumpyIndex.from_collection(self.collection)
+        if self.vector_index == "numpy":
+            return NumpyIndex.from_collection(self.collection)
+        return None
+
+    def _load_lexical_index(self, vectors):
+        """BM25 over the same FAQs as the vector index (None if hybrid is off)."""
+        if not self.hybrid:
+            return None
+        if getattr(vectors, "snapshot_dir", None) is not None:
+            return load_lexical_index(vectors)  # stored postings; no row is decoded
+        if vectors is not None:
+            return BM25Index.from_records(vectors.ids, vectors.documents, vectors.metadatas)
+        return BM25Index.from_collection(self.collection)
+
+    def _load_partitions(self, vectors):
+        """Category partitions of the vector index (centroids only when querying Chroma)."""
+        if getattr(vectors, "snapshot_dir", None) is not None:
+            return load_partitions(vectors)  # stored row ranges and centroids
+        if vectors is not None:
+            return CategoryPartitions.from_index(vectors)
+        return CategoryPartitions.from_collection(self.collection)
+
+    def _build_indexes(self):
+        vectors = self._load_vector_index()
+        lexical = self._load_lexical_index(vectors)
+        partitions = self._load_partitions(vectors)
+        self.indexes = IndexSet(vectors, lexical, partitions)
+
+    def refresh_if_reingested(self, force=False):
+        """
+        Rebuild the in-process indexes when db.py re-ingested; True if it did (callers drop caches).
+
+        `force` rebuilds without waiting for the stamp check, for a re-ingest in this process.
+        """
+        if not self._loaded.is_set() or not (self.ingest_watcher.changed() or force):
+            return False
+        with self._lock:
+            self._build_indexes()
+            self.documents = self.collection.count()
+        return True
+
+    def status(self):
+        """Readiness payload; never blocks (the ASGI app calls it on the event loop)."""
+        return {
+            "ready": self.ready,
+            "loaded": self.loaded,
+            "warming_up": self._warmup_thread is not None and not self.ready,
+            "error": self.error,
+            "vector_index": self.vector_index,
+            "hybrid": self.hybrid,
+            "categories": self.partitions.categories if self.partitions is not None else None,
+            "model": getattr(self.embed_fn, "fingerprint", None),
+            # 0 in a pre-fork worker that shares the parent's model
+            "model_loads": model_loads(),
+            "documents": self.documents,
+            "timings": dict(self.timings),
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Process-wide engine shared by app.py, app_async.py and search.py (loaded lazily)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = RetrievalEngine()
+    return _engine
+
+
+def _timing(key):
+    engine = _engine
+    value = engine.timings.get(key) if engine is not None else None
+    return [({}, value)] if value is not None else []
+
+
+metrics.callback("faq_engine_load_seconds", "Time to load the model, collection and indexes.", "gauge",
+                 lambda: _timing("load_s"))
+metrics.callback("faq_engine_warmup_seconds", "Time of the warm-up encode.", "gauge", lambda: _timing("warmup_s"))
+metrics.callback("faq_first_query_seconds", "Latency of the first query served.", "gauge",
+                 lambda: _timing("first_query_s"))
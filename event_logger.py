@@ -0,0 +1,201 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+import metrics
+from http_client import get_client
+
+logger = metrics.get_logger("events")
+
+# ---------------------- Config ----------------------
+BASE_DIR = Path(__file__).parent
+SPOOL_PATH = Path(os.environ.get("FAQ_EVENT_SPOOL", BASE_DIR / "logs" / "chat_events.spool.jsonl"))
+MAX_QUEUE = int(os.environ.get("FAQ_EVENT_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.environ.get("FAQ_EVENT_BATCH_SIZE", "50"))
+FLUSH_INTERVAL = float(os.environ.get("FAQ_EVENT_FLUSH_INTERVAL", "2"))
+REPLAY_INTERVAL = float(os.environ.get("FAQ_EVENT_REPLAY_INTERVAL", "30"))
+
+
+class EventLogger:
+    """
+    Fire-and-forget chat-event pipeline.
+
+    log() only enqueues (dropping and counting events when the bounded queue is
+    full). A background thread flushes batches when BATCH_SIZE events are queued
+    or FLUSH_INTERVAL seconds pass. With `batch_url` a batch is one POST of a JSON
+    array; otherwise events are POSTed one by one to `sink_url` over the pooled
+    connection. Batches the sink does not accept are appended to a local JSONL
+    spool and replayed once the sink is reachable again; spool lines that cannot
+    be parsed (a write cut short by a crash) are skipped and counted as "corrupt".
+    Any other error in the worker is logged and counted, and the batch it was
+    handling is counted as dropped, so the thread keeps running.
+    """
+
+    def __init__(
+        self,
+        sink_url,
+        batch_url=None,
+        spool_path=SPOOL_PATH,
+        max_queue=MAX_QUEUE,
+        batch_size=BATCH_SIZE,
+        flush_interval=FLUSH_INTERVAL,
+        replay_interval=REPLAY_INTERVAL,
+    ):
+        self.sink_url = sink_url
+        self.batch_url = batch_url
+        self.spool_path = Path(spool_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._next_replay = 0.0
+        self._counter_lock = threading.Lock()
+        self.counters = {
+            "enqueued": 0, "sent": 0, "spilled": 0, "replayed": 0, "dropped": 0, "corrupt": 0, "errors": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="chat-event-logger", daemon=True)
+        self._thread.start()
+
+    # ---------------------- Producer side ----------------------
+    def log(self, event) -> bool:
+        """Queue an event without blocking; returns False (and counts a drop) if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("enqueued")
+        return True
+
+    def close(self, timeout=5.0):
+        """Flush what is queued (spilling it if the sink is down) and stop the worker."""
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        spool_bytes = self.spool_path.stat().st_size if self.spool_path.exists() else 0
+        with self._counter_lock:
+            counters = dict(self.counters)
+        return {**counters, "queued": self._queue.qsize(), "spool_bytes": spool_bytes}
+
+    def _count(self, key, n=1):
+        """Add `n` to a counter; the producer and worker threads both write them."""
+        with self._counter_lock:
+            self.counters[key] += n
+
+    # ---------------------- Worker side ----------------------
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stop.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = []
+            try:
+                batch = self._collect()
+                if batch:
+                    self._flush(batch)
+                elif time.monotonic() >= self._next_replay:
+                    self._replay_spool()
+            except Exception as e:
+                self._count("errors")
+                self._count("dropped", len(batch))
+                self._next_replay = time.monotonic() + self.replay_interval
+                logger.exception("Chat event worker error (%d event(s) dropped): %s", len(batch), e)
+
+    def _flush(self, batch):
+        unsent = self._send(batch)
+        self._count("sent", len(batch) - len(unsent))
+        if unsent:
+            self._spill(unsent)
+        elif time.monotonic() >= self._next_replay:
+            self._replay_spool()
+
+    def _send(self, events):
+        """Deliver events; return the ones the sink did not accept."""
+        client = get_client()
+        i = 0
+        try:
+            if self.batch_url:
+                res = client.post("log", self.batch_url, json=events)
+                return [] if res.ok else events
+            for i, event in enumerate(events):
+                if not client.post("log", self.sink_url, json=event).ok:
+                    return events[i:]
+            return []
+        except requests.RequestException:
+            if self.batch_url:
+                return events
+            return events[i:]
+
+    def _spill(self, events):
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._count("spilled", len(events))
+        self._next_replay = time.monotonic() + self.replay_interval
+
+    def _replay_spool(self):
+        """Resend spooled events in batches; whatever is still undeliverable goes back to the spool."""
+        self._next_replay = time.monotonic() + self.replay_interval
+        replaying = self.spool_path.with_suffix(".replaying")
+        if not replaying.exists():
+            # (a leftover .replaying file means an earlier replay was interrupted)
+            if not self.spool_path.exists() or self.spool_path.stat().st_size == 0:
+                return
+            os.replace(self.spool_path, replaying)
+        events, corrupt = [], 0
+        with open(replaying, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    corrupt += 1
+        if corrupt:
+            self._count("corrupt", corrupt)
+            logger.warning("Skipped %d corrupt line(s) in the event spool %s", corrupt, self.spool_path)
+
+        for start in range(0, len(events), self.batch_size):
+            unsent = self._send(events[start:start + self.batch_size])
+            delivered = min(self.batch_size, len(events) - start) - len(unsent)
+            self._count("replayed", delivered)
+            if unsent:
+                remaining = unsent + events[start + self.batch_size:]
+                self._spill(remaining)
+                self._count("spilled", -len(remaining))  # already counted when first spilled
+                break
+        replaying.unlink()
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_event_logger(sink_url, batch_url=None):
+    """Process-wide logger shared by every Streamlit session (started on first use)."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = EventLogger(sink_url, batch_url=batch_url)
+                atexit.register(_logger.close)
+    return _logger
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ---------------------- Config ----------------------
+POOL_SIZE = int(os.environ.get("FAQ_HTTP_POOL_SIZE", "20"))
+
+# Per-endpoint (connect, read) timeouts, retry budget, backoff between retries, total
+# deadline across all attempts, and whether a read timeout (the server hung) is retried;
+# interactive calls are never retried after a read timeout, so a hung backend stalls a
+# rerun once instead of once per attempt
+ENDPOINTS = {
+    "search": {"timeout": (2, 10), "retries": 2, "backoff": 0.2, "deadline": 15, "retry_read_timeouts": False},
+    "llm": {"timeout": (2, 30), "retries": 0, "backoff": 0.0, "deadline": 32, "retry_read_timeouts": False},
+    "log": {"timeout": (1, 3), "retries": 1, "backoff": 0.2, "deadline": 8, "retry_read_timeouts": True},
+}
+
+# Consecutive failures that open an endpoint's circuit, and how long it stays open
+BREAKER_FAILURES = int(os.environ.get("FAQ_HTTP_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.environ.get("FAQ_HTTP_BREAKER_RESET", "30"))
+
+# Responses worth retrying (and counted against the breaker)
+RETRY_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without touching the network while an endpoint's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+
+    While open every call fails fast; after `reset_timeout` seconds one trial
+    call is let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class HttpClient:
+    """Pooled keep-alive HTTP client with per-endpoint timeouts, retries and circuit breakers."""
+
+    def __init__(self, pool_size=POOL_SIZE, endpoints=None):
+        self.endpoints = endpoints or ENDPOINTS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breakers = {name: CircuitBreaker() for name in self.endpoints}
+
+    def post(self, endpoint, url, **kwargs):
+        """
+        POST through the named endpoint's policy and return the final response.
+
+        Raises CircuitOpenError (a requests.RequestException) while the circuit
+        is open, or the last connection error once the retry budget or the
+        endpoint's deadline is spent. No attempt outlasts the deadline.
+        """
+        config = self.endpoints[endpoint]
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            raise CircuitOpenError(f"{endpoint} service unavailable (circuit open, retrying later)")
+
+        timeout = kwargs.pop("timeout", config["timeout"])
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        deadline = time.monotonic() + config.get("deadline", connect_timeout + read_timeout)
+        error, response = None, None
+        for attempt in range(config["retries"] + 1):
+            if attempt:
+                time.sleep(config["backoff"] * 2 ** (attempt - 1))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                response = self.session.post(
+                    url, timeout=(min(connect_timeout, remaining), min(read_timeout, remaining)), **kwargs
+                )
+            except requests.ReadTimeout as e:
+                error, response = e, None
+                if not config.get("retry_read_timeouts", True):
+                    break
+                continue
+            except requests.RequestException as e:
+                error, response = e, None
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+
+        breaker.record_failure()
+        if response is not None:
+            return response
+        raise error
+
+    def status(self):
+        return {name: breaker.state for name, breaker in self.breakers.items()}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client, so connections are reused across reruns and sessions."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient()
+    return _client
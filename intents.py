@@ -0,0 +1,102 @@
+import re
+
+# ---------------------- Config ----------------------
+# Trigger phrases per intent (regex fragments, matched case-insensitively on word
+# boundaries, so "hi" no longer fires inside "which" or "this")
+TRIGGERS = {
+    "thanks": ["thank(?:s|u|you)?", "thank you", "thx", "dhanyavaad", "dhanyawad", "shukriya"],
+    "greeting": [
+        "hello",
+        "hi",
+        "hey",
+        "namaste",
+        "namaskar",
+        "kaise ho",
+        "kese ho",
+        "kaisi ho",
+        "kya haal hai",
+        "kya hal hai",
+        "how are you",
+        "how r u",
+    ],
+    "attendance": ["attendance"],
+    "result": ["results?", "cgpa", r"c\.g\.p\.a"],
+    "apology": ["sorry", "confused", "doubt"],
+    "question": ["how", "what", "why", "when", "where"],
+    "positive": ["great", "awesome", "nice", "good"],
+}
+
+# Intents that decide how a message is answered, in priority order; anything else is "faq"
+ROUTES = ("thanks", "greeting", "attendance", "result")
+SMALL_TALK = frozenset({"thanks", "greeting"})
+PERSONAL = frozenset({"attendance", "result"})
+
+# Words that add nothing to a greeting or thanks ("thank you so much sir"); any other word
+# left once the small-talk triggers are removed makes the message a real question
+FILLER_WORDS = frozenset({
+    "a", "again", "all", "and", "afternoon", "am", "bhai", "bot", "buddy", "chatbot", "dear", "doing",
+    "evening", "everyone", "fine", "for", "friend", "good", "guys", "help", "i", "it", "ji", "lot", "ma'am",
+    "maam", "madam", "mam", "me", "morning", "much", "night", "ok", "okay", "so", "sir", "team", "that",
+    "the", "there", "to", "today", "u", "very", "yaar", "you", "your",
+})
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+REPLIES = {
+    "thanks": "Aapka bahut bahut dhanyavaad! 😊 Agar aapko aur koi sawaal ho to please poochhiye.",
+    "greeting": (
+        "Main bilkul theek hoon, dhanyavaad! 😊 Aap kaise ho {name}? "
+        "Batao, main aapki kaise sahayta kar sakti hu?"
+    ),
+}
+
+
+def _compile(triggers):
+    """One alternation with a named group per intent; longer phrases first so they win."""
+    groups = []
+    for intent, phrases in triggers.items():
+        phrases = sorted(phrases, key=len, reverse=True)
+        groups.append(f"(?P<{intent}>{'|'.join(phrases)})")
+    return re.compile(r"\b(?:" + "|".join(groups) + r")\b", re.IGNORECASE)
+
+
+TRIGGER_RE = _compile(TRIGGERS)
+
+
+def detect(text: str) -> frozenset:
+    """Every intent whose triggers occur in `text`, found in a single regex pass."""
+    text = text or ""
+    tags = {match.lastgroup for match in TRIGGER_RE.finditer(text)}
+    if "?" in text:
+        tags.add("question")
+    return frozenset(tags)
+
+
+def is_only_small_talk(text: str) -> bool:
+    """True when nothing but greetings, thanks and filler words is left of `text`."""
+    rest = TRIGGER_RE.sub(lambda m: " " if m.lastgroup in SMALL_TALK else m.group(0), text or "")
+    return all(word in FILLER_WORDS for word in WORD_RE.findall(rest.lower()))
+
+
+def route(text: str, tags=None) -> str:
+    """
+    The intent that decides how to answer: one of ROUTES, or "faq".
+
+    Greetings and thanks only win when the message holds nothing else, so
+    "Hi, where is the reception?" is answered as a question.
+    """
+    tags = detect(text) if tags is None else tags
+    small_talk = None
+    for intent in ROUTES:
+        if intent not in tags:
+            continue
+        if intent not in SMALL_TALK:
+            return intent
+        if small_talk is None:
+            small_talk = is_only_small_talk(text)
+        if small_talk:
+            return intent
+    return "faq"
+
+
+def small_talk_reply(intent: str, name: str = "student") -> str:
+    return REPLIES[intent].format(name=name)
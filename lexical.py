@@ -0,0 +1,153 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words too common in student questions to say anything about which FAQ is meant
+STOPWORDS = frozenset(
+    """
+    a about an and any are as at be by can could do does for from get how i in is it
+    me my of on or please tell the there this to was what when where which who why
+    will with you your
+    """.split()
+)
+
+# Relative weight of each FAQ field in the index
+FIELD_WEIGHTS = {"question": 2.0, "answer": 1.0, "category": 1.0}
+
+
+def tokenize(text):
+    """Lowercase word/number tokens with stopwords removed."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    BM25 inverted index over FAQ questions, answers and categories.
+
+    Per-posting BM25 weights are precomputed at build time, so scoring a query
+    is a few vectorized adds over the postings of its terms. With
+    `category_ranges` ({category: (first row, end row)}, as snapshots store),
+    category filters never read the metadata.
+    """
+
+    def __init__(self, ids, metadatas, postings, k1=1.5, b=0.75, category_ranges=None):
+        self.ids = ids
+        self.metadatas = metadatas
+        self.postings = postings  # term -> (doc rows int32[], weights float32[])
+        self.k1 = k1
+        self.b = b
+        self.category_ranges = category_ranges
+        self._category_masks = {}  # frozenset of categories -> bool[rows]
+
+    @classmethod
+    def from_records(cls, ids, documents, metadatas, k1=1.5, b=0.75):
+        """Build from parallel sequences of FAQ ids, questions and metadata dicts."""
+        ids, documents, metadatas = list(ids), list(documents), list(metadatas)
+        doc_tfs, lengths = [], []
+        for question, meta in zip(documents, metadatas):
+            meta = meta or {}
+            fields = {
+                "question": question,
+                "answer": meta.get("answer"),
+                "category": meta.get("category"),
+            }
+            tf = Counter()
+            for field, text in fields.items():
+                for token in tokenize(text):
+                    tf[token] += FIELD_WEIGHTS[field]
+            doc_tfs.append(tf)
+            lengths.append(sum(tf.values()))
+
+        n_docs = len(doc_tfs)
+        avg_len = (sum(lengths) / n_docs) if n_docs else 0.0
+        rows, tfs = defaultdict(list), defaultdict(list)
+        for row, tf in enumerate(doc_tfs):
+            for token, freq in tf.items():
+                rows[token].append(row)
+                tfs[token].append(freq)
+
+        postings = {}
+        for token, token_rows in rows.items():
+            df = len(token_rows)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            freq = np.asarray(tfs[token], dtype=np.float32)
+            norm = np.asarray([lengths[r] for r in token_rows], dtype=np.float32) / (avg_len or 1.0)
+            weights = idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * norm))
+            postings[token] = (np.asarray(token_rows, dtype=np.int32), weights.astype(np.float32))
+        return cls(ids, metadatas, postings, k1=k1, b=b)
+
+    @classmethod
+    def from_collection(cls, collection, page_size=1000):
+        """Build from every document and metadata stored in a Chroma collection."""
+        ids, documents, metadatas = [], [], []
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            ids.extend(page_ids)
+            documents.extend(page.get("documents") or [None] * len(page_ids))
+            metadatas.extend(page.get("metadatas") or [None] * len(page_ids))
+            offset += len(page_ids)
+        return cls.from_records(ids, documents, metadatas)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def category_mask(self, categories):
+        """Boolean mask of the rows whose metadata category is one of `categories` (cached)."""
+        key = frozenset(categories)
+        mask = self._category_masks.get(key)
+        if mask is None and self.category_ranges is not None:
+            mask = np.zeros(len(self.ids), dtype=bool)
+            for category in key:
+                start, end = self.category_ranges.get(category, (0, 0))
+                mask[start:end] = True
+            self._category_masks[key] = mask
+        elif mask is None:
+            mask = np.fromiter(
+                ((meta or {}).get("category") in key for meta in self.metadatas), dtype=bool, count=len(self.ids)
+            )
+            self._category_masks[key] = mask
+        return mask
+
+    def search(self, query, k=10, categories=None):
+        """
+        Return up to k (row, score) pairs, best first; rows index self.ids/self.metadatas.
+
+        With `categories`, only FAQs in those categories are returned.
+        """
+        terms = [t for t in set(tokenize(query)) if t in self.postings]
+        if not terms:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in terms:
+            rows, weights = self.postings[term]
+            scores[rows] += weights
+        if categories:
+            scores[~self.category_mask(categories)] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [(int(row), float(scores[row])) for row in ranked]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse ranked lists of ids with reciprocal rank fusion: score(id) = sum 1 / (k + rank).
+
+    Returns [(id, fused_score), ...] best first.
+    """
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
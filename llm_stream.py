@@ -0,0 +1,81 @@
+import json
+import time
+
+# Streaming formats the LLM hook understands, in order of preference
+STREAM_ACCEPT = "text/event-stream, application/x-ndjson;q=0.9, application/json;q=0.5"
+
+
+def _token(data: str) -> str:
+    """Text of one streamed event: {"token": "..."} JSON, or the raw text."""
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(event, dict):
+        return str(event.get("token", ""))
+    return str(event)
+
+
+def iter_tokens(response):
+    """
+    Yield text chunks from a streaming LLM response.
+
+    Understands server-sent events (`data: {"token": ...}` lines ending with
+    `data: [DONE]`) and NDJSON (`{"token": ...}` lines ending with `{"done": true}`).
+    A plain JSON `{"answer": ...}` body is yielded as a single chunk, so
+    non-streaming backends keep working.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    if "text/event-stream" in content_type or "ndjson" in content_type or "jsonl" in content_type:
+        # Both formats are UTF-8; requests would default a charset-less text/* type to ISO-8859-1
+        response.encoding = "utf-8"
+
+    if "text/event-stream" in content_type:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue  # blank separators, comments, event/id fields
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            yield _token(data)
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if isinstance(event, dict) and event.get("done"):
+                return
+            yield _token(line)
+    else:
+        yield str(response.json().get("answer", ""))
+
+
+class StreamTimer:
+    """Time-to-first-token and total time of a streamed reply, measured from creation."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        self.chunks = 0
+
+    def track(self, chunks):
+        """Pass `chunks` through, recording when the first non-empty one arrives."""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.chunks += 1
+            yield chunk
+        self.finished_at = time.perf_counter()
+
+    def stats(self) -> dict:
+        def ms(at):
+            return None if at is None else round((at - self.started) * 1000, 1)
+
+        return {
+            "ttft_ms": ms(self.first_token_at),
+            "total_ms": ms(self.finished_at),
+            "chunks": self.chunks,
+        }
@@ -0,0 +1,103 @@
+"""
+Local stand-in for the LLM post-processing endpoint, for testing the UI offline.
+
+It "refines" the FAQ answer by streaming it back word by word at a fixed rate:
+as server-sent events when the client accepts text/event-stream, as NDJSON when
+it sends "stream": true, and as one {"answer": ...} JSON object otherwise.
+
+Run:  python llm_stub.py --port 8001 --tokens-per-sec 20 --first-token-delay 0.3
+Then: FAQ_LLM_URL=http://127.0.0.1:8001/refine FAQ_LLM_POST_PROCESS=1 streamlit run chatbot_ui.py
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------- Config ----------------------
+DEFAULT_PORT = 8001
+DEFAULT_TOKENS_PER_SEC = 20.0
+DEFAULT_FIRST_TOKEN_DELAY = 0.3
+
+TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def refine(query: str, answer: str) -> str:
+    """The stub's "LLM output": the FAQ answer with a short lead-in."""
+    return f"Here is what I found about \"{query}\": {answer}" if query else answer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # chunked responses over keep-alive connections
+    tokens_per_sec = DEFAULT_TOKENS_PER_SEC
+    first_token_delay = DEFAULT_FIRST_TOKEN_DELAY
+
+    def log_message(self, format, *args):
+        pass
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = {}
+        text = refine(str(body.get("query", "")), str(body.get("answer", "")))
+
+        accept = self.headers.get("Accept", "")
+        if "text/event-stream" in accept:
+            content_type = "text/event-stream"
+        elif body.get("stream"):
+            content_type = "application/x-ndjson"
+        else:
+            time.sleep(self.first_token_delay + len(TOKEN_RE.findall(text)) / self.tokens_per_sec)
+            data = json.dumps({"answer": text}, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        sse = content_type == "text/event-stream"
+        time.sleep(self.first_token_delay)
+        for token in TOKEN_RE.findall(text):
+            event = json.dumps({"token": token}, ensure_ascii=False)  # raw UTF-8, as real LLM servers send
+            self._write_chunk(f"data: {event}\n\n".encode("utf-8") if sse else f"{event}\n".encode("utf-8"))
+            time.sleep(1.0 / self.tokens_per_sec)
+        self._write_chunk(b"data: [DONE]\n\n" if sse else b'{"done": true}\n')
+        self._write_chunk(b"")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming stub for the LLM post-processing hook.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tokens-per-sec", type=float, default=DEFAULT_TOKENS_PER_SEC)
+    parser.add_argument("--first-token-delay", type=float, default=DEFAULT_FIRST_TOKEN_DELAY,
+                        help="seconds before the first token (simulated prompt processing)")
+    args = parser.parse_args()
+
+    StubHandler.tokens_per_sec = args.tokens_per_sec
+    StubHandler.first_token_delay = args.first_token_delay
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"✅ LLM stub streaming {args.tokens_per_sec:g} tokens/s on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+from contextlib import contextmanager
+
+# ---------------------- Config ----------------------
+LOG_LEVEL = os.environ.get("FAQ_LOG_LEVEL", "INFO").upper()
+# At most LOG_RATE_LIMIT records per message template every LOG_RATE_WINDOW seconds
+LOG_RATE_LIMIT = int(os.environ.get("FAQ_LOG_RATE_LIMIT", "20"))
+LOG_RATE_WINDOW = float(os.environ.get("FAQ_LOG_RATE_WINDOW", "10"))
+PROFILER_INTERVAL_MS = float(os.environ.get("FAQ_PROFILER_INTERVAL_MS", "5"))
+PROFILER_MAX_DEPTH = 64
+
+# Seconds; tuned for a query path measured in milliseconds and ingestion in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------------------- Metrics ----------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple((name, labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [("", key, value) for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        out = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                out.append(("_bucket", key + (("le", _format_value(float(bound))),), cumulative))
+            out.append(("_bucket", key + (("le", "+Inf"),), count))
+            out.append(("_sum", key, total))
+            out.append(("_count", key, count))
+        return out
+
+    def summary(self):
+        """{label values: {"count", "sum_s"}} for quick reports outside Prometheus."""
+        with self._lock:
+            return {
+                tuple(v for _, v in key): {"count": count, "sum_s": round(total, 6)}
+                for key, (_, total, count) in self._values.items()
+            }
+
+
+class CallbackMetric(_Metric):
+    """Values read at scrape time from `collect()` -> [(labels dict, value)], e.g. cache stats."""
+
+    def __init__(self, name, help, kind, collect):
+        super().__init__(name, help)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self):
+        return [("", tuple(labels.items()), value) for labels, value in self.collect()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, labelnames=()):
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def histogram(name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+def callback(name, help, kind, collect):
+    return REGISTRY.register(CallbackMetric(name, help, kind, collect))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    return REGISTRY.render()
+
+
+STAGE_SECONDS = histogram(
+    "faq_stage_seconds", "Time spent in each stage of the query path and ingestion.", ("stage",)
+)
+STAGE_ERRORS = counter("faq_stage_errors_total", "Exceptions raised inside a stage.", ("stage",))
+
+
+@contextmanager
+def span(stage):
+    """Time the enclosed block into faq_stage_seconds{stage=...}; exceptions are counted and re-raised."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+# ---------------------- Logging ----------------------
+class RateLimitFilter(logging.Filter):
+    """
+    Pass at most `limit` records per message template per `window` seconds.
+
+    The first record let through after a suppressed stretch says how many
+    records were dropped.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._state = {}  # template -> [window start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.limit <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self._state[key] = [now, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+                return True
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+            state[2] += 1
+            return False
+
+
+_log_listener = None
+_log_lock = threading.Lock()
+
+
+def get_logger(name):
+    """
+    Logger under the "faq" hierarchy.
+
+    Records go through a rate limit into a queue; one background thread writes
+    them to stderr, so request threads never wait on the terminal.
+    """
+    global _log_listener
+    if _log_listener is None:
+        with _log_lock:
+            if _log_listener is None:
+                records = queue.SimpleQueue()
+                handler = logging.handlers.QueueHandler(records)
+                handler.addFilter(RateLimitFilter())
+                root = logging.getLogger("faq")
+                root.setLevel(LOG_LEVEL)
+                root.addHandler(handler)
+                root.propagate = False
+
+                stream = logging.StreamHandler(sys.stderr)
+                stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+                _log_listener = logging.handlers.QueueListener(records, stream)
+                _log_listener.start()
+                atexit.register(_log_listener.stop)
+    return logging.getLogger(f"faq.{name}")
+
+
+def _restart_log_listener():
+    """fork() keeps the record queue but not the thread writing it; give the child its own."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener = logging.handlers.QueueListener(_log_listener.queue, *_log_listener.handlers)
+        _log_listener.start()
+        atexit.register(_log_listener.stop)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_log_listener)
+
+
+# ---------------------- Profiler ----------------------
+class SamplingProfiler:
+    """
+    Statistical profiler that can be switched on and off in a running process.
+
+    While running, a background thread snapshots every other thread's stack
+    each `interval_ms` and counts identical stacks. report() returns them in the
+    collapsed "frame;frame;frame count" form that flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, interval_ms=PROFILER_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self.samples = 0
+        self.started_at = None
+        self._stacks = _Tally()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms=None):
+        with self._lock:
+            if self.running:
+                return False
+            if interval_ms:
+                self.interval_ms = float(interval_ms)
+            self._stop.clear()
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            self._thread.join()
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self):
+        own = threading.get_ident()
+        interval = self.interval_ms / 1000
+        while not self._stop.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def report(self, limit=50):
+        stacks = self._stacks.most_common(limit)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "started_at": self.started_at,
+            "stacks": [{"stack": stack, "count": count} for stack, count in stacks],
+        }
+
+
+profiler = SamplingProfiler()
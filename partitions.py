@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+
+from vector_index import NumpyIndex, normalize_rows
+
+# ---------------------- Config ----------------------
+# The nearest centroid must beat the runner-up by this cosine similarity to search one
+# category alone; closer calls (ambiguous queries) search the top ROUTE_TOP_N
+ROUTE_MARGIN = float(os.environ.get("FAQ_ROUTE_MARGIN", "0.05"))
+ROUTE_TOP_N = 2
+
+
+def where_filter(categories):
+    """Chroma `where` clause restricting a query to FAQs in `categories`."""
+    categories = list(categories)
+    if len(categories) == 1:
+        return {"category": categories[0]}
+    return {"category": {"$in": categories}}
+
+
+class CategoryPartitions:
+    """
+    Per-category partitions of the FAQ index plus a nearest-centroid query router.
+
+    Built from a NumpyIndex, each category gets its own sub-index over its rows
+    (a zero-copy view when they are contiguous, as in snapshots), so a filtered
+    query only scores that category. Built from a Chroma collection, only the
+    centroids are kept and filtered queries use a `where` prefilter instead.
+    FAQs without a category are only found by unfiltered searches.
+    """
+
+    def __init__(self, categories, centroids, indexes=None):
+        self.categories = list(categories)
+        self.centroids = centroids
+        self.indexes = indexes  # category -> NumpyIndex whose ids are rows of the full index
+
+    @classmethod
+    def from_index(cls, index):
+        rows = {}
+        for row in range(len(index)):
+            category = (index.metadatas[row] or {}).get("category")
+            if category:
+                rows.setdefault(category, []).append(row)
+
+        categories = sorted(rows)
+        indexes, centroids = {}, []
+        for category in categories:
+            members = np.asarray(rows[category], dtype=np.int64)
+            if members[-1] - members[0] + 1 == len(members):
+                matrix = index.matrix[members[0]:members[-1] + 1]
+            else:
+                matrix = index.matrix[members]
+            indexes[category] = NumpyIndex(members, matrix, space=index.space, normalized=True)
+            centroids.append(np.asarray(matrix, dtype=np.float32).mean(axis=0))
+        return cls(categories, cls._normalize(centroids), indexes)
+
+    @classmethod
+    def from_ranges(cls, index, ranges, centroids=None):
+        """
+        From [[category, first row, end row]] ranges of `index` (rows grouped by
+        category, as in snapshots): every partition is a zero-copy slice, and no
+        metadata is read. `centroids` (in `ranges` order) skips computing them.
+        """
+        categories, indexes, computed = [], {}, []
+        for category, start, end in ranges:
+            matrix = index.matrix[start:end]
+            indexes[category] = NumpyIndex(np.arange(start, end), matrix, space=index.space, normalized=True)
+            categories.append(category)
+            if centroids is None:
+                computed.append(np.asarray(matrix, dtype=np.float32).mean(axis=0))
+        if centroids is None:
+            centroids = cls._normalize(computed)
+        return cls(categories, centroids, indexes)
+
+    @classmethod
+    def from_collection(cls, collection, page_size=1000):
+        """Centroids only, streamed page by page from the collection's embeddings."""
+        sums = {}
+        offset = 0
+        while True:
+            page = collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            vectors = normalize_rows(page["embeddings"])
+            for vector, meta in zip(vectors, page.get("metadatas") or [None] * len(page_ids)):
+                category = (meta or {}).get("category")
+                if category:
+                    sums[category] = sums[category] + vector if category in sums else vector.copy()
+            offset += len(page_ids)
+
+        categories = sorted(sums)
+        return cls(categories, cls._normalize([sums[c] for c in categories]))
+
+    @staticmethod
+    def _normalize(centroids):
+        return normalize_rows(np.stack(centroids)) if centroids else np.zeros((0, 0), np.float32)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def route(self, query_vectors, margin=ROUTE_MARGIN, top_n=ROUTE_TOP_N):
+        """Categories to search for each query: the nearest centroid, or the top_n when they are close."""
+        if not self.categories:
+            return [None] * len(query_vectors)
+        similarities = normalize_rows(query_vectors) @ self.centroids.T
+        routes = []
+        for row in similarities:
+            order = np.argsort(-row)[:top_n]
+            if len(order) > 1 and row[order[0]] - row[order[1]] >= margin:
+                order = order[:1]
+            routes.append(tuple(self.categories[i] for i in order))
+        return routes
+
+    def query(self, index, query_embeddings, categories, n_results):
+        """`index.query()` restricted to `categories`, with the same result shape."""
+        if self.indexes is None:
+            return index.query(query_embeddings=query_embeddings, n_results=n_results,
+                               where=where_filter(categories))
+
+        queries = normalize_rows(query_embeddings)
+        rows, distances = [], []
+        for category in categories:
+            part = self.indexes.get(category)
+            if part is None or not len(part):
+                continue
+            local, part_distances = part.search(queries, n_results)
+            rows.append(part.ids[local])
+            distances.append(part_distances)
+        if not rows:
+            return index.results([[] for _ in queries], np.zeros((len(queries), 0)))
+
+        rows, distances = np.concatenate(rows, axis=1), np.concatenate(distances, axis=1)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :n_results]
+        return index.results(np.take_along_axis(rows, order, axis=1), np.take_along_axis(distances, order, axis=1))
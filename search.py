@@ -1,59 +1,58 @@
-import json
-from chromadb import PersistentClient
-from chromadb.utils import embedding_functions
-# No external 'db' module needed here — this script creates the Chroma collection below.
-# If you intended to import from a separate file, ensure a local db.py defines `collection`
-# and that the file is on the PYTHONPATH (same folder or package).
-
-# ✅ Use the same model as in search.py
-embed_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-    model_name="all-mpnet-base-v2"
-)
-
-# ✅ Connect to ChromaDB and delete old collection
-client = PersistentClient(path="./chroma_store")
-try:
-    client.delete_collection(name="student_faqs")
-except:
-    pass  # Ignore if collection doesn't exist
-
-# ✅ Recreate collection with correct embedding dimensions
-collection = client.create_collection(name="student_faqs", embedding_function=embed_fn)
-
-# ✅ Load and ingest FAQs
-with open("faqs.json", "r", encoding="utf-8") as f:
-    faqs = json.load(f)
-
-for faq in faqs:
-    collection.add(
-        documents=[faq["question"]],
-        metadatas=[{"answer": faq["answer"]}],
-        ids=[faq["id"]]
-    )
-
-print("✅ Collection re-ingested with 768-dim embeddings.")
-def search_faq(query):
-    query = query.lower().strip()
-    results = collection.query(query_texts=[query], n_results=1)
-
-    try:
-        answer = results["metadatas"][0][0]["answer"]
-        if answer:
-            return answer
-    except (IndexError, KeyError, TypeError):
-        pass
-
-    # Fallback keyword match
-    for faq in faqs:
-        if query in faq["question"].lower() or any(word in faq["question"].lower() for word in query.split()):
-            return faq["answer"]
-
-    return "No matching FAQ found."
-
-if __name__ == "__main__":
-    while True:
-        user_query = input("🔍 Ask a question (or type 'exit' to quit): ")
-        if user_query.lower() == "exit":
-            break
-        answer = search_faq(user_query)
-        print(f"✅ Answer: {answer}\n")
+from db import sync_faqs
+from engine import get_engine
+from lexical import reciprocal_rank_fusion
+
+# ✅ Same model, collection (chroma_db) and indexes as app.py, loaded on the first search.
+# Ingestion is db.py's job (or this file's __main__); importing it does no work.
+N_CANDIDATES = 10
+
+
+def search_faq(query):
+    engine = get_engine().ensure_loaded()
+    engine.refresh_if_reingested()
+    vectors, lexical_index, _ = engine.indexes  # one consistent set, even if a refresh swaps it
+    query = query.lower().strip()
+
+    # Semantic candidates
+    vector_ids = []
+    try:
+        if vectors is not None:
+            results = vectors.query(engine.embed_fn([query]), n_results=N_CANDIDATES)
+        else:
+            results = engine.collection.query(query_texts=[query], n_results=N_CANDIDATES)
+        vector_ids = results["ids"][0]
+        answers = {i: m["answer"] for i, m in zip(vector_ids, results["metadatas"][0]) if m}
+    except (IndexError, KeyError, TypeError):
+        answers = {}
+
+    # Lexical candidates from the BM25 index (exact terms like "60 Feet Road")
+    lexical_ids = []
+    if lexical_index is not None:
+        for row, _ in lexical_index.search(query, N_CANDIDATES):
+            faq_id = lexical_index.ids[row]
+            lexical_ids.append(faq_id)
+            answers.setdefault(faq_id, (lexical_index.metadatas[row] or {}).get("answer"))
+
+    for faq_id, _ in reciprocal_rank_fusion([vector_ids, lexical_ids]):
+        if answers.get(faq_id):
+            return answers[faq_id]
+
+    return "No matching FAQ found."
+
+
+if __name__ == "__main__":
+    # ✅ Incrementally sync FAQs first: only new or edited entries are re-embedded
+    engine = get_engine().ensure_loaded()
+    stats = sync_faqs(collection=engine.collection, embed_fn=engine.embed_fn)
+    if stats:
+        print(
+            f"✅ Collection synced: {stats['added']} added, {stats['updated']} updated, "
+            f"{stats['deleted']} deleted."
+        )
+
+    while True:
+        user_query = input("🔍 Ask a question (or type 'exit' to quit): ")
+        if user_query.lower() == "exit":
+            break
+        answer = search_faq(user_query)
+        print(f"✅ Answer: {answer}\n")
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# ---------------------- Config ----------------------
+# Cosine similarity a new query needs to an earlier one (same FAQ) to reuse its refined answer
+SIMILARITY_THRESHOLD = float(os.environ.get("FAQ_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+MAX_ENTRIES = int(os.environ.get("FAQ_SEMANTIC_CACHE_SIZE", "2048"))
+TTL_SECONDS = float(os.environ.get("FAQ_SEMANTIC_CACHE_TTL", "3600"))
+MAX_PER_FAQ = 16  # bounds the similarity scan per lookup
+
+
+def answer_hash(answer: str) -> str:
+    return hashlib.sha1((answer or "").encode("utf-8")).hexdigest()
+
+
+class SemanticCache:
+    """
+    LLM-refined answers keyed by (retrieved FAQ id, query embedding).
+
+    A lookup only compares against entries for the same FAQ id, and only
+    reuses one whose query embedding is within `threshold` cosine similarity and
+    whose FAQ answer hash still matches, so an edited FAQ invalidates its entries.
+    Entries expire after `ttl` seconds; the least recently used go first when full.
+    """
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, maxsize=MAX_ENTRIES, ttl=TTL_SECONDS,
+                 max_per_faq=MAX_PER_FAQ):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_per_faq = max_per_faq
+        self._entries = OrderedDict()  # key -> (faq_id, unit embedding, answer hash, refined, expires_at)
+        self._by_faq = {}  # faq_id -> [keys], oldest first
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self.evictions = self.expirations = self.invalidations = 0
+
+    @staticmethod
+    def _unit(embedding):
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, key):
+        faq_id = self._entries.pop(key)[0]
+        keys = self._by_faq[faq_id]
+        keys.remove(key)
+        if not keys:
+            del self._by_faq[faq_id]
+
+    def get(self, faq_id, embedding, answer):
+        """Refined answer cached for a similar query about the same FAQ answer, or None."""
+        query = self._unit(embedding)
+        digest = answer_hash(answer)
+        now = time.monotonic()
+        with self._lock:
+            best_key, best_sim = None, self.threshold
+            for key in list(self._by_faq.get(faq_id, ())):
+                _, vector, entry_hash, _, expires_at = self._entries[key]
+                if expires_at <= now:
+                    self._remove(key)
+                    self.expirations += 1
+                elif entry_hash != digest:
+                    self._remove(key)
+                    self.invalidations += 1
+                elif vector.shape == query.shape:
+                    similarity = float(vector @ query)
+                    if similarity >= best_sim:
+                        best_key, best_sim = key, similarity
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][3]
+
+    def set(self, faq_id, embedding, answer, refined) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = (
+                faq_id, self._unit(embedding), answer_hash(answer), refined, time.monotonic() + self.ttl
+            )
+            keys = self._by_faq.setdefault(faq_id, [])
+            keys.append(key)
+            if len(keys) > self.max_per_faq:
+                self._remove(keys[0])
+                self.evictions += 1
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Process-wide cache shared by every Streamlit session."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache()
+    return _cache
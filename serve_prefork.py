@@ -0,0 +1,158 @@
+"""
+Pre-fork production server for the Flask backend (Linux/macOS).
+
+The parent loads the embedding model and, with the snapshot index, the
+memory-mapped FAQ embeddings and BM25 index once, then forks N workers that
+share those pages copy-on-write and accept from one listening socket. Each
+worker pins torch to its share of the cores, opens its own ChromaDB client
+(it does not survive fork()) and serves the same API as app.py. The parent
+restarts workers that die and stops them all on SIGTERM / Ctrl-C.
+
+    python serve_prefork.py --workers 4 --port 5000
+
+/metrics and /cache/stats describe the worker that answered the request.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import threading
+import time
+
+# The shared read-only index is the memory-mapped snapshot db.py exports; set before app/engine read it
+os.environ.setdefault("FAQ_VECTOR_INDEX", "snapshot")
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as backend  # noqa: E402
+import metrics  # noqa: E402
+from embeddings import EMBED_BACKEND, model_loads, set_num_threads  # noqa: E402
+from engine import WARMUP_QUERY  # noqa: E402
+
+logger = metrics.get_logger("prefork")
+
+# ---------------------- Config ----------------------
+WORKERS = int(os.environ.get("FAQ_WORKERS", str(os.cpu_count() or 1)))
+# Intra-op threads per worker; 0 splits the cores evenly between workers
+WORKER_THREADS = int(os.environ.get("FAQ_WORKER_THREADS", "0"))
+HOST = os.environ.get("FAQ_HOST", "0.0.0.0")
+PORT = int(os.environ.get("FAQ_PORT", "5000"))
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def threads_per_worker(workers, threads=0):
+    return threads if threads > 0 else max(1, (os.cpu_count() or 1) // workers)
+
+
+def preload():
+    """Load everything fork-safe in the parent so workers start warm and share the pages."""
+    start = time.perf_counter()
+    engine = backend.engine
+    # ONNX Runtime's thread pool does not survive fork(); onnx workers load their own session
+    share_model = EMBED_BACKEND != "onnx"
+    if share_model:
+        # One thread: no OpenMP pool in the parent for the children to inherit half-alive
+        set_num_threads(1)
+    else:
+        logger.warning("The onnx backend cannot be shared across fork(); every worker loads its own model.")
+    engine.preload(model=share_model)
+    if engine.embed_fn is not None:
+        engine.embed_fn([WARMUP_QUERY])
+    if engine.vector_index == "snapshot" and engine.numpy_index is None:
+        logger.warning("No usable embedding snapshot (run db.py); each worker loads the embeddings from ChromaDB.")
+    # Keep the loaded objects out of future collections, so the GC does not dirty their shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded in %.2fs", time.perf_counter() - start)
+
+
+def run_worker(server, slot, threads):
+    """Body of a forked worker; never returns."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C goes to the parent, which stops the workers
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+    status = 0
+    try:
+        set_num_threads(threads)
+        backend.engine.warm_up()
+        if EMBED_BACKEND != "onnx" and model_loads():
+            logger.warning("Worker %d loaded %d model(s) of its own instead of sharing the parent's",
+                           slot, model_loads())
+        logger.info("Worker %d (pid %d) serving with %d thread(s)", slot, os.getpid(), threads)
+        server.serve_forever()
+    except Exception as e:
+        logger.exception("Worker %d failed: %s", slot, e)
+        status = 1
+    finally:
+        logging.shutdown()
+        os._exit(status)
+
+
+def serve(workers=WORKERS, threads=WORKER_THREADS, host=HOST, port=PORT):
+    if not hasattr(os, "fork"):
+        raise SystemExit("❌ serve_prefork.py needs fork(); use app.py or app_async.py on this platform.")
+
+    threads = threads_per_worker(workers, threads)
+    preload()
+    server = make_server(host, port, backend.app, threaded=True)
+    # Workers race for each connection; the losers get EAGAIN and go back to waiting
+    server.socket.setblocking(False)
+
+    children = {}  # pid -> worker slot
+    stopping = False
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            run_worker(server, slot, threads)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+    print(f"✅ {workers} workers ({threads} thread(s) each) serving http://{host}:{port}/search")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        logger.warning("Worker %d (pid %d) exited with status %d; restarting", slot, pid,
+                       os.waitstatus_to_exitcode(status))
+        time.sleep(RESTART_BACKOFF_SECONDS)
+        if not stopping:
+            spawn(slot)
+    server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS,
+                        help="torch intra-op threads per worker (default: cores / workers)")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--access-log", action="store_true", help="log every request (off: warnings only)")
+    args = parser.parse_args()
+
+    if not args.access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    serve(args.workers, args.threads, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from lexical import BM25Index
+from partitions import CategoryPartitions
+from vector_index import NumpyIndex
+
+# ---------------------- Format ----------------------
+# snapshots/
+#   CURRENT              name of the active version directory
+#   <corpus hash>/
+#     header.json        format version, model, dimension, row count, corpus hash, BM25
+#                        parameters and each category's [category, first row, end row]
+#     embeddings.npy     float32 [rows, dim], rows already L2-normalized, grouped by category
+#     table.bin          UTF-8 JSON rows: [id, question, metadata]
+#     offsets.npy        int64 [rows + 1] byte offsets into table.bin
+#     centroids.npy      float32 [categories, dim] unit-length category centroids
+#     bm25_terms.json    BM25 vocabulary, in posting order
+#     bm25_offsets.npy   int64 [terms + 1] offsets into the two posting arrays
+#     bm25_rows.npy      int32 rows of every posting
+#     bm25_weights.npy   float32 precomputed BM25 weight of every posting
+# Loading maps all of it, so startup does not decode the rows or rebuild BM25.
+FORMAT_VERSION = 2
+CURRENT_FILE = "CURRENT"
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+TABLE_FILE = "table.bin"
+OFFSETS_FILE = "offsets.npy"
+CENTROIDS_FILE = "centroids.npy"
+BM25_TERMS_FILE = "bm25_terms.json"
+BM25_OFFSETS_FILE = "bm25_offsets.npy"
+BM25_ROWS_FILE = "bm25_rows.npy"
+BM25_WEIGHTS_FILE = "bm25_weights.npy"
+KEEP_VERSIONS = 2  # older versions are deleted after a new export
+ROW_CACHE_SIZE = 4096  # decoded rows kept per process, so a hit's id, question and metadata decode once
+
+
+def corpus_hash(ids, metadatas):
+    """Order-independent fingerprint of the corpus from each FAQ's id and content hash."""
+    digest = hashlib.sha1()
+    rows = sorted(
+        (faq_id, (meta or {}).get("content_hash") or json.dumps(meta, sort_keys=True))
+        for faq_id, meta in zip(ids, metadatas)
+    )
+    for faq_id, content in rows:
+        digest.update(f"{faq_id}\0{content}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SnapshotTable:
+    """Read-only row table over memory-mapped table.bin/offsets.npy; rows decode on access."""
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        self._offsets = np.load(directory / OFFSETS_FILE, mmap_mode="r")
+        size = int(self._offsets[-1]) if len(self._offsets) else 0
+        self._blob = np.memmap(directory / TABLE_FILE, dtype=np.uint8, mode="r") if size else b""
+        self.row = lru_cache(maxsize=ROW_CACHE_SIZE)(self._decode_row)
+
+    def __len__(self):
+        return max(len(self._offsets) - 1, 0)
+
+    def _decode_row(self, i):
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return json.loads(bytes(self._blob[start:end]).decode("utf-8"))
+
+    def column(self, field):
+        return _Column(self, field)
+
+
+class _Column:
+    """Sequence view of one field of a SnapshotTable."""
+
+    def __init__(self, table, field):
+        self._table = table
+        self._field = field
+
+    def __len__(self):
+        return len(self._table)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return self._table.row(i)[self._field]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _SnapshotPostings:
+    """term -> (rows, weights) views into the memory-mapped posting arrays, as BM25Index expects."""
+
+    def __init__(self, terms, offsets, rows, weights):
+        self._positions = {term: i for i, term in enumerate(terms)}
+        self._offsets = np.asarray(offsets)
+        self._rows = rows
+        self._weights = weights
+
+    def __contains__(self, term):
+        return term in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, term):
+        i = self._positions[term]
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._rows[start:end], self._weights[start:end]
+
+
+def current_version_dir(root):
+    """Return the active snapshot directory under `root`, or None if there is none."""
+    root = Path(root)
+    try:
+        name = (root / CURRENT_FILE).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    directory = root / name
+    return directory if (directory / HEADER_FILE).exists() else None
+
+
+def read_header(directory):
+    with open(Path(directory) / HEADER_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_current_format(root):
+    """True if `root` has a current snapshot in this FORMAT_VERSION (else db.py re-exports it)."""
+    directory = current_version_dir(root)
+    return directory is not None and read_header(directory).get("format_version") == FORMAT_VERSION
+
+
+def _category_ranges(metadatas):
+    """[[category, first row, end row]] for rows already grouped by category (uncategorized rows skipped)."""
+    ranges = []
+    for row, meta in enumerate(metadatas):
+        category = (meta or {}).get("category")
+        if not category:
+            continue
+        if ranges and ranges[-1][0] == category and ranges[-1][2] == row:
+            ranges[-1][2] = row + 1
+        else:
+            ranges.append([category, row, row + 1])
+    return ranges
+
+
+def _write_postings(directory, lexical):
+    terms = sorted(lexical.postings)
+    offsets = [0]
+    for term in terms:
+        offsets.append(offsets[-1] + len(lexical.postings[term][0]))
+    rows = [lexical.postings[term][0] for term in terms]
+    weights = [lexical.postings[term][1] for term in terms]
+    np.save(directory / BM25_ROWS_FILE, np.concatenate(rows).astype(np.int32) if rows else np.zeros(0, np.int32))
+    np.save(directory / BM25_WEIGHTS_FILE,
+            np.concatenate(weights).astype(np.float32) if weights else np.zeros(0, np.float32))
+    np.save(directory / BM25_OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+    with open(directory / BM25_TERMS_FILE, "w", encoding="utf-8") as f:
+        json.dump(terms, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def _write_current(root, name):
+    tmp_path = root / f"{CURRENT_FILE}.tmp"
+    tmp_path.write_text(name, encoding="utf-8")
+    os.replace(tmp_path, root / CURRENT_FILE)
+
+
+def _prune(root, keep_name):
+    versions = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    kept = 0
+    for path in versions:
+        if path.name == keep_name:
+            continue
+        kept += 1
+        if kept >= KEEP_VERSIONS:
+            # Workers that still map the old files keep them alive until they reload
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def export_snapshot(index, model_name, root):
+    """
+    Write `index` as a new snapshot version under `root` and make it current.
+
+    Versions are named after the corpus hash, so exporting an unchanged corpus
+    only re-points CURRENT (unless that version is in an older format). Rows are
+    written grouped by category, so each category's embeddings are one contiguous
+    (zero-copy) slice of the matrix. The BM25 postings, category row ranges and
+    centroids are written next to them. Returns the version directory.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    digest = corpus_hash(index.ids, index.metadatas)
+    name = digest[:16]
+    target = root / name
+
+    if not (target / HEADER_FILE).exists() or read_header(target).get("format_version") != FORMAT_VERSION:
+        tmp_dir = root / f".tmp-{os.getpid()}-{name}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+
+        order = sorted(range(len(index)), key=lambda i: ((index.metadatas[i] or {}).get("category") or "", i))
+        matrix = np.ascontiguousarray(index.matrix[order], dtype=np.float32)
+        np.save(tmp_dir / EMBEDDINGS_FILE, matrix)
+
+        offsets = [0]
+        with open(tmp_dir / TABLE_FILE, "wb") as f:
+            for i in order:
+                row = [index.ids[i], index.documents[i], index.metadatas[i]]
+                data = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                f.write(data)
+                offsets.append(offsets[-1] + len(data))
+        np.save(tmp_dir / OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+
+        ids = [index.ids[i] for i in order]
+        documents = [index.documents[i] for i in order]
+        metadatas = [index.metadatas[i] for i in order]
+        lexical = BM25Index.from_records(ids, documents, metadatas)
+        _write_postings(tmp_dir, lexical)
+        categories = _category_ranges(metadatas)
+        partitions = CategoryPartitions.from_ranges(NumpyIndex(ids, matrix, space=index.space, normalized=True),
+                                                    categories)
+        np.save(tmp_dir / CENTROIDS_FILE, np.asarray(partitions.centroids, dtype=np.float32))
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "model": model_name,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "rows": len(index),
+            "space": index.space,
+            "corpus_hash": digest,
+            "categories": categories,
+            "bm25": {"k1": lexical.k1, "b": lexical.b},
+            "created_at": time.time(),
+        }
+        with open(tmp_dir / HEADER_FILE, "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+
+    _write_current(root, name)
+    _prune(root, name)
+    return target
+
+
+def load_snapshot(root, model_name=None):
+    """
+    Memory-map the current snapshot as a NumpyIndex (None if there is no snapshot).
+
+    Pages are shared between every process that maps the same files. Raises
+    ValueError if the snapshot format or embedding model does not match.
+    """
+    directory = current_version_dir(root)
+    if directory is None:
+        return None
+
+    header = read_header(directory)
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format {header.get('format_version')} in {directory}")
+    if model_name and header.get("model") != model_name:
+        raise ValueError(
+            f"Snapshot in {directory} was built with {header.get('model')}, expected {model_name}"
+        )
+
+    matrix = np.load(directory / EMBEDDINGS_FILE, mmap_mode="r")
+    table = SnapshotTable(directory)
+    index = NumpyIndex(
+        table.column(0),
+        matrix,
+        metadatas=table.column(2),
+        documents=table.column(1),
+        space=header.get("space", "l2"),
+        normalized=True,
+    )
+    index.header = header
+    index.snapshot_dir = directory
+    return index
+
+
+def load_lexical_index(index):
+    """BM25Index of a load_snapshot() index, mapped from its posting files (nothing is rebuilt)."""
+    directory = index.snapshot_dir
+    with open(directory / BM25_TERMS_FILE, "r", encoding="utf-8") as f:
+        terms = json.load(f)
+    postings = _SnapshotPostings(
+        terms,
+        np.load(directory / BM25_OFFSETS_FILE, mmap_mode="r"),
+        np.load(directory / BM25_ROWS_FILE, mmap_mode="r"),
+        np.load(directory / BM25_WEIGHTS_FILE, mmap_mode="r"),
+    )
+    params = index.header.get("bm25") or {}
+    ranges = {category: (start, end) for category, start, end in index.header.get("categories") or []}
+    return BM25Index(index.ids, index.metadatas, postings, category_ranges=ranges, **params)
+
+
+def load_partitions(index):
+    """CategoryPartitions of a load_snapshot() index from its stored row ranges and centroids."""
+    centroids = np.load(index.snapshot_dir / CENTROIDS_FILE, mmap_mode="r")
+    return CategoryPartitions.from_ranges(index, index.header.get("categories") or [], centroids)
@@ -0,0 +1,195 @@
+import json
+
+import numpy as np
+import pytest
+
+import app
+import snapshot
+from engine import IndexSet
+from vector_index import NumpyIndex
+
+TOPICS = ["library", "hostel", "bus", "canteen", "exam", "fee", "sports", "scholarship"]
+
+
+class FakeEngine:
+    """Just what the /search path reads from the retrieval engine."""
+
+    def __init__(self, indexes, dim=8):
+        self.indexes = indexes
+        self.collection = None
+        self.space = indexes.vectors.space if indexes.vectors is not None else "cosine"
+        self._rng = np.random.default_rng(1)
+        self._dim = dim
+
+    @property
+    def partitions(self):
+        return self.indexes.partitions
+
+    def ensure_loaded(self):
+        return self
+
+    def refresh_if_reingested(self, force=False):
+        return False
+
+    def record_query(self, seconds):
+        pass
+
+    def embed_fn(self, texts):
+        return [self._rng.normal(size=self._dim).astype(np.float32) for _ in texts]
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(app, "USE_ANSWER_TABLE", False)
+    monkeypatch.setattr(app, "BATCHING_ENABLED", False)
+    app.query_cache.clear()
+    app.embedding_cache.clear()
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """Rows decoded from the snapshot table (patched before any table exists)."""
+    rows = []
+    decode = snapshot.SnapshotTable._decode_row
+    monkeypatch.setattr(snapshot.SnapshotTable, "_decode_row", lambda self, i: rows.append(i) or decode(self, i))
+    return rows
+
+
+@pytest.fixture
+def snapshot_engine(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    n = 200
+    source = NumpyIndex(
+        [f"faq{i}" for i in range(n)],
+        rng.normal(size=(n, 8)).astype(np.float32),
+        metadatas=[{"category": TOPICS[i % len(TOPICS)], "answer": f"Answer {i}."} for i in range(n)],
+        documents=[f"Question {i} about the {TOPICS[i % len(TOPICS)]}" for i in range(n)],
+        space="cosine",
+    )
+    snapshot.export_snapshot(source, "test-model", tmp_path)
+    vectors = snapshot.load_snapshot(tmp_path, "test-model")
+    fake = FakeEngine(IndexSet(vectors, snapshot.load_lexical_index(vectors), snapshot.load_partitions(vectors)))
+    monkeypatch.setattr(app, "engine", fake)
+    return fake
+
+
+def test_hybrid_query_decodes_only_candidate_rows(decoded, snapshot_engine):
+    candidates = app.retrieve_batch(["when does the bus leave"])[0]
+
+    assert len(candidates) == app.N_CANDIDATES
+    assert all(c["distance"] is not None for c in candidates)  # lexical-only hits got theirs by row
+    assert len(decoded) == len(set(decoded)) <= 2 * app.N_CANDIDATES  # never a walk over all 200 rows
+
+    vectors = snapshot_engine.indexes.vectors
+    query = app.embedding_cache.get("when does the bus leave")
+    row_of = {faq_id: row for row, faq_id in enumerate(vectors.ids)}
+    for c in candidates:
+        embedding = vectors.matrix[row_of[c["id"]]]
+        expected = 1 - float(query @ embedding) / float(np.linalg.norm(query) * np.linalg.norm(embedding))
+        assert c["distance"] == pytest.approx(expected, abs=1e-3)
+
+
+# ---------------------- Confidence gating ----------------------
+def candidate(faq_id, distance, category="library"):
+    confidence = None if distance is None else round(1.0 - distance, 4)
+    return {"id": faq_id, "answer": f"Answer {faq_id}", "category": category,
+            "distance": distance, "confidence": confidence}
+
+
+def test_strong_match_is_answered():
+    payload = app.build_answer([candidate("a", 0.1), candidate("b", 0.4)], top_k=2)
+    assert payload["matched"] is True
+    assert (payload["id"], payload["answer"], payload["confidence"]) == ("a", "Answer a", 0.9)
+    assert [r["id"] for r in payload["results"]] == ["a", "b"]
+
+
+def test_weak_match_is_gated(monkeypatch):
+    monkeypatch.setitem(app.DISTANCE_THRESHOLDS, "transport", 0.3)
+    payload = app.build_answer([candidate("a", 0.6)])
+    assert (payload["matched"], payload["reason"], payload["answer"]) == (False, "low_confidence", app.NO_MATCH_ANSWER)
+    assert payload["results"][0]["id"] == "a"  # candidates are still returned for callers to inspect
+
+    # the per-category threshold applies to the top hit's category
+    assert app.build_answer([candidate("b", 0.4)])["matched"] is True
+    assert app.build_answer([candidate("b", 0.4, "transport")])["reason"] == "low_confidence"
+    assert app.build_answer([candidate("c", None)])["reason"] == "low_confidence"
+
+
+def test_empty_results():
+    assert app.build_answer([]) == {
+        "answer": app.NO_MATCH_ANSWER, "matched": False, "reason": "no_results", "results": [],
+    }
+
+
+def test_search_endpoint_gates_on_stubbed_results(monkeypatch):
+    monkeypatch.setattr(app, "engine", FakeEngine(IndexSet(None, None, None)))
+    found = {"library hours": [candidate("a", 0.2)], "quantum physics": [candidate("b", 0.9)], "xyzzy": []}
+    monkeypatch.setattr(app, "lookup", lambda query, categories=None: found[query])
+    client = app.app.test_client()
+
+    strong = client.post("/search", json={"query": "library hours"}).get_json()
+    weak = client.post("/search", json={"query": "quantum physics"}).get_json()
+    empty = client.post("/search", json={"query": "xyzzy"}).get_json()
+
+    assert (strong["matched"], strong["id"]) == (True, "a")
+    assert (weak["matched"], weak["reason"]) == (False, "low_confidence")
+    assert (empty["matched"], empty["reason"], empty["results"]) == (False, "no_results", [])
+
+
+# ---------------------- /search/batch ----------------------
+@pytest.fixture
+def batch_client(monkeypatch):
+    monkeypatch.setattr(app, "engine", FakeEngine(IndexSet(None, None, None)))
+
+    def lookup_many(queries, categories=None):
+        return [[candidate(query, 0.1)] for query in queries]
+
+    monkeypatch.setattr(app, "lookup_many", lookup_many)
+    return app.app.test_client()
+
+
+def read_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_batch_streams_one_line_per_query_in_order(batch_client):
+    queries = [f"question {i}" for i in range(150)]  # more than one chunk
+    queries[3] = {"query_id": "q3", "query": "question 3"}
+    queries[7] = ""
+    response = batch_client.post("/search/batch", json={"queries": queries, "top_k": 1})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = read_lines(response)
+    assert [line["index"] for line in lines] == list(range(150))
+    assert [line.get("id") for line in lines[:3]] == ["question 0", "question 1", "question 2"]
+    assert (lines[3]["query_id"], lines[3]["id"]) == ("q3", "question 3")
+    assert "error" in lines[7] and lines[8]["id"] == "question 8"  # a bad item only fails its own line
+    assert lines[-1]["query"] == "question 149"
+
+
+def test_batch_accepts_ndjson(batch_client):
+    body = '"where is the library"\n\n{"query": "hostel fee", "query_id": "h"}\nnot json\n'
+    response = batch_client.post("/search/batch?top_k=1", data=body, content_type="application/x-ndjson")
+
+    assert response.mimetype == "application/x-ndjson"
+    lines = read_lines(response)
+    assert [line.get("id") for line in lines] == ["where is the library", "hostel fee", None]
+    assert lines[1]["query_id"] == "h"
+    assert lines[2]["error"] == "Invalid JSON line."
+
+
+def test_batch_rejects_empty_and_oversize(batch_client, monkeypatch):
+    assert batch_client.post("/search/batch", json={"queries": []}).status_code == 400
+    assert batch_client.post("/search/batch", json={"queries": "library"}).status_code == 400
+
+    monkeypatch.setattr(app, "BATCH_MAX_QUERIES", 3)
+    response = batch_client.post("/search/batch", json=["a", "b", "c", "d"])
+    assert response.status_code == 413
+    assert "At most 3" in response.get_json()["error"]
+
+    response = batch_client.post("/search/batch", data='"a"\n"b"\n"c"\n"d"\n"e"\n',
+                               content_type="application/x-ndjson")
+    lines = read_lines(response)
+    assert [line.get("id") for line in lines] == ["a", "b", "c", None]
+    assert "Batch exceeds 3 queries" in lines[3]["error"]
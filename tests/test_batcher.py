@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from batcher import MicroBatcher
+
+
+def test_lone_call_runs_inline():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(items) or [i * 2 for i in items])
+    assert batcher(21) == 42
+    assert batches == [[21]]
+    assert batcher.stats()["direct_calls"] == 1
+
+
+def test_concurrent_calls_share_a_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [i * 2 for i in items]
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait=0.2, direct_when_idle=False)
+    results = {}
+
+    def call(i):
+        results[i] = batcher(i, timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: i * 2 for i in range(6)}
+    assert sum(len(b) for b in batches) == 6
+    assert len(batches) < 6
+    assert batcher.stats()["largest_batch"] == max(len(b) for b in batches)
+
+
+def test_batch_size_is_capped():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(items) or list(items), max_batch_size=2, max_wait=0.2)
+    futures = [batcher.submit(i) for i in range(5)]
+    assert [f.result(5) for f in futures] == list(range(5))
+    assert max(len(b) for b in batches) <= 2
+
+
+def test_errors_reach_every_caller():
+    def process(items):
+        raise ValueError("encoder failed")
+
+    batcher = MicroBatcher(process, max_wait=0.05)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match="encoder failed"):
+            future.result(5)
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_wait=0.01)
+    with pytest.raises(RuntimeError, match="0 results for 1 items"):
+        batcher.submit("x").result(5)
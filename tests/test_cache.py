@@ -0,0 +1,45 @@
+import time
+
+from cache import TTLCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Where IS the   Library?? ") == "where is the library"
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=4, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_counters_and_clear():
+    cache = TTLCache(maxsize=4)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.clear()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    assert (stats["size"], stats["invalidations"]) == (0, 1)
+
+
+def test_zero_maxsize_stores_nothing():
+    cache = TTLCache(maxsize=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,137 @@
+import json
+
+import chromadb
+import pytest
+
+import db
+
+
+class CountingEmbedder:
+    """Deterministic 4-d embeddings that record every text encoded."""
+
+    fingerprint = "test-model"
+
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0, 0.5] for text in texts]
+
+
+@pytest.fixture
+def env(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    collection = client.get_or_create_collection("faqs", embedding_function=None)
+    embed_fn = CountingEmbedder()
+    faqs_path = tmp_path / "faqs.json"
+    stamp_path = tmp_path / "ingest_stamp.json"
+
+    def sync(faqs, **kwargs):
+        faqs_path.write_text(json.dumps(faqs), encoding="utf-8")
+        embed_fn.encoded.clear()
+        if stamp_path.exists():
+            stamp_path.unlink()
+        return db.sync_faqs(path=faqs_path, collection=collection, embed_fn=embed_fn,
+                            stamp_path=stamp_path, **kwargs)
+
+    return sync, collection, embed_fn, stamp_path
+
+
+def faq(faq_id, question, answer, category="general"):
+    return {"id": faq_id, "question": question, "answer": answer, "category": category}
+
+
+BASE = [
+    faq("f1", "Where is the library?", "Block A, first floor."),
+    faq("f2", "What is the hostel fee?", "40,000 per year.", "fees"),
+    faq("f3", "When does the bus leave?", "5 pm from the main gate.", "transport"),
+]
+
+
+def stored(collection):
+    found = collection.get(include=["documents", "metadatas"])
+    return {i: (doc, meta["answer"]) for i, doc, meta in zip(found["ids"], found["documents"], found["metadatas"])}
+
+
+def counts(stats):
+    return {key: stats[key] for key in ("scanned", "added", "updated", "unchanged", "deleted", "incomplete")}
+
+
+def test_first_sync_adds_everything(env):
+    sync, collection, embed_fn, stamp_path = env
+    stats = sync(BASE)
+    assert counts(stats) == {"scanned": 3, "added": 3, "updated": 0, "unchanged": 0, "deleted": 0, "incomplete": 0}
+    assert sorted(stored(collection)) == ["f1", "f2", "f3"]
+    assert len(embed_fn.encoded) == 3
+    assert stamp_path.exists()
+
+
+def test_unchanged_sync_encodes_nothing(env):
+    sync, collection, embed_fn, stamp_path = env
+    sync(BASE)
+    stats = sync(BASE)
+    assert (stats["unchanged"], stats["added"], stats["updated"], stats["deleted"]) == (3, 0, 0, 0)
+    assert embed_fn.encoded == []
+    assert not stamp_path.exists()  # nothing changed, so running backends keep their caches
+
+
+def test_edit_add_and_remove(env):
+    sync, collection, embed_fn, stamp_path = env
+    sync(BASE)
+    edited = [
+        faq("f1", "Where is the library?", "Block B, ground floor."),  # answer edited
+        BASE[1],
+        faq("f4", "Is there a canteen?", "Yes, next to the library."),  # added; f3 removed
+    ]
+    stats = sync(edited)
+
+    assert counts(stats) == {"scanned": 3, "added": 1, "updated": 1, "unchanged": 1, "deleted": 1, "incomplete": 0}
+    assert sorted(embed_fn.encoded) == ["Is there a canteen?", "Where is the library?"]  # one encode each
+    assert stored(collection) == {
+        "f1": ("Where is the library?", "Block B, ground floor."),
+        "f2": ("What is the hostel fee?", "40,000 per year."),
+        "f4": ("Is there a canteen?", "Yes, next to the library."),
+    }
+    assert collection.count() == 3
+    assert stamp_path.exists()
+
+
+def test_category_edit_counts_as_update(env):
+    sync, collection, embed_fn, _ = env
+    sync(BASE)
+    stats = sync([BASE[0], BASE[1], {**BASE[2], "category": "campus"}])
+    assert (stats["updated"], stats["unchanged"]) == (1, 2)
+    assert collection.get(ids=["f3"], include=["metadatas"])["metadatas"][0]["category"] == "campus"
+
+
+def test_renamed_id_replaces_the_old_entry(env):
+    sync, collection, embed_fn, _ = env
+    sync(BASE)
+    stats = sync([BASE[0], BASE[1], {**BASE[2], "id": "bus-timing"}])
+    assert (stats["added"], stats["deleted"], stats["unchanged"]) == (1, 1, 2)
+    assert sorted(stored(collection)) == ["bus-timing", "f1", "f2"]
+
+
+def test_incomplete_and_duplicate_faqs_are_skipped(env):
+    sync, collection, embed_fn, _ = env
+    stats = sync(BASE + [{"id": "f5", "question": "No answer?"}, faq("f1", "Duplicate id", "Ignored.")])
+    assert (stats["scanned"], stats["added"], stats["incomplete"]) == (5, 3, 1)
+    assert stored(collection)["f1"] == ("Where is the library?", "Block A, first floor.")
+
+
+def test_without_prune_removed_faqs_stay(env):
+    sync, collection, _, _ = env
+    sync(BASE)
+    stats = sync(BASE[:1], prune=False)
+    assert stats["deleted"] == 0
+    assert collection.count() == 3
+
+
+def test_unreadable_file_never_prunes(env, tmp_path):
+    sync, collection, _, _ = env
+    sync(BASE)
+    bad = tmp_path / "broken.json"
+    bad.write_text('[{"id": "f1", ', encoding="utf-8")
+    assert db.sync_faqs(path=bad, collection=collection, embed_fn=CountingEmbedder(), stamp_path=None) is None
+    assert collection.count() == 3
@@ -0,0 +1,45 @@
+import pytest
+
+from decompose import split_query
+
+
+@pytest.mark.parametrize("text, parts", [
+    ("where is the library and what is the hostel fee", ["where is the library", "what is the hostel fee"]),
+    ("Where is the library? What is the fee for B.Tech IT?", ["Where is the library?", "What is the fee for B.Tech IT?"]),
+    ("library timings? hostel fee?", ["library timings?", "hostel fee?"]),
+    ("Where is the library, also when does it close?", ["Where is the library", "when does it close?"]),
+    ("where is the canteen and also is there a gym", ["where is the canteen", "is there a gym"]),
+    (
+        "What is the minimum attendance required and where is the reception and what is the hostel fee?",
+        ["What is the minimum attendance required", "where is the reception", "what is the hostel fee?"],
+    ),
+    ("Hi, where is the library? And what is the bus fee? Thanks!", ["where is the library?", "what is the bus fee?"]),
+    ("hi where is the library and what is the fee", ["hi where is the library", "what is the fee"]),
+])
+def test_splits_compound_questions(text, parts):
+    assert split_query(text) == parts
+
+
+@pytest.mark.parametrize("text", [
+    "Can I also do a minor degree?",
+    "What are the fees and scholarships?",
+    "Which buses are available from 60 Feet Road and Rajiv Chowk?",
+    "I live near Palasia Road. Which buses can I take?",
+    "What is the annual fee structure for B.Tech IT?",
+    "Hi, where is the reception?",
+    "where is the library and where is the library",
+    "hello how are you",
+])
+def test_keeps_single_questions_whole(text):
+    assert split_query(text) == [text]
+
+
+def test_statement_stays_with_its_question():
+    assert split_query("I am in IT. What is the fee? Where is the library?") == [
+        "I am in IT. What is the fee?", "Where is the library?",
+    ]
+
+
+def test_extra_parts_fold_into_the_last():
+    parts = split_query("what is a? what is b? what is c? what is d? what is e?", max_parts=3)
+    assert parts == ["what is a?", "what is b?", "what is c? what is d? what is e?"]
@@ -0,0 +1,83 @@
+import os
+import select
+import signal
+
+import chromadb
+import numpy as np
+import pytest
+
+import embeddings
+
+
+class CountingModel:
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load_model(model_name, backend):
+        calls.append((model_name, backend))
+        return CountingModel()
+
+    def sentence_transformer(*args, **kwargs):  # Chroma's own loader, which must not run
+        calls.append(("SentenceTransformer", kwargs.get("model_name_or_path")))
+        return CountingModel()
+
+    import sentence_transformers
+
+    monkeypatch.setattr(embeddings, "_models", {})
+    monkeypatch.setattr(embeddings.SentenceTransformerEmbeddingFunction, "models", {})
+    monkeypatch.setattr(embeddings, "_load_model", load_model)
+    monkeypatch.setattr(sentence_transformers, "SentenceTransformer", sentence_transformer)
+    return calls
+
+
+@pytest.mark.parametrize("backend", ["torch", "int8", "onnx"])
+def test_collection_reuses_loaded_model(loads, backend):
+    embed_fn = embeddings.get_embedding_function("base", backend)
+    client = chromadb.EphemeralClient()
+    for _ in range(2):
+        collection = client.get_or_create_collection(f"faqs_{backend}", embedding_function=embed_fn)
+    collection.add(ids=["1"], documents=["where is the library?"])
+    client.get_collection(f"faqs_{backend}")  # built from the stored config
+
+    assert loads == [(embeddings.DEFAULT_MODEL, backend)]
+
+
+def test_build_from_config_keeps_backend(loads):
+    embed_fn = embeddings.get_embedding_function("small", "int8")
+    rebuilt = embed_fn.build_from_config(embed_fn.get_config())
+
+    assert rebuilt.backend == "int8"
+    assert rebuilt._model is embed_fn._model
+    assert len(loads) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_worker_builds_no_model(loads, tmp_path):
+    import db
+
+    embed_fn = embeddings.get_embedding_function()  # pre-fork parent, as serve_prefork.preload()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            # what a worker's engine.load() does: its own client, the inherited model
+            db.get_collection(chromadb.PersistentClient(path=str(tmp_path / "chroma")), embed_fn)
+            os.write(write_end, f"{embeddings.model_loads()} {len(loads)}".encode())
+            status = 0
+        finally:
+            os._exit(status)
+
+    os.close(write_end)
+    ready, _, _ = select.select([read_end], [], [], 120)
+    if not ready:
+        os.kill(pid, signal.SIGKILL)
+    _, status = os.waitpid(pid, 0)
+    assert ready and os.waitstatus_to_exitcode(status) == 0
+    # no model of its own, and no SentenceTransformer built behind the engine's back
+    assert os.read(read_end, 32) == b"0 1"
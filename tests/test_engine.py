@@ -0,0 +1,70 @@
+import threading
+import time
+
+from engine import NO_INDEXES, IndexSet, RetrievalEngine
+
+
+def test_refresh_swaps_all_indexes_at_once(monkeypatch):
+    engine = RetrievalEngine(vector_index="numpy")
+    assert engine.indexes is NO_INDEXES
+    builds = iter(["v1", "v2"])
+    monkeypatch.setattr(engine, "_load_vector_index", lambda: next(builds))
+    monkeypatch.setattr(engine, "_load_lexical_index", lambda vectors: f"bm25 over {vectors}")
+    monkeypatch.setattr(engine, "_load_partitions", lambda vectors: f"partitions of {vectors}")
+
+    engine._build_indexes()
+    taken = engine.indexes  # what a request in flight holds
+    engine._build_indexes()
+
+    assert taken == IndexSet("v1", "bm25 over v1", "partitions of v1")
+    assert engine.indexes == IndexSet("v2", "bm25 over v2", "partitions of v2")
+    assert (engine.numpy_index, engine.lexical_index, engine.partitions) == tuple(engine.indexes)
+
+
+class _CountingCollection:
+    def __init__(self):
+        self.counts = 0
+
+    def count(self):
+        self.counts += 1
+        return 3
+
+
+def test_status_does_not_block_while_loading(monkeypatch):
+    engine = RetrievalEngine()
+    monkeypatch.setattr(engine, "warm_up", lambda: None)
+    holding, release = threading.Event(), threading.Event()
+
+    def load():  # stands in for a load() that holds the engine lock for seconds
+        with engine._lock:
+            holding.set()
+            release.wait(5)
+
+    loader = threading.Thread(target=load)
+    loader.start()
+    holding.wait(5)
+    try:
+        start = time.perf_counter()
+        engine.start_warmup()
+        status = engine.status()
+        assert time.perf_counter() - start < 1
+        assert (status["loaded"], status["documents"]) == (False, None)
+    finally:
+        release.set()
+        loader.join()
+
+
+def test_status_reports_documents_counted_at_load(monkeypatch):
+    engine = RetrievalEngine(vector_index="numpy")
+    collection = _CountingCollection()
+    engine.collection = collection
+    monkeypatch.setattr(engine, "_build_indexes", lambda: None)
+    engine.documents = collection.count()
+    engine._loaded.set()
+    engine.ingest_watcher = type("Stamp", (), {"changed": lambda self: False})()
+
+    for _ in range(3):
+        assert engine.status()["documents"] == 3
+    assert collection.counts == 1
+    assert engine.refresh_if_reingested(force=True)
+    assert collection.counts == 2
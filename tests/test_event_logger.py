@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+import event_logger
+from event_logger import EventLogger
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Events the sink accepted; a "boom" event makes the send raise a non-network error."""
+    delivered = []
+
+    def send(self, events):
+        if any(event.get("boom") for event in events):
+            raise RuntimeError("unexpected sink error")
+        delivered.extend(events)
+        return []
+
+    monkeypatch.setattr(EventLogger, "_send", send)
+    return delivered
+
+
+def make_logger(tmp_path):
+    return EventLogger("http://sink.invalid/log", spool_path=tmp_path / "spool.jsonl", flush_interval=0.05)
+
+
+def test_corrupt_spool_line_is_skipped(tmp_path, sent):
+    (tmp_path / "spool.jsonl").write_text('{"n": 1}\n{"n": 2, "quest\n{"n": 3}\n', encoding="utf-8")
+    logger = make_logger(tmp_path)
+    try:
+        assert wait_for(lambda: logger.counters["replayed"] == 2)
+        assert logger.counters["corrupt"] == 1
+        assert sent == [{"n": 1}, {"n": 3}]
+
+        logger.log({"n": 4})
+        assert wait_for(lambda: {"n": 4} in sent)
+    finally:
+        logger.close()
+
+
+def test_worker_survives_unexpected_errors(tmp_path, sent, monkeypatch):
+    monkeypatch.setattr(event_logger.logger, "disabled", True)
+    logger = make_logger(tmp_path)
+    try:
+        logger.log({"boom": True})
+        assert wait_for(lambda: logger.counters["errors"] == 1)
+        assert logger.counters["dropped"] == 1
+
+        logger.log({"n": 1})
+        assert wait_for(lambda: sent == [{"n": 1}])
+        assert logger._thread.is_alive()
+    finally:
+        logger.close()
+
+
+def test_counters_add_up_under_concurrent_logging(tmp_path, sent):
+    logger = EventLogger("http://sink.invalid/log", spool_path=tmp_path / "spool.jsonl", flush_interval=0.01,
+                         max_queue=50, batch_size=10)
+    producers = [threading.Thread(target=lambda: [logger.log({"n": i}) for i in range(2000)]) for _ in range(4)]
+    try:
+        for t in producers:
+            t.start()
+        for t in producers:
+            t.join()
+        assert wait_for(lambda: logger.stats()["queued"] == 0)
+    finally:
+        logger.close()
+    stats = logger.stats()
+    assert stats["enqueued"] + stats["dropped"] == 8000
+    assert stats["sent"] == stats["enqueued"] == len(sent)
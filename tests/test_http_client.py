@@ -0,0 +1,75 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_client import CircuitOpenError, HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers each POST with the next scripted status; "hang" sleeps past the client's read timeout."""
+
+    script = []
+    hits = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        type(self).hits += 1
+        step = self.script.pop(0) if self.script else 200
+        if step == "hang":
+            time.sleep(1.0)
+            step = 200
+        self.send_response(step)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def server():
+    Handler.script, Handler.hits = [], 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/search"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def client(**policy):
+    config = {"timeout": (0.5, 0.2), "retries": 2, "backoff": 0.0, "deadline": 5, "retry_read_timeouts": False}
+    return HttpClient(endpoints={"search": {**config, **policy}})
+
+
+def test_read_timeout_is_not_retried(server):
+    Handler.script = ["hang", "hang", "hang"]
+    start = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        client().post("search", server, json={})
+    assert Handler.hits == 1
+    assert time.monotonic() - start < 0.8
+
+
+def test_deadline_caps_retries(server):
+    Handler.script = ["hang", "hang", "hang"]
+    start = time.monotonic()
+    with pytest.raises(requests.ReadTimeout):
+        client(retry_read_timeouts=True, timeout=(0.5, 0.3), deadline=0.45).post("search", server, json={})
+    assert Handler.hits == 2
+    assert time.monotonic() - start < 0.8
+
+
+def test_retries_server_errors_then_opens_circuit(server):
+    Handler.script = [503, 200]
+    http = client()
+    assert http.post("search", server, json={}).status_code == 200
+    assert Handler.hits == 2
+
+    http.breakers["search"].failure_threshold = 1
+    Handler.script = [503, 503, 503]
+    assert http.post("search", server, json={}).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        http.post("search", server, json={})
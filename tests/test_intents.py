@@ -0,0 +1,35 @@
+import pytest
+
+import intents
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("hi", "greeting"),
+    ("Hello, how are you?", "greeting"),
+    ("namaste ji", "greeting"),
+    ("kya haal hai", "greeting"),
+    ("Thank you so much sir!", "thanks"),
+    ("thx", "thanks"),
+    ("What is my attendance?", "attendance"),
+    ("Show me my result.", "result"),
+    ("What is my CGPA?", "result"),
+    ("Where is the library?", "faq"),
+    ("Which buses go to this campus?", "faq"),  # "hi" inside "which"/"this" is not a greeting
+])
+def test_route(text, intent):
+    assert intents.route(text) == intent
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Hi, where is the reception?", "faq"),
+    ("hey there, what is the hostel fee", "faq"),
+    ("thanks, what is my attendance?", "attendance"),
+    ("Hello sir, show me my result", "result"),
+])
+def test_greeting_with_a_question_is_not_small_talk(text, intent):
+    assert intents.route(text) == intent
+
+
+def test_detect_tags():
+    assert intents.detect("Hi! Where is the library?") >= {"greeting", "question"}
+    assert intents.detect("") == frozenset()
@@ -0,0 +1,36 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from llm_stream import STREAM_ACCEPT, StreamTimer, iter_tokens
+from llm_stub import StubHandler, refine
+
+ANSWER = "B.Tech IT ki fees ₹1,20,000 hai — शुल्क हर साल देना होता है।"
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    StubHandler.tokens_per_sec = 10_000
+    StubHandler.first_token_delay = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/refine"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("headers, body", [
+    ({"Accept": STREAM_ACCEPT}, {}),  # server-sent events
+    ({}, {"stream": True}),  # NDJSON
+    ({}, {}),  # one JSON answer
+])
+def test_streams_non_ascii_tokens(stub_url, headers, body):
+    payload = {"query": "fees", "answer": ANSWER, **body}
+    with requests.post(stub_url, json=payload, headers=headers, stream=True, timeout=10) as response:
+        timer = StreamTimer()
+        text = "".join(timer.track(iter_tokens(response)))
+
+    assert text == refine("fees", ANSWER)
+    assert timer.stats()["chunks"] >= 1
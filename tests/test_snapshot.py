@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pytest
+
+import snapshot
+from lexical import BM25Index
+from partitions import CategoryPartitions
+from vector_index import NumpyIndex
+
+FAQS = [
+    ("f1", "Where is the library?", "campus", "The library is in block A."),
+    ("f2", "What is the hostel fee?", "fees", "The hostel fee is 40,000 per year."),
+    ("f3", "When does the bus leave?", "transport", "Buses leave the main gate at 5 pm."),
+    ("f4", "How do I pay the tuition fee?", "fees", "Pay the tuition fee on the student portal."),
+    ("f5", "Is there a bus to the station?", "transport", "Route 7 goes to the railway station."),
+    ("f6", "Where is the canteen?", "campus", "The canteen is next to the library."),
+]
+
+
+@pytest.fixture
+def source():
+    rng = np.random.default_rng(0)
+    return NumpyIndex(
+        [faq_id for faq_id, *_ in FAQS],
+        rng.normal(size=(len(FAQS), 8)).astype(np.float32),
+        metadatas=[{"category": category, "answer": answer} for _, _, category, answer in FAQS],
+        documents=[question for _, question, *_ in FAQS],
+        space="cosine",
+    )
+
+
+@pytest.fixture
+def loaded(source, tmp_path):
+    snapshot.export_snapshot(source, "test-model", tmp_path)
+    return snapshot.load_snapshot(tmp_path, "test-model")
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+    decode = snapshot.SnapshotTable._decode_row
+
+    def counting(self, i):
+        calls.append(i)
+        return decode(self, i)
+
+    monkeypatch.setattr(snapshot.SnapshotTable, "_decode_row", counting)
+    return calls
+
+
+def test_stored_bm25_matches_rebuilt(loaded):
+    rebuilt = BM25Index.from_records(loaded.ids, loaded.documents, loaded.metadatas)
+    stored = snapshot.load_lexical_index(loaded)
+    for query, categories in [("bus station", None), ("fee", None), ("library", ["campus"]), ("fee", ["transport"])]:
+        got, want = stored.search(query, 5, categories), rebuilt.search(query, 5, categories)
+        assert [row for row, _ in got] == [row for row, _ in want]
+        assert np.allclose([score for _, score in got], [score for _, score in want])
+
+
+def test_stored_partitions_match_rebuilt(loaded):
+    rebuilt = CategoryPartitions.from_index(loaded)
+    stored = snapshot.load_partitions(loaded)
+    assert stored.categories == rebuilt.categories == ["campus", "fees", "transport"]
+    assert np.allclose(stored.centroids, rebuilt.centroids)
+    for category in stored.categories:
+        assert list(stored.indexes[category].ids) == list(rebuilt.indexes[category].ids)
+
+
+def test_loading_decodes_no_rows(source, tmp_path, decodes):
+    snapshot.export_snapshot(source, "test-model", tmp_path)
+    index = snapshot.load_snapshot(tmp_path, "test-model")
+    lexical = snapshot.load_lexical_index(index)
+    snapshot.load_partitions(index)
+    lexical.search("fee", 5, ["fees"])
+    assert decodes == []
+
+    row, _ = lexical.search("canteen", 1)[0]
+    assert (lexical.ids[row], lexical.metadatas[row]["category"]) == ("f6", "campus")
+    assert decodes == [row]  # decoded once for both columns
+
+
+def test_older_format_is_reexported(source, tmp_path):
+    directory = snapshot.export_snapshot(source, "test-model", tmp_path)
+    (directory / snapshot.BM25_TERMS_FILE).unlink()
+    header = snapshot.read_header(directory)
+    header["format_version"] = snapshot.FORMAT_VERSION - 1
+    (directory / snapshot.HEADER_FILE).write_text(json.dumps(header), encoding="utf-8")
+    assert not snapshot.is_current_format(tmp_path)
+
+    snapshot.export_snapshot(source, "test-model", tmp_path)
+    assert snapshot.is_current_format(tmp_path)
+    assert snapshot.load_lexical_index(snapshot.load_snapshot(tmp_path)).search("bus", 2)
@@ -0,0 +1,29 @@
+import pytest
+
+from user_store import EmailAlreadyRegistered, UserStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UserStore(tmp_path / "users.sqlite3")
+
+
+def test_signup_twice_keeps_first_account(store):
+    store.create_user({"name": "Asha", "email": "asha@college.edu", "password": "first"})
+    store.append_message("asha@college.edu", "user", "where is the library?")
+
+    with pytest.raises(EmailAlreadyRegistered):
+        store.create_user({"name": "Mallory", "email": "ASHA@college.edu ", "password": "second"})
+
+    assert store.authenticate("asha@college.edu", "first")["name"] == "Asha"
+    assert store.authenticate("asha@college.edu", "second") is None
+    assert store.count_messages("asha@college.edu") == 1
+
+
+def test_messages_page_cursor(store):
+    for i in range(5):
+        store.append_message("u", "user", f"q{i}", ts=100.0 + i)
+    newest = store.messages_page("u", limit=2)
+    assert [m["content"] for m in newest] == ["q3", "q4"]
+    older = store.messages_page("u", limit=2, before=(newest[0]["ts"], newest[0]["id"]))
+    assert [m["content"] for m in older] == ["q1", "q2"]
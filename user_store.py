@@ -0,0 +1,199 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# ---------------------- Config ----------------------
+BASE_DIR = Path(__file__).parent
+DB_PATH = Path(os.environ.get("FAQ_USER_DB", BASE_DIR / "data" / "chatbot.sqlite3"))
+PASSWORD_ITERATIONS = 200_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    email         TEXT PRIMARY KEY,          -- lowercase login id
+    name          TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    profile       TEXT NOT NULL DEFAULT '{}', -- other profile fields as JSON
+    created_at    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role    TEXT NOT NULL,
+    content TEXT NOT NULL,
+    ts      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_user_ts ON messages (user_id, ts);
+"""
+
+
+def hash_password(password: str, salt: bytes = None) -> str:
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PASSWORD_ITERATIONS)
+    return f"pbkdf2_sha256${PASSWORD_ITERATIONS}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    try:
+        _, iterations, salt, expected = stored.split("$")
+    except ValueError:
+        return False
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations)
+    )
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+class EmailAlreadyRegistered(ValueError):
+    """Raised when signing up with an email that already has an account."""
+
+
+class UserStore:
+    """
+    SQLite (WAL) store for registered users and chat history.
+
+    Every thread gets its own connection. Messages are read in pages, newest first
+    on disk and oldest first in the returned list, keyed by (ts, id), so reading a
+    page costs the same no matter how long the history is.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------------------- Users ----------------------
+    def create_user(self, profile: dict) -> dict:
+        """
+        Register a new user; `profile` must hold name, email and a plain-text password.
+
+        Raises EmailAlreadyRegistered if the email has an account, so signing up
+        can never replace another user's password or read their history.
+        """
+        extra = {k: v for k, v in profile.items() if k not in ("name", "email", "password")}
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (email, name, password_hash, profile, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        profile["email"].strip().lower(),
+                        profile["name"],
+                        hash_password(profile["password"]),
+                        json.dumps(extra),
+                        time.time(),
+                    ),
+                )
+        except sqlite3.IntegrityError:
+            raise EmailAlreadyRegistered(f"{profile['email'].strip()} is already registered. Please log in.")
+        return self.get_user(profile["email"])
+
+    def _row_to_profile(self, row) -> dict:
+        return {"name": row["name"], "email": row["email"], **json.loads(row["profile"])}
+
+    def get_user(self, email: str):
+        """Return the user's profile (never the password hash), or None."""
+        row = self._conn().execute(
+            "SELECT * FROM users WHERE email = ?", (email.strip().lower(),)
+        ).fetchone()
+        return self._row_to_profile(row) if row else None
+
+    def authenticate(self, email: str, password: str):
+        """Return the user's profile if the password matches, else None."""
+        row = self._conn().execute(
+            "SELECT * FROM users WHERE email = ?", (email.strip().lower(),)
+        ).fetchone()
+        if row and verify_password(password, row["password_hash"]):
+            return self._row_to_profile(row)
+        return None
+
+    # ---------------------- Messages ----------------------
+    def append_message(self, user_id: str, role: str, content: str, ts: float = None) -> dict:
+        ts = ts or time.time()
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                "INSERT INTO messages (user_id, role, content, ts) VALUES (?, ?, ?, ?)",
+                (user_id, role, content, ts),
+            )
+        return {"id": cur.lastrowid, "role": role, "content": content, "ts": ts}
+
+    def messages_page(self, user_id: str, limit: int = 50, before=None) -> list:
+        """
+        Up to `limit` messages older than the `before` cursor ((ts, id) of the oldest
+        message already shown; None for the newest page), returned oldest first.
+        """
+        if before is None:
+            rows = self._conn().execute(
+                """
+                SELECT id, role, content, ts FROM messages
+                WHERE user_id = ?
+                ORDER BY ts DESC, id DESC LIMIT ?
+                """,
+                (user_id, limit),
+            ).fetchall()
+        else:
+            ts, msg_id = before
+            rows = self._conn().execute(
+                """
+                SELECT id, role, content, ts FROM messages
+                WHERE user_id = ? AND (ts < ? OR (ts = ? AND id < ?))
+                ORDER BY ts DESC, id DESC LIMIT ?
+                """,
+                (user_id, ts, ts, msg_id, limit),
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def latest_message_id(self, user_id: str) -> int:
+        """Id of the user's newest message (0 if none); changes whenever a message is added."""
+        row = self._conn().execute(
+            "SELECT id FROM messages WHERE user_id = ? ORDER BY ts DESC, id DESC LIMIT 1",
+            (user_id,),
+        ).fetchone()
+        return row[0] if row else 0
+
+    def count_messages(self, user_id: str) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM messages WHERE user_id = ?", (user_id,)
+        ).fetchone()[0]
+
+    def top_questions(self, limit: int = 50) -> list:
+        """[(question, times asked)] for the most frequent user messages across all users."""
+        rows = self._conn().execute(
+            """
+            SELECT lower(trim(content)) AS question, COUNT(*) AS n FROM messages
+            WHERE role = 'user'
+            GROUP BY question ORDER BY n DESC, question LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+        return [(row["question"], row["n"]) for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> UserStore:
+    """Process-wide store shared by every Streamlit session."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = UserStore()
+    return _store
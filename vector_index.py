@@ -0,0 +1,126 @@
+import numpy as np
+
+# Chroma's (pre-1.0) collection metadata key for the distance function
+_SPACE_KEY = "hnsw:space"
+
+
+def collection_space(collection):
+    """Distance function of a Chroma collection: "l2", "cosine" or "ip"."""
+    space = (collection.metadata or {}).get(_SPACE_KEY)
+    if space:
+        return space
+    # Chroma >= 1.0 keeps it in the collection configuration
+    config = getattr(collection, "configuration_json", None) or {}
+    for index_type in ("hnsw", "spann"):
+        space = (config.get(index_type) or {}).get("space")
+        if space:
+            return space
+    return "l2"
+
+
+def normalize_rows(matrix):
+    """Return a contiguous float32 copy of `matrix` with every row scaled to unit length."""
+    matrix = np.array(matrix, dtype=np.float32, copy=True, order="C")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def similarity_to_distance(similarity, space="l2"):
+    """Convert cosine similarity of unit vectors to the collection's distance convention."""
+    if space == "l2":
+        return np.maximum(2.0 - 2.0 * similarity, 0.0)
+    return 1.0 - similarity
+
+
+def distance_to_similarity(distance, space="l2"):
+    """Inverse of similarity_to_distance()."""
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+class NumpyIndex:
+    """
+    Exact top-k search over an in-memory, L2-normalized float32 embedding matrix.
+
+    One matrix product scores every query against every FAQ, and argpartition
+    picks the top k. query() mirrors collection.query(query_embeddings=...), so
+    callers can swap it in for the Chroma collection. Distances use the same
+    convention as the collection's space: "l2" -> 2 - 2*cos, "cosine" -> 1 - cos,
+    "ip" -> 1 - dot.
+    """
+
+    def __init__(self, ids, embeddings, metadatas=None, documents=None, space="l2", normalized=False):
+        # ids/metadatas/documents may be lists or lazy sequences (e.g. a snapshot table)
+        self.ids = ids if hasattr(ids, "__getitem__") else list(ids)
+        if normalized:
+            self.matrix = embeddings
+        elif len(self.ids):
+            self.matrix = normalize_rows(embeddings)
+        else:
+            self.matrix = np.zeros((0, 0), np.float32)
+        self.metadatas = metadatas if metadatas is not None else [None] * len(self.ids)
+        self.documents = documents if documents is not None else [None] * len(self.ids)
+        self.space = space
+
+    @classmethod
+    def from_collection(cls, collection, page_size=1000):
+        """Load every embedding, metadata and document from a Chroma collection."""
+        ids, embeddings, metadatas, documents = [], [], [], []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["embeddings", "metadatas", "documents"],
+                limit=page_size,
+                offset=offset,
+            )
+            page_ids = page.get("ids") or []
+            if not page_ids:
+                break
+            ids.extend(page_ids)
+            embeddings.extend(page["embeddings"])
+            metadatas.extend(page.get("metadatas") or [None] * len(page_ids))
+            documents.extend(page.get("documents") or [None] * len(page_ids))
+            offset += len(page_ids)
+
+        return cls(ids, embeddings, metadatas, documents, space=collection_space(collection))
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def search(self, query_embeddings, k=1):
+        """Return (row_indices, distances), each shaped (n_queries, min(k, len(index)))."""
+        queries = normalize_rows(query_embeddings)
+        k = min(k, len(self.ids))
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        scores = queries @ self.matrix.T
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return top, similarity_to_distance(top_scores, self.space)
+
+    def query(self, query_embeddings, n_results=1):
+        """Batched top-k in the same result shape as Chroma's collection.query()."""
+        rows, distances = self.search(query_embeddings, n_results)
+        return self.results(rows, distances)
+
+    def results(self, rows, distances):
+        """collection.query()-shaped dict for per-query rows of this index and their distances."""
+        return {
+            "ids": [[self.ids[i] for i in r] for r in rows],
+            "distances": distances.tolist(),
+            "metadatas": [[self.metadatas[i] for i in r] for r in rows],
+            "documents": [[self.documents[i] for i in r] for r in rows],
+        }